@@ -4,22 +4,144 @@ except ImportError:
     pyaudio = None
 
 import asyncio
+import collections
 import logging
 from .config import Config
 
 logger = logging.getLogger(__name__)
 
+class IngressBuffer:
+    POLICIES = ("drop_oldest", "coalesce", "block")
+
+    def __init__(self, max_bytes, max_chunks=64, policy="drop_oldest"):
+        """
+        Bounded queue of inbound PCM chunks between the producers (WebSocket reader,
+        PyAudio callback) and the pipeline's run loop. When it is full:
+          drop_oldest: discard the oldest audio (stale audio is worthless while IDLE)
+          coalesce:    append to the newest chunk instead of queueing another item;
+                       past max_bytes the oldest audio is still dropped
+          block:       put() waits for room (backpressure to the WebSocket reader);
+                       put_nowait() can't wait, so it coalesces
+        Either way at most max_bytes of audio is ever queued, so lag is capped.
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown ingress policy: {policy}")
+        self.max_bytes = max_bytes
+        self.max_chunks = max_chunks
+        self._policy = policy
+        self._chunks = collections.deque()
+        self._bytes = 0
+        self._readable = asyncio.Event()
+        self._space = asyncio.Event()
+        self.closed = False
+
+        self.dropped_chunks = 0
+        self.dropped_bytes = 0
+        self.coalesced_chunks = 0
+        self.blocked_puts = 0
+        self.max_depth_bytes = 0
+
+    @property
+    def policy(self):
+        return self._policy
+
+    @policy.setter
+    def policy(self, value):
+        if value not in self.POLICIES:
+            raise ValueError(f"Unknown ingress policy: {value}")
+        self._policy = value
+        self._space.set() # Blocked writers re-check under the new policy
+
+    def qsize(self):
+        return len(self._chunks)
+
+    @property
+    def depth_bytes(self):
+        return self._bytes
+
+    async def put(self, chunk):
+        if self._policy == "block" and not self._fits(chunk):
+            self.blocked_puts += 1
+            while self._policy == "block" and not self._fits(chunk) and not self.closed:
+                self._space.clear()
+                await self._space.wait()
+        self.put_nowait(chunk)
+
+    def put_nowait(self, chunk):
+        """Never waits. Safe from call_soon_threadsafe (PyAudio callback)."""
+        if self.closed:
+            return
+        if not chunk:
+            # Wake-up marker for the consumer; never counted or dropped
+            self._chunks.append(chunk)
+            self._readable.set()
+            return
+
+        if len(self._chunks) >= self.max_chunks and self._chunks and self._chunks[-1] and self._policy != "drop_oldest":
+            self._chunks[-1] += chunk
+            self.coalesced_chunks += 1
+        else:
+            self._chunks.append(chunk)
+        self._bytes += len(chunk)
+
+        while len(self._chunks) > 1 and (self._bytes > self.max_bytes or len(self._chunks) > self.max_chunks):
+            dropped = self._chunks.popleft()
+            self._bytes -= len(dropped)
+            if dropped:
+                self.dropped_chunks += 1
+                self.dropped_bytes += len(dropped)
+        self.max_depth_bytes = max(self.max_depth_bytes, self._bytes)
+        self._readable.set()
+
+    async def get(self):
+        while not self._chunks:
+            self._readable.clear()
+            await self._readable.wait()
+        chunk = self._chunks.popleft()
+        self._bytes -= len(chunk)
+        self._space.set()
+        return chunk
+
+    async def get_batch(self):
+        """Wait for at least one chunk, then take everything queued (oldest first)."""
+        while not self._chunks:
+            self._readable.clear()
+            await self._readable.wait()
+        batch = list(self._chunks)
+        self._chunks.clear()
+        self._bytes = 0
+        self._space.set()
+        return batch
+
+    def close(self):
+        """Release blocked writers; later puts are discarded."""
+        self.closed = True
+        self._space.set()
+
+    def _fits(self, chunk):
+        if not self._chunks:
+            return True # An oversized chunk would never fit; admit it alone rather than wait forever
+        return self._bytes + len(chunk) <= self.max_bytes and len(self._chunks) < self.max_chunks
+
 class AudioStream:
-    def __init__(self, loop=None):
-        self.pa = pyaudio.PyAudio() if pyaudio else None
+    def __init__(self, loop=None, capture_local=True):
+        # WebSocket sessions only receive frames via put_frame, never open the microphone
+        self.capture_local = capture_local
+        self.pa = pyaudio.PyAudio() if pyaudio and capture_local else None
         self.stream = None
         self.loop = loop or asyncio.get_event_loop()
-        self.queue = asyncio.Queue()
+        self.bytes_per_second = Config.SAMPLE_RATE * 2 # 16-bit mono
+        self.queue = IngressBuffer(
+            max_bytes=int(Config.INGRESS_MAX_SECONDS * self.bytes_per_second),
+            max_chunks=Config.INGRESS_MAX_CHUNKS,
+            policy=Config.INGRESS_IDLE_POLICY
+        )
         self.running = False
 
     def start(self):
         if not self.pa:
-            logger.warning("PyAudio not available. AudioStream will only accept manual frames (e.g. via WebSocket).")
+            if self.capture_local:
+                logger.warning("PyAudio not available. AudioStream will only accept manual frames (e.g. via WebSocket).")
             self.running = True
             return
 
@@ -47,9 +169,28 @@ class AudioStream:
         return None, pyaudio.paContinue
 
     async def put_frame(self, frame: bytes):
-        """Manually put a frame into the queue (e.g. from WebSocket)."""
+        """Manually put a frame into the queue (e.g. from WebSocket). May wait under the "block" policy."""
         await self.queue.put(frame)
 
+    def set_policy(self, policy):
+        self.queue.policy = policy
+
+    def wake(self):
+        """Unblocks a pending get_frame() with an empty frame."""
+        self.queue.put_nowait(b"")
+
+    def stats(self):
+        return {
+            "policy": self.queue.policy,
+            "depth_chunks": self.queue.qsize(),
+            "depth_seconds": round(self.queue.depth_bytes / self.bytes_per_second, 3),
+            "max_depth_seconds": round(self.queue.max_depth_bytes / self.bytes_per_second, 3),
+            "dropped_chunks": self.queue.dropped_chunks,
+            "dropped_seconds": round(self.queue.dropped_bytes / self.bytes_per_second, 3),
+            "coalesced_chunks": self.queue.coalesced_chunks,
+            "blocked_puts": self.queue.blocked_puts,
+        }
+
     async def get_frame(self):
         try:
             # Non-blocking retrieval from asyncio.Queue
@@ -58,6 +199,14 @@ class AudioStream:
             logger.error(f"Error getting frame: {e}")
             return None
 
+    async def get_frames(self):
+        """All frames queued right now (waits only while there are none)."""
+        try:
+            return await self.queue.get_batch()
+        except Exception as e:
+            logger.error(f"Error getting frames: {e}")
+            return []
+
     def stop(self):
         if not self.running:
             return
@@ -70,6 +219,7 @@ class AudioStream:
 
     def close(self):
         self.stop()
+        self.queue.close()
         if self.pa:
             self.pa.terminate()
 
@@ -0,0 +1,18 @@
+from .config import Config
+
+class AudioClock:
+    def __init__(self, sample_rate=None):
+        """
+        Time as the audio stream sees it: seconds of samples received so far.
+        Endpointing and timeouts measured on this clock depend only on the audio itself,
+        so a backlogged loop drains queued frames without distorting them, and recorded
+        audio can be replayed faster than real time with identical decisions.
+        """
+        self.sample_rate = sample_rate or Config.SAMPLE_RATE
+        self.samples = 0
+
+    def advance(self, samples):
+        self.samples += samples
+
+    def now(self):
+        return self.samples / self.sample_rate
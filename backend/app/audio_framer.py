@@ -0,0 +1,59 @@
+class AudioFramer:
+    def __init__(self, frame_samples, capacity_frames=32, sample_width=2):
+        """
+        Cuts a PCM byte stream into fixed-size frames without re-slicing the buffer.
+        Incoming chunks are copied once into a preallocated buffer; frames are handed
+        out as memoryviews into it. A view is only valid until the next write(), so
+        consumers that keep audio around must copy it (bytes(frame)).
+        """
+        self.frame_bytes = frame_samples * sample_width
+        self._buf = bytearray(self.frame_bytes * max(2, capacity_frames))
+        self._view = memoryview(self._buf)
+        self._start = 0 # First unread byte
+        self._end = 0 # One past the last written byte
+
+    def __len__(self):
+        """Bytes written but not yet handed out as a frame."""
+        return self._end - self._start
+
+    def write(self, data):
+        """Append a chunk. Grows the buffer only if a single burst outruns its capacity."""
+        size = len(data)
+        if self._end + size > len(self._buf):
+            self._compact()
+            if self._end + size > len(self._buf):
+                self._grow(self._end + size)
+        self._buf[self._end:self._end + size] = data
+        self._end += size
+
+    def frames(self):
+        """Yield every complete frame written so far. Frames not iterated stay queued."""
+        while self._end - self._start >= self.frame_bytes:
+            start = self._start
+            self._start += self.frame_bytes
+            yield self._view[start:start + self.frame_bytes]
+
+    def push(self, data):
+        """write() then frames(), the common case for a consumer fed chunk by chunk."""
+        self.write(data)
+        return self.frames()
+
+    def clear(self):
+        self._start = self._end = 0
+
+    def _compact(self):
+        # Only the unread tail moves (usually less than one frame)
+        remaining = self._end - self._start
+        if remaining and self._start:
+            self._buf[:remaining] = self._buf[self._start:self._end]
+        self._start, self._end = 0, remaining
+
+    def _grow(self, needed):
+        # Views already handed out keep the old buffer alive, so allocate instead of resizing
+        capacity = len(self._buf)
+        while capacity < needed:
+            capacity *= 2
+        buf = bytearray(capacity)
+        buf[:self._end] = self._buf[:self._end]
+        self._buf = buf
+        self._view = memoryview(buf)
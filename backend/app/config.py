@@ -3,6 +3,10 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def _optional_float(name):
+    value = os.getenv(name)
+    return float(value) if value else None
+
 class Config:
     DEBUG = os.getenv("DEBUG", "False").lower() == "true"
     ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000").split(",")
@@ -14,7 +18,87 @@ class Config:
     LOCATION_CONTEXT = os.getenv("LOCATION_CONTEXT", "Jalandhar, Punjab") # For weather and local grounding
     DATABASE_URL = os.getenv("DATABASE_URL")
     AI_NAME = os.getenv("AI_NAME", "AI Friend")
+    MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "32")) # Concurrent conversations per process
     
+    # Message Logging (write-behind)
+    DB_LOG_BATCH_SIZE = int(os.getenv("DB_LOG_BATCH_SIZE", "50"))
+    DB_LOG_FLUSH_INTERVAL = float(os.getenv("DB_LOG_FLUSH_INTERVAL", "0.5")) # seconds
+
+    # LLM Streaming Deadlines (seconds)
+    LLM_FIRST_TOKEN_TIMEOUT = float(os.getenv("LLM_FIRST_TOKEN_TIMEOUT", "4.0")) # Falls back to the next tier when missed
+    LLM_CHUNK_TIMEOUT = float(os.getenv("LLM_CHUNK_TIMEOUT", "10.0"))
+    LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "60.0"))
+
+    # Voice Pipeline
+    # Scales the simulated "thinking" pause (a floor on time-to-first-audio). 0 disables it.
+    THINKING_DELAY_SCALE = float(os.getenv("THINKING_DELAY_SCALE", "1.0"))
+    TTS_LOOKAHEAD = int(os.getenv("TTS_LOOKAHEAD", "2")) # Sentences synthesized ahead of playback
+    TTS_BUFFER_CHUNKS = int(os.getenv("TTS_BUFFER_CHUNKS", "32")) # Audio chunks buffered per utterance
+    TTS_FIRST_CHUNK_TIMEOUT = float(os.getenv("TTS_FIRST_CHUNK_TIMEOUT", "10.0")) # seconds
+    TTS_CHUNK_TIMEOUT = float(os.getenv("TTS_CHUNK_TIMEOUT", "5.0")) # seconds between chunks
+    TTS_MAX_STREAMS = int(os.getenv("TTS_MAX_STREAMS", "32")) # Concurrent upstream TTS streams
+    # Whisper decode workers, shared by all sessions
+    STT_WORKERS = int(os.getenv("STT_WORKERS", "0")) # 0: one per 8 MAX_SESSIONS, up to the CPU count
+    STT_MAX_PENDING = int(os.getenv("STT_MAX_PENDING", "0")) # Finals queued or decoding; 0: one per session
+    STT_MAX_HOLD = float(os.getenv("STT_MAX_HOLD", "10.0")) # seconds of audio a finished utterance waits for a slot before it is dropped
+    # Partial transcripts: re-decode the tail of the live utterance while the user is still talking
+    STT_PARTIALS = os.getenv("STT_PARTIALS", "True").lower() == "true"
+    STT_PARTIAL_INTERVAL = float(os.getenv("STT_PARTIAL_INTERVAL", "0.6")) # seconds of new audio between partials
+    STT_PARTIAL_WINDOW = float(os.getenv("STT_PARTIAL_WINDOW", "8.0")) # seconds of trailing audio per partial
+    # End-of-turn detection: trailing silence that ends a turn adapts per turn within these bounds
+    ENDPOINT_MIN_SILENCE = float(os.getenv("ENDPOINT_MIN_SILENCE", "0.3")) # seconds
+    ENDPOINT_BASE_SILENCE = float(os.getenv("ENDPOINT_BASE_SILENCE", "0.8")) # seconds, before adjustments
+    ENDPOINT_MAX_SILENCE = float(os.getenv("ENDPOINT_MAX_SILENCE", "2.0")) # seconds
+    # Speculation: start the LLM on a stable partial transcript before the turn is endpointed
+    SPECULATION = os.getenv("SPECULATION", "True").lower() == "true"
+    SPECULATION_STABLE_WINDOW = float(os.getenv("SPECULATION_STABLE_WINDOW", "0.3")) # seconds a partial must hold
+    SPECULATION_MIN_SIMILARITY = float(os.getenv("SPECULATION_MIN_SIMILARITY", "0.9")) # final vs. guessed words
+    # TTS cache: short utterances are synthesized once, then replayed from memory (and disk, if TTS_CACHE_DIR is set)
+    TTS_CACHE = os.getenv("TTS_CACHE", "True").lower() == "true"
+    TTS_CACHE_MAX_CHARS = int(os.getenv("TTS_CACHE_MAX_CHARS", "120")) # Longer text is never cached
+    TTS_CACHE_MEMORY_MB = float(os.getenv("TTS_CACHE_MEMORY_MB", "32"))
+    TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "") # e.g. .tts_cache; empty keeps the cache in memory only
+    TTS_CACHE_DISK_MB = float(os.getenv("TTS_CACHE_DISK_MB", "256"))
+    # Pre-rendered at startup, "|"-separated (defaults: the canned greeting/farewell fallbacks)
+    TTS_CACHE_WARMUP = [p for p in os.getenv("TTS_CACHE_WARMUP", "Hey! Good to see you.|Goodbye!").split("|") if p.strip()]
+    # Greeting prefetch: wake plays a pre-rendered greeting instead of waiting on Gemini + ElevenLabs
+    GREETING_CACHE = os.getenv("GREETING_CACHE", "True").lower() == "true"
+    GREETING_CACHE_SIZE = int(os.getenv("GREETING_CACHE_SIZE", "2")) # Greetings kept ready
+    GREETING_CACHE_TTL = float(os.getenv("GREETING_CACHE_TTL", "900")) # seconds; also stale when the day part changes
+
+    # Audio Ingress: bounded per-session buffer between the client/mic and the pipeline
+    INGRESS_MAX_SECONDS = float(os.getenv("INGRESS_MAX_SECONDS", "2.0")) # Most audio ever queued (caps lag)
+    INGRESS_MAX_CHUNKS = int(os.getenv("INGRESS_MAX_CHUNKS", "64"))
+    INGRESS_IDLE_POLICY = os.getenv("INGRESS_IDLE_POLICY", "drop_oldest") # drop_oldest | coalesce | block
+    INGRESS_ACTIVE_POLICY = os.getenv("INGRESS_ACTIVE_POLICY", "block") # During a conversation
+
+    # Metrics: per-turn latency histograms and error counters served on /metrics
+    METRICS = os.getenv("METRICS", "True").lower() == "true"
+    # Event loop watchdog: logs the blocking stack when a callback holds the loop this long
+    LOOP_MONITOR = os.getenv("LOOP_MONITOR", "True").lower() == "true"
+    LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.05")) # seconds between heartbeats
+    LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.1")) # seconds
+    LOOP_LAG_FAIL = float(os.getenv("LOOP_LAG_FAIL", "0")) # seconds; > 0 makes shutdown raise on any longer block (tests)
+
+    # Providers behind LLMService/TTSService (see app/providers.py):
+    # gemini / elevenlabs (real SDK), record (real + save cassettes), cassette (offline replay), synthetic
+    LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+    TTS_PROVIDER = os.getenv("TTS_PROVIDER", "elevenlabs")
+    PROVIDER_CASSETTE_DIR = os.getenv("PROVIDER_CASSETTE_DIR", "cassettes")
+    PROVIDER_SEED = int(os.getenv("PROVIDER_SEED")) if os.getenv("PROVIDER_SEED") else None # Reproducible jitter/errors
+    # Stand-in latency (seconds; unset keeps cassette timing / synthetic defaults), ± jitter fraction, error rates
+    LLM_FAKE_FIRST = _optional_float("LLM_FAKE_FIRST") # Time to first token
+    LLM_FAKE_INTERVAL = _optional_float("LLM_FAKE_INTERVAL")
+    LLM_FAKE_JITTER = float(os.getenv("LLM_FAKE_JITTER", "0"))
+    LLM_FAKE_ERROR_RATE = float(os.getenv("LLM_FAKE_ERROR_RATE", "0")) # Fails before the first token
+    LLM_FAKE_MIDSTREAM_ERROR_RATE = float(os.getenv("LLM_FAKE_MIDSTREAM_ERROR_RATE", "0"))
+    LLM_FAKE_FAIL_MODELS = os.getenv("LLM_FAKE_FAIL_MODELS").split(",") if os.getenv("LLM_FAKE_FAIL_MODELS") else None # e.g. only the first tier
+    TTS_FAKE_FIRST = _optional_float("TTS_FAKE_FIRST") # Time to first audio byte
+    TTS_FAKE_INTERVAL = _optional_float("TTS_FAKE_INTERVAL")
+    TTS_FAKE_JITTER = float(os.getenv("TTS_FAKE_JITTER", "0"))
+    TTS_FAKE_ERROR_RATE = float(os.getenv("TTS_FAKE_ERROR_RATE", "0"))
+    TTS_FAKE_MIDSTREAM_ERROR_RATE = float(os.getenv("TTS_FAKE_MIDSTREAM_ERROR_RATE", "0"))
+
     # Audio Settings
     SAMPLE_RATE = 16000
     FRAME_LENGTH_MS = 20  # ms
@@ -48,8 +132,9 @@ class Config:
     def validate():
         missing = []
         if not Config.PORCUPINE_ACCESS_KEY: missing.append("PORCUPINE_ACCESS_KEY")
-        if not Config.GEMINI_API_KEY: missing.append("GEMINI_API_KEY")
-        if not Config.ELEVENLABS_API_KEY: missing.append("ELEVENLABS_API_KEY")
+        # Offline providers (cassette/synthetic) need no API keys
+        if Config.LLM_PROVIDER in ("gemini", "record") and not Config.GEMINI_API_KEY: missing.append("GEMINI_API_KEY")
+        if Config.TTS_PROVIDER in ("elevenlabs", "record") and not Config.ELEVENLABS_API_KEY: missing.append("ELEVENLABS_API_KEY")
         if not Config.ELEVENLABS_VOICE_ID: missing.append("ELEVENLABS_VOICE_ID")
         
         if not Config.DEBUG and not Config.DATABASE_URL:
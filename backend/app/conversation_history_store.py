@@ -1,4 +1,5 @@
 import asyncio
+import copy
 import logging
 import os
 import uuid
@@ -8,14 +9,58 @@ from typing import List, Optional, Dict, Any
 
 import asyncpg
 from .config import Config
+from .message_journal import MessageJournal
+from . import metrics
 
 logger = logging.getLogger(__name__)
 
+GIST_SNIPPET_CHARS = 100 # Blurry memories only need the opening of each message
+
+# First and last message of the N most recent sessions in one round trip.
+# Needs an index on messages (session_id, timestamp) to stay flat as history grows.
+RECENT_SESSION_GISTS = """
+    SELECT s.id AS session_id, s.started_at, m.role, m.content, m.timestamp
+    FROM (
+        SELECT id, started_at FROM sessions
+        WHERE ($2::uuid IS NULL OR id <> $2)
+        ORDER BY started_at DESC
+        LIMIT $1
+    ) s
+    CROSS JOIN LATERAL (
+        (SELECT role, left(content, $3) AS content, timestamp FROM messages
+         WHERE session_id = s.id ORDER BY timestamp ASC LIMIT 1)
+        UNION
+        (SELECT role, left(content, $3) AS content, timestamp FROM messages
+         WHERE session_id = s.id ORDER BY timestamp DESC LIMIT 1)
+    ) m
+    ORDER BY s.started_at DESC, m.timestamp ASC
+"""
+
+# Creating a session bumps the maintained counter in the same statement,
+# so nobody has to COUNT(*) the sessions table.
+START_SESSION = """
+    WITH new_session AS (
+        INSERT INTO sessions (id, started_at) VALUES ($1, NOW())
+    )
+    UPDATE agent_configs SET session_count = session_count + 1 WHERE id = 1
+"""
+
 class ConversationHistoryStore:
     def __init__(self):
         self.dsn = Config.DATABASE_URL
         self.pool: Optional[asyncpg.Pool] = None
+        self.journal: Optional[MessageJournal] = None # Shared by every session view
         self.current_session_id: Optional[uuid.UUID] = None
+        # (limit, excluded session) -> gists. Shared by session views; cleared on end_session.
+        self._gist_cache: Dict[tuple, List[Dict[str, Any]]] = {}
+        # Bootstrap context for LLMService, same sharing rules. See load_context().
+        self._context_cache: Dict[str, Dict[str, Any]] = {}
+
+    def for_session(self):
+        """Per-conversation view that shares the connection pool but tracks its own session id."""
+        session = copy.copy(self)
+        session.current_session_id = None
+        return session
 
     async def initialize(self):
         """Initialize the database connection pool."""
@@ -25,6 +70,13 @@ class ConversationHistoryStore:
             
             # Use statement_cache_size=0 for pgbouncer compatibility
             self.pool = await asyncpg.create_pool(dsn=self.dsn, statement_cache_size=0)
+            # Messages are written behind the conversation, in batches
+            self.journal = MessageJournal(
+                self.pool,
+                batch_size=Config.DB_LOG_BATCH_SIZE,
+                flush_interval=Config.DB_LOG_FLUSH_INTERVAL
+            )
+            self.journal.start()
             
             # We don't create tables here anymore since Prisma handles schema management
             # and we pushed it in the frontend step.
@@ -36,6 +88,7 @@ class ConversationHistoryStore:
             
         except Exception as e:
             logger.error(f"Failed to initialize ConversationHistoryStore: {e}")
+            metrics.DB_ERRORS.inc(operation="initialize")
             raise
 
     async def _ensure_config_exists(self):
@@ -72,8 +125,21 @@ class ConversationHistoryStore:
                         history
                     )
                     logger.info("AgentConfig seeded with empty Evolved Learnings.")
+
+                # One-time backfill of the session counter. The COUNT(*) only runs
+                # while the counter is still 0, i.e. right after the column was added.
+                try:
+                    await conn.execute(
+                        """
+                        UPDATE agent_configs SET session_count = (SELECT COUNT(*) FROM sessions)
+                        WHERE id = 1 AND session_count = 0
+                        """
+                    )
+                except asyncpg.exceptions.UndefinedColumnError:
+                    logger.warning("agent_configs.session_count is missing. Session count falls back to COUNT(*).")
         except Exception as e:
             logger.error(f"Failed to ensure AgentConfig exists: {e}")
+            metrics.DB_ERRORS.inc(operation="ensure_config")
 
     async def get_agent_config(self) -> Dict[str, str]:
         """Fetch personality, history, and evolved learnings from AgentConfig."""
@@ -93,6 +159,7 @@ class ConversationHistoryStore:
                     }
         except Exception as e:
             logger.error(f"Failed to fetch AgentConfig: {e}")
+            metrics.DB_ERRORS.inc(operation="get_agent_config")
         
         return {"personality": "{}", "history": "{}", "evolved_learnings": ""}
 
@@ -105,8 +172,10 @@ class ConversationHistoryStore:
                     "UPDATE agent_configs SET evolved_learnings = $1, updated_at = NOW() WHERE id = 1",
                     content
                 )
+            self._context_cache.clear()
         except Exception as e:
             logger.error(f"Failed to update evolved learnings: {e}")
+            metrics.DB_ERRORS.inc(operation="update_evolved_learnings")
 
     async def start_session(self) -> uuid.UUID:
         """Start a new session and return its ID."""
@@ -117,70 +186,70 @@ class ConversationHistoryStore:
         self.current_session_id = uuid.uuid4()
         try:
             async with self.pool.acquire() as conn:
-                await conn.execute(
-                    'INSERT INTO sessions (id, started_at) VALUES ($1, NOW())',
-                    self.current_session_id
-                )
+                try:
+                    await conn.execute(START_SESSION, self.current_session_id)
+                except asyncpg.exceptions.UndefinedColumnError:
+                    # Schema predates the session counter
+                    await conn.execute(
+                        'INSERT INTO sessions (id, started_at) VALUES ($1, NOW())',
+                        self.current_session_id
+                    )
+            context = self._context_cache.get("context")
+            if context:
+                context["session_count"] += 1
             logger.info(f"Started new session: {self.current_session_id}")
             return self.current_session_id
         except Exception as e:
             logger.error(f"Failed to start session: {e}")
+            metrics.DB_ERRORS.inc(operation="start_session")
             return self.current_session_id
 
     async def log_message(self, role: str, content: str):
-        """Log a message to the current session."""
-        if not self.pool or not self.current_session_id:
+        """Log a message to the current session (queued; written behind by the journal)."""
+        if not self.journal or not self.current_session_id:
             return
 
-        try:
-            async with self.pool.acquire() as conn:
-                await conn.execute(
-                    """
-                    INSERT INTO messages (id, session_id, role, content, timestamp)
-                    VALUES ($1, $2, $3, $4, NOW())
-                    """,
-                    uuid.uuid4(),
-                    self.current_session_id,
-                    role,
-                    content
-                )
-        except Exception as e:
-            logger.error(f"Failed to log message: {e}")
+        self.journal.append(self.current_session_id, role, content)
 
     async def get_recent_sessions_gist(self, limit: int = 3) -> List[Dict[str, Any]]:
-        """Fetch a 'blurry' view of the last few sessions (just first/last messages)."""
+        """Fetch a 'blurry' view of the last few sessions (just first/last messages, truncated)."""
         if not self.pool:
             return []
+
+        # Past sessions only change when one ends, so serve repeats from memory
+        cache_key = (limit, self.current_session_id)
+        if cache_key in self._gist_cache:
+            return self._gist_cache[cache_key]
         
         try:
             async with self.pool.acquire() as conn:
-                # Get last N sessions (excluding current if active)
-                exclude_clause = f"WHERE id != '{self.current_session_id}'" if self.current_session_id else ""
-                sessions = await conn.fetch(
-                    f"SELECT id, started_at FROM sessions {exclude_clause} ORDER BY started_at DESC LIMIT $1",
-                    limit
+                # Get last N sessions (excluding current if active) with their first/last message
+                rows = await conn.fetch(
+                    RECENT_SESSION_GISTS,
+                    limit,
+                    self.current_session_id,
+                    GIST_SNIPPET_CHARS
                 )
-                
-                gists = []
-                for sess in sessions:
-                    # Fetch first and last message to get the "gist"
-                    messages = await conn.fetch(
-                        """
-                        (SELECT role, content, timestamp FROM messages WHERE session_id = $1 ORDER BY timestamp ASC LIMIT 1)
-                        UNION ALL
-                        (SELECT role, content, timestamp FROM messages WHERE session_id = $1 ORDER BY timestamp DESC LIMIT 1)
-                        ORDER BY timestamp ASC
-                        """,
-                        sess["id"]
-                    )
-                    if messages:
-                        gists.append({
-                            "date": sess["started_at"].strftime("%Y-%m-%d"),
-                            "interaction": [dict(m) for m in messages]
-                        })
-                return gists
+
+            gists = []
+            last_session_id = None
+            for row in rows:
+                if row["session_id"] != last_session_id:
+                    last_session_id = row["session_id"]
+                    gists.append({
+                        "date": row["started_at"].strftime("%Y-%m-%d"),
+                        "interaction": []
+                    })
+                gists[-1]["interaction"].append({
+                    "role": row["role"],
+                    "content": row["content"],
+                    "timestamp": row["timestamp"]
+                })
+            self._gist_cache[cache_key] = gists
+            return gists
         except Exception as e:
             logger.error(f"Failed to fetch session gists: {e}")
+            metrics.DB_ERRORS.inc(operation="get_recent_sessions_gist")
             return []
 
     async def get_last_session_time(self) -> Optional[datetime]:
@@ -190,25 +259,34 @@ class ConversationHistoryStore:
         
         try:
             async with self.pool.acquire() as conn:
-                exclude_clause = f"WHERE id != '{self.current_session_id}'" if self.current_session_id else ""
                 row = await conn.fetchrow(
-                    f"SELECT ended_at FROM sessions {exclude_clause} AND ended_at IS NOT NULL ORDER BY ended_at DESC LIMIT 1"
+                    """
+                    SELECT ended_at FROM sessions
+                    WHERE ($1::uuid IS NULL OR id <> $1) AND ended_at IS NOT NULL
+                    ORDER BY ended_at DESC LIMIT 1
+                    """,
+                    self.current_session_id
                 )
                 return row["ended_at"] if row else None
         except Exception as e:
             logger.error(f"Failed to fetch last session time: {e}")
+            metrics.DB_ERRORS.inc(operation="get_last_session_time")
             return None
 
     async def get_total_sessions_count(self) -> int:
-        """Count total historical sessions for milestone tracking."""
+        """Count total historical sessions for milestone tracking (reads the maintained counter)."""
         if not self.pool:
             return 0
         try:
             async with self.pool.acquire() as conn:
-                count = await conn.fetchval("SELECT COUNT(*) FROM sessions")
+                try:
+                    count = await conn.fetchval("SELECT session_count FROM agent_configs WHERE id = 1")
+                except asyncpg.exceptions.UndefinedColumnError:
+                    count = await conn.fetchval("SELECT COUNT(*) FROM sessions")
                 return count or 0
         except Exception as e:
             logger.error(f"Failed to fetch session count: {e}")
+            metrics.DB_ERRORS.inc(operation="get_total_sessions_count")
             return 0
 
     async def get_last_interaction_brief(self) -> Optional[str]:
@@ -223,25 +301,62 @@ class ConversationHistoryStore:
                 return row["content"] if row else None
         except Exception as e:
             logger.error(f"Failed to fetch last interaction: {e}")
+            metrics.DB_ERRORS.inc(operation="get_last_interaction_brief")
             return None
 
+    async def load_context(self) -> Dict[str, Any]:
+        """
+        Everything LLMService needs to bootstrap, fetched concurrently (one pooled connection each).
+        Cached until a session ends or the evolved learnings change; start_session keeps the count current.
+        """
+        context = self._context_cache.get("context")
+        if context:
+            return context
+
+        config, gists, last_seen, session_count, last_interaction = await asyncio.gather(
+            self.get_agent_config(),
+            self.get_recent_sessions_gist(limit=3),
+            self.get_last_session_time(),
+            self.get_total_sessions_count(),
+            self.get_last_interaction_brief()
+        )
+        context = {
+            **config,
+            "recent_gists": gists,
+            "last_seen": last_seen,
+            "session_count": session_count,
+            "last_interaction": last_interaction
+        }
+        if self.pool:
+            self._context_cache["context"] = context
+        return context
+
     async def end_session(self):
         """End the current session."""
         if not self.pool or not self.current_session_id:
             return
 
         try:
+            # Make sure the whole conversation is on disk before closing it out
+            if self.journal:
+                await self.journal.flush()
             async with self.pool.acquire() as conn:
                 await conn.execute(
                     "UPDATE sessions SET ended_at = NOW() WHERE id = $1",
                     self.current_session_id
                 )
             self.current_session_id = None
+            # A newly finished session is now part of everyone's recent history
+            self._gist_cache.clear()
+            self._context_cache.clear()
         except Exception as e:
             logger.error(f"Failed to end session: {e}")
+            metrics.DB_ERRORS.inc(operation="end_session")
 
     async def close(self):
         """Close the database connection pool."""
+        if self.journal:
+            await self.journal.close()
         if self.pool:
             await self.pool.close()
             logger.info("Closed Supabase connection pool.")
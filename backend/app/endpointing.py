@@ -0,0 +1,140 @@
+import collections
+import logging
+import math
+import re
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+FRAME_SECONDS = 0.03 # FramePipeline frames are 30 ms
+TERMINAL = re.compile(r"[.?!][\"')\]]*$")
+CUE_TAG = re.compile(r"\[[^\]]*\]") # Sonic cues like [Soft/Whisper Voice] are not words
+# Trailing words that almost always mean the sentence isn't over
+CONTINUATIONS = {"and", "but", "so", "or", "because", "um", "uh", "like", "the", "a", "to", "if", "then", "with", "of"}
+REFERENCE_RATE = 2.5 # words/s of an average conversational speaker
+
+class Endpointer:
+    def __init__(self, min_silence=None, base_silence=None, max_silence=None):
+        """
+        Picks how much trailing silence ends the user's turn, per turn instead of a fixed 2 s.
+        Starts from base_silence and scales it by:
+          - how the latest partial transcript ends (terminal punctuation vs. "and"/"um")
+          - the energy slope of the last voiced frames (trailing off vs. cut mid-word)
+          - utterance length (short replies end fast, long thoughts get more room)
+          - the speaking rate and pause lengths learned from this user over the session
+        The result is clamped to [min_silence, max_silence].
+        """
+        self.min_silence = Config.ENDPOINT_MIN_SILENCE if min_silence is None else min_silence
+        self.base_silence = Config.ENDPOINT_BASE_SILENCE if base_silence is None else base_silence
+        self.max_silence = Config.ENDPOINT_MAX_SILENCE if max_silence is None else max_silence
+
+        self._levels = collections.deque(maxlen=10) # RMS of the last ~300 ms of voiced frames
+        self._voiced_frames = 0
+        self._silent_run = 0
+        self._pauses = collections.deque(maxlen=30) # Mid-utterance pauses (s) that did not end the turn
+        self.speaking_rate = None # words/s, EMA over finished turns
+        self.last_decision = None
+        self.decisions = collections.deque(maxlen=100) # Chosen hang-over per turn
+
+    def begin_utterance(self):
+        self._levels.clear()
+        self._voiced_frames = 0
+        self._silent_run = 0
+
+    def observe(self, features):
+        """Feed every frame of the live utterance (voiced and silent)."""
+        if features.is_speech:
+            if self._silent_run:
+                # Speech resumed: that gap was a pause, not an endpoint
+                self._pauses.append(self._silent_run * FRAME_SECONDS)
+                self._silent_run = 0
+                self.last_decision = None
+            self._voiced_frames += 1
+            self._levels.append(features.rms)
+        elif self._voiced_frames:
+            self._silent_run += 1
+
+    def hangover(self, partial_text=""):
+        """Silence (seconds) that should end the current turn. Recorded as last_decision."""
+        reasons = {}
+        factor = 1.0
+
+        text = CUE_TAG.sub("", partial_text or "").strip()
+        if text:
+            last_word = text.split()[-1].lower().strip(".,?!\"'")
+            if TERMINAL.search(text):
+                reasons["text"] = 0.6 # Sounds finished
+            elif last_word in CONTINUATIONS:
+                reasons["text"] = 1.6 # Mid-thought
+            elif text.endswith(","):
+                reasons["text"] = 1.3
+
+        slope = self._energy_slope_db()
+        if slope is not None:
+            if slope < -6.0:
+                reasons["energy"] = 0.8 # Voice trailed off
+            elif slope > 0.0:
+                reasons["energy"] = 1.2 # Stopped at full voice, likely a breath
+
+        speech_seconds = self._voiced_frames * FRAME_SECONDS
+        if speech_seconds < 1.0:
+            reasons["length"] = 0.8
+        elif speech_seconds > 5.0:
+            reasons["length"] = 1.15
+
+        if self.speaking_rate:
+            # Slow speakers leave longer gaps between words
+            reasons["rate"] = min(1.4, max(0.75, REFERENCE_RATE / self.speaking_rate))
+
+        for value in reasons.values():
+            factor *= value
+        silence = self.base_silence * factor
+
+        # Never wait less than this user's typical mid-sentence pause
+        typical_pause = self._typical_pause()
+        if typical_pause is not None and silence < typical_pause * 1.2:
+            silence = typical_pause * 1.2
+            reasons["pauses"] = round(typical_pause, 3)
+
+        silence = min(self.max_silence, max(self.min_silence, silence))
+        self.last_decision = {"silence": round(silence, 3), "reasons": reasons}
+        return silence
+
+    def finish_turn(self):
+        """The turn was endpointed: record the decision. Returns the seconds of speech in it."""
+        if self.last_decision:
+            self.decisions.append(self.last_decision["silence"])
+            logger.info(f"Endpoint after {self.last_decision['silence']:.2f}s of silence {self.last_decision['reasons']}")
+            self.last_decision = None
+        return self._voiced_frames * FRAME_SECONDS
+
+    def learn_rate(self, text, speech_seconds):
+        """Fold a final transcript into the per-user speaking rate."""
+        words = len(CUE_TAG.sub("", text or "").split())
+        if words and speech_seconds >= 1.0:
+            rate = words / speech_seconds
+            self.speaking_rate = rate if self.speaking_rate is None else 0.7 * self.speaking_rate + 0.3 * rate
+
+    def stats(self):
+        ordered = sorted(self.decisions)
+        return {
+            "turns": len(ordered),
+            "median_silence": ordered[len(ordered) // 2] if ordered else None,
+            "speaking_rate": round(self.speaking_rate, 2) if self.speaking_rate else None,
+        }
+
+    def _energy_slope_db(self):
+        if len(self._levels) < 4:
+            return None
+        levels = list(self._levels)
+        head = sum(levels[:3]) / 3
+        tail = sum(levels[-3:]) / 3
+        if head <= 0 or tail <= 0:
+            return None
+        return 20 * math.log10(tail / head)
+
+    def _typical_pause(self):
+        if len(self._pauses) < 5:
+            return None
+        ordered = sorted(self._pauses)
+        return ordered[int(len(ordered) * 0.9) - 1] # ~90th percentile
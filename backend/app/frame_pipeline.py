@@ -0,0 +1,69 @@
+import logging
+from typing import NamedTuple
+import numpy as np
+from .audio_framer import AudioFramer
+from .audio_clock import AudioClock
+from .vad import VAD
+
+logger = logging.getLogger(__name__)
+
+class FrameFeatures(NamedTuple):
+    pcm: memoryview # 30 ms of 16-bit PCM. Only valid until the next push(); copy to keep it.
+    is_speech: bool
+    rms: float # 0.0 (silence) to 1.0 (full scale)
+    timestamp: float # Start of the frame on the pipeline's clock (seconds of audio, by default)
+    duration: float # Frame length in seconds
+
+class FramePipeline:
+    def __init__(self, vad=None, clock=None):
+        """
+        Front stage for inbound audio: cuts chunks into VAD frames, runs VAD and level
+        metering once per frame and hands the same FrameFeatures to every consumer
+        (wake word, STT endpointing, activity tracking, metrics).
+        clock: advanced by the samples of every frame; defaults to an AudioClock, so
+        timestamps follow the audio rather than when the frame happened to be processed.
+        """
+        self.vad = vad or VAD()
+        self.sample_rate = self.vad.sample_rate
+        self.frame_size = self.vad.frame_size
+        self.frame_duration = self.frame_size / self.sample_rate
+        self.framer = AudioFramer(self.frame_size)
+        self.clock = clock or AudioClock(self.sample_rate)
+        self._subscribers = []
+
+    def subscribe(self, callback):
+        """callback(features) runs synchronously for every frame, in push order."""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def push(self, pcm_chunk):
+        """Analyze every frame the chunk completes. Returns the FrameFeatures, oldest first."""
+        features = []
+        for frame in self.framer.push(pcm_chunk):
+            item = FrameFeatures(
+                pcm=frame,
+                is_speech=self.vad.is_speech(frame),
+                rms=self._rms(frame),
+                timestamp=self.clock.now(),
+                duration=self.frame_duration
+            )
+            self.clock.advance(self.frame_size)
+            for callback in self._subscribers:
+                try:
+                    callback(item)
+                except Exception as e:
+                    logger.error(f"Frame subscriber failed: {e}")
+            features.append(item)
+        return features
+
+    def reset(self):
+        """Drop any partial frame (the audio clock keeps running)."""
+        self.framer.clear()
+
+    @staticmethod
+    def _rms(frame):
+        samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+        return float(np.sqrt(np.mean(samples * samples))) / 32768.0
@@ -0,0 +1,148 @@
+import asyncio
+import collections
+import logging
+from datetime import datetime
+from .config import Config
+from .response_parser import ResponseStreamParser
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+RETRY_DELAY = 30.0 # seconds before retrying a failed render
+MAX_WAIT = 60.0 # seconds between staleness checks when nothing else wakes the refill loop
+
+def day_part(now):
+    """Time-of-day bucket the greeting prompt is sensitive to ("don't say morning in the evening")."""
+    if 5 <= now.hour < 12:
+        return "morning"
+    if 12 <= now.hour < 17:
+        return "afternoon"
+    if 17 <= now.hour < 21:
+        return "evening"
+    return "night"
+
+class Greeting:
+    """A ready-to-play greeting: cleaned text and its rendered PCM chunks."""
+    def __init__(self, text, audio, context, created_at):
+        self.text = text
+        self.audio = audio
+        self.context = context
+        self.created_at = created_at
+
+class GreetingCache:
+    def __init__(self, llm, tts, size=None, ttl=None, enabled=None, now=datetime.now, in_use=None):
+        """
+        Keeps `size` greetings (Gemini text + ElevenLabs audio) ready so a wake can start
+        playback at once instead of waiting for a greeting round trip and a fresh synthesis.
+        Each greeting is tied to its time-of-day context (date + day part) and goes stale after
+        `ttl` seconds or when the context changes. A background task renders replacements one
+        at a time; take() never waits for it and returns None on a miss (live generation).
+        in_use: callable, True while a client is connected. Only then is the pool kept topped
+        up; otherwise a take() (hit or stale miss) renders replacements once and the task sleeps,
+        so an unused server never calls Gemini or ElevenLabs.
+        """
+        self.llm = llm
+        self.tts = tts
+        self.size = Config.GREETING_CACHE_SIZE if size is None else size
+        self.ttl = Config.GREETING_CACHE_TTL if ttl is None else ttl
+        self.enabled = Config.GREETING_CACHE if enabled is None else enabled
+        self.now = now
+        self.in_use = in_use or (lambda: True)
+        self._demand = False # A take() asked for replacements
+        self._ready = collections.deque()
+        self._wake = asyncio.Event()
+        self._task = None
+
+        self.hits = 0
+        self.misses = 0
+        self.rendered = 0
+        self.expired = 0
+
+    def start(self):
+        """Start the background refill. Call from a coroutine on the serving loop."""
+        if self.enabled and self.size > 0 and self._task is None:
+            self._task = asyncio.create_task(self._refill())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self._ready.clear()
+
+    def take(self):
+        """Pops a fresh greeting for the current context, or None. Each greeting plays once."""
+        self._prune()
+        greeting = self._ready.popleft() if self._ready else None
+        if greeting:
+            self.hits += 1
+        else:
+            self.misses += 1
+        metrics.GREETING_CACHE.inc(result="hit" if greeting else "miss")
+        self._demand = True
+        self._wake.set() # Render a replacement
+        return greeting
+
+    def wake(self):
+        """A client connected: top the pool up before its wake word."""
+        self._wake.set()
+
+    def stats(self):
+        taken = self.hits + self.misses
+        return {
+            "ready": len(self._ready),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / taken, 3) if taken else None,
+            "rendered": self.rendered,
+            "expired": self.expired,
+        }
+
+    def _context(self):
+        now = self.now()
+        return (now.date().isoformat(), day_part(now))
+
+    def _is_fresh(self, greeting):
+        age = (self.now() - greeting.created_at).total_seconds()
+        return age < self.ttl and greeting.context == self._context()
+
+    def _prune(self):
+        fresh = [greeting for greeting in self._ready if self._is_fresh(greeting)]
+        self.expired += len(self._ready) - len(fresh)
+        self._ready = collections.deque(fresh)
+
+    async def _refill(self):
+        while True:
+            self._prune()
+            active = self.in_use() or self._demand
+            delay = None # Sleep until take() or wake()
+            if len(self._ready) >= self.size:
+                self._demand = False
+            if active and len(self._ready) < self.size:
+                try:
+                    greeting = await self._render()
+                    self._ready.append(greeting)
+                    self.rendered += 1
+                    continue # Top up the rest of the pool
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Greeting prefetch failed: {e}")
+                    self._demand = False # Without clients, don't keep retrying
+                    delay = RETRY_DELAY
+            elif active and self._ready:
+                # Wake up when the oldest greeting expires
+                age = (self.now() - self._ready[0].created_at).total_seconds()
+                delay = min(MAX_WAIT, max(0.0, self.ttl - age))
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _render(self):
+        context, created_at = self._context(), self.now()
+        text = ResponseStreamParser.clean(await self.llm.generate_greeting())
+        audio = [chunk async for chunk in self.tts.astream_audio(text)]
+        if not audio:
+            raise RuntimeError("TTS returned no audio")
+        return Greeting(text, audio, context, created_at)
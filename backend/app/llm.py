@@ -1,5 +1,7 @@
 from google import genai
 from collections import deque
+import contextlib
+import copy
 import logging
 import asyncio
 import json
@@ -8,12 +10,15 @@ import random
 from datetime import datetime
 import json
 from .config import Config
+from . import metrics
+from . import providers
 
 logger = logging.getLogger(__name__)
 
 class LLMService:
     def __init__(self):
-        self.client = genai.Client(api_key=Config.GEMINI_API_KEY)
+        # Gemini, or an offline stand-in per LLM_PROVIDER
+        self.client = providers.llm_client(lambda: genai.Client(api_key=Config.GEMINI_API_KEY))
         self.model_tiers = ["gemini-2.5-flash", "gemini-2.5-flash-lite"]
         self.current_model_tier = 0
         self.memory = deque(maxlen=8) # Stores last 8 messages
@@ -24,6 +29,19 @@ class LLMService:
         self.current_vibe = "curious and warm"
         self.internal_monologue = deque(maxlen=5) # Her private stream of consciousness
         self.energy_level = 0.8 # 0.0 to 1.0
+        self._shared = None # Set on per-session views, see for_session()
+
+    def for_session(self):
+        """
+        Per-conversation view: shares the Gemini client and loaded context,
+        but owns its short-term memory, mood and fallback tier.
+        """
+        session = copy.copy(self)
+        session.memory = deque(maxlen=self.memory.maxlen)
+        session.internal_monologue = deque(self.internal_monologue, maxlen=self.internal_monologue.maxlen)
+        session.current_model_tier = 0
+        session._shared = self
+        return session
 
     def add_to_memory(self, role, content):
         """Add a message to the short-term sharp memory."""
@@ -37,22 +55,23 @@ class LLMService:
     async def reload_context(self, db_store):
         """Fetch personality, core background, recent session gists, and last seen time."""
         logger.info("Reloading LLM context with Dynamic Identity...")
-        config = await db_store.get_agent_config()
+        # All layers load concurrently and are served from cache until the next session ends
+        context = await db_store.load_context()
         
         # Layer 3: Core Facts & Personality (Dynamic)
-        self.personality = config["personality"]
-        self.history = config["history"]
+        self.personality = context["personality"]
+        self.history = context["history"]
         
         # Layer 3.5: Evolved Learnings (Persistent Growth)
-        self.evolved_learnings = config.get("evolved_learnings", "") or ""
+        self.evolved_learnings = context.get("evolved_learnings", "") or ""
         
         # Layer 2: Recent Gist (Blurry)
-        self.recent_gists = await db_store.get_recent_sessions_gist(limit=3)
+        self.recent_gists = context["recent_gists"]
         
         # Phase 3 & 4: Social/Temporal Awareness
-        self.last_seen = await db_store.get_last_session_time()
-        self.session_count = await db_store.get_total_sessions_count()
-        self.last_interaction = await db_store.get_last_interaction_brief()
+        self.last_seen = context["last_seen"]
+        self.session_count = context["session_count"]
+        self.last_interaction = context["last_interaction"]
             
         logger.info("LLM Human Context reloaded (Fully Dynamic).")
 
@@ -77,7 +96,11 @@ class LLMService:
         if random.random() < 0.3:
             self.internal_monologue.append(random.choice(stray_thoughts))
 
-    async def generate_response_stream(self, user_text):
+    async def generate_response_stream(self, user_text, prior_messages=None):
+        """
+        Streams the reply to user_text. Sharp memory is taken from self.memory, which already
+        ends with user_text; speculative turns pass prior_messages instead (user_text not added yet).
+        """
         now = datetime.now()
         
         # Phase 4: Background Life Simulation
@@ -116,7 +139,6 @@ class LLMService:
         try:
             hist_data = json.loads(self.history)
             if "birthday" in hist_data:
-                from datetime import datetime
                 bday = datetime.strptime(hist_data["birthday"], "%Y-%m-%d")
                 age = now.year - bday.year - ((now.month, now.day) < (bday.month, bday.day))
                 dynamic_age = age
@@ -139,7 +161,9 @@ class LLMService:
         # Layer 1: Short-Term Memory (Sharp)
         # Filter out empty messages and only include recent context
         short_term_text = ""
-        for msg in list(self.memory)[:-1]: # Exclude the current user_text which is handled at the end
+        if prior_messages is None:
+            prior_messages = list(self.memory)[:-1] # Exclude the current user_text which is handled at the end
+        for msg in prior_messages:
             role = "User" if msg["role"] == "user" else "Assistant"
             short_term_text += f"{role}: {msg['content']}\n"
 
@@ -148,7 +172,8 @@ class LLMService:
         for gist in getattr(self, 'recent_gists', []):
             blurry_history += f"On {gist['date']}, you talked about: "
             for msg in gist['interaction']:
-                blurry_history += f"({msg['role']}: {msg['content'][:100]}...) "
+                # Content arrives pre-truncated by the store
+                blurry_history += f"({msg['role']}: {msg['content']}...) "
             blurry_history += "\n"
 
         # Advanced System Prompt for Human-like Presence
@@ -215,27 +240,75 @@ USER: {user_text}
 """
         for i in range(self.current_model_tier, len(self.model_tiers)):
             model = self.model_tiers[i]
+            yielded = False
             try:
                 # Enable Google Search Grounding for modern tiers
                 tools = [{"google_search": {}}] if "flash" in model or "pro" in model else []
                 
-                stream = self.client.models.generate_content_stream(
-                    model=model,
-                    contents=system_persona,
-                    config={"tools": tools}
-                )
-                for chunk in stream:
-                    if chunk.text:
-                        yield chunk.text
+                async with contextlib.aclosing(self._stream_model(model, system_persona, tools)) as stream:
+                    async for text in stream:
+                        yielded = True
+                        yield text
                 self.current_model_tier = i
                 return # Success
+            except asyncio.TimeoutError:
+                stage = "mid-stream" if yielded else "before the first token"
+                logger.error(f"LLM streaming timed out on {model} ({stage}).")
             except Exception as e:
                 logger.error(f"LLM streaming failed on {model}: {e}")
-                if i < len(self.model_tiers) - 1:
-                    logger.info(f"Retrying stream with fallback model: {self.model_tiers[i+1]}")
-                    continue
-                else:
-                    yield "I'm sorry, I'm having trouble thinking right now."
+
+            if yielded:
+                # Part of this answer is already being spoken; restarting would repeat it
+                return
+            if i < len(self.model_tiers) - 1:
+                logger.info(f"Retrying stream with fallback model: {self.model_tiers[i+1]}")
+                metrics.MODEL_FALLBACKS.inc(operation="response")
+                continue
+            else:
+                yield "I'm sorry, I'm having trouble thinking right now."
+
+    async def _stream_model(self, model, contents, tools):
+        """
+        Yields text chunks from one model tier over the async SDK surface.
+        Enforces the time-to-first-token, inter-chunk and total request deadlines
+        (asyncio.TimeoutError), and aborts the upstream request when closed early.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        request_deadline = started + Config.LLM_REQUEST_TIMEOUT
+        first_token_deadline = started + Config.LLM_FIRST_TOKEN_TIMEOUT
+
+        stream = await asyncio.wait_for(
+            self.client.aio.models.generate_content_stream(
+                model=model,
+                contents=contents,
+                config={"tools": tools}
+            ),
+            timeout=Config.LLM_FIRST_TOKEN_TIMEOUT
+        )
+        iterator = stream.__aiter__()
+        got_text = False
+        try:
+            while True:
+                now = loop.time()
+                next_deadline = now + Config.LLM_CHUNK_TIMEOUT if got_text else first_token_deadline
+                timeout = max(0.0, min(request_deadline, next_deadline) - now)
+                try:
+                    chunk = await asyncio.wait_for(iterator.__anext__(), timeout=timeout)
+                except StopAsyncIteration:
+                    return
+                if chunk.text:
+                    if not got_text:
+                        logger.debug(f"{model} first token after {(loop.time() - started) * 1000:.0f} ms")
+                    got_text = True
+                    yield chunk.text
+        finally:
+            aclose = getattr(iterator, "aclose", None)
+            if aclose:
+                try:
+                    await aclose() # Closes the HTTP response, aborting generation upstream
+                except Exception as e:
+                    logger.debug(f"Error closing {model} stream: {e}")
 
     async def reflect_on_session(self, db_store):
         """Analyze the current session and extract new growth/learnings."""
@@ -274,6 +347,9 @@ Format: Keep it informal but factual to your story. Just return the updated "GRO
                 new_growth = response.text.strip()
                 if new_growth:
                     self.evolved_learnings = new_growth
+                    if self._shared:
+                        # Let conversations that start later inherit the growth
+                        self._shared.evolved_learnings = new_growth
                     await db_store.update_evolved_learnings(new_growth)
                     logger.info(f"{Config.AI_NAME} has evolved her memory based on this session.")
                 self.current_model_tier = i
@@ -282,6 +358,7 @@ Format: Keep it informal but factual to your story. Just return the updated "GRO
                 logger.error(f"Failed to reflect on session with {model}: {e}")
                 if i < len(self.model_tiers) - 1:
                     logger.info(f"Retrying reflection with fallback model: {self.model_tiers[i+1]}")
+                    metrics.MODEL_FALLBACKS.inc(operation="reflection")
                     continue
         logger.error("All models failed for reflection. No new learnings saved.")
         return
@@ -324,6 +401,7 @@ Example: <emotion_thought>Excited to see my friend again!</emotion_thought>Hey t
             except Exception as e:
                 logger.error(f"LLM greeting failed on {model}: {e}")
                 if i < len(self.model_tiers) - 1:
+                    metrics.MODEL_FALLBACKS.inc(operation="greeting")
                     continue
                 else:
                     return "Hey! Good to see you."
@@ -355,6 +433,7 @@ Example: <emotion_thought>User is going to sleep, I should be sweet.</emotion_th
             except Exception as e:
                 logger.error(f"LLM farewell failed on {model}: {e}")
                 if i < len(self.model_tiers) - 1:
+                    metrics.MODEL_FALLBACKS.inc(operation="farewell")
                     continue
                 else:
                     return "Goodbye!"
@@ -0,0 +1,130 @@
+import asyncio
+import collections
+import logging
+import sys
+import threading
+import traceback
+from .config import Config
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+STACK_DEPTH = 12 # Innermost frames kept per captured stack
+
+class LoopBlockedError(AssertionError):
+    """Raised by check() in fail mode: a callback held the event loop longer than fail_after."""
+
+class LoopMonitor:
+    def __init__(self, interval=None, threshold=None, fail_after=None):
+        """
+        Event loop lag watchdog.
+        A heartbeat task sleeps `interval` seconds at a time; how late it wakes up is the loop lag
+        (observed on metrics.LOOP_LAG). A sampler thread watches the heartbeat, and once it is more
+        than `threshold` seconds overdue it grabs the loop thread's stack, i.e. the code that is
+        blocking right now. Each block is logged with that stack and counted on metrics.LOOP_BLOCKS.
+        fail_after: seconds; blocks longer than this are kept in `violations` and check() raises.
+        """
+        self.interval = Config.LOOP_MONITOR_INTERVAL if interval is None else interval
+        self.threshold = Config.LOOP_LAG_THRESHOLD if threshold is None else threshold
+        self.fail_after = fail_after if fail_after is not None else (Config.LOOP_LAG_FAIL or None)
+        self._task = None
+        self._thread = None
+        self._stopped = threading.Event()
+        self._loop_thread_id = None
+        self._beat = (0, 0.0) # (heartbeat number, metrics.clock() when it went to sleep)
+        self._captured = None # (heartbeat number, stack) grabbed by the sampler
+
+        self.max_lag = 0.0
+        self.blocks = collections.deque(maxlen=20) # Recent blocks: lag, where, stack
+        self.violations = []
+
+    def start(self):
+        """Start watching the running loop. Call from a coroutine on that loop."""
+        if self._task:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._sample, name="loop-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def check(self):
+        """Fail mode: raise LoopBlockedError if any callback blocked longer than fail_after."""
+        if not self.violations:
+            return
+        details = "\n".join(
+            f"- {block['lag_ms']} ms at {block['where']}\n" + "".join(block["stack"] or [])
+            for block in self.violations
+        )
+        raise LoopBlockedError(f"Event loop blocked longer than {self.fail_after * 1000:.0f} ms:\n{details}")
+
+    def stats(self):
+        last = self.blocks[-1] if self.blocks else None
+        return {
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "blocks": metrics.LOOP_BLOCKS.value(),
+            "last_block": {"lag_ms": last["lag_ms"], "where": last["where"]} if last else None,
+        }
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.stop()
+        if exc_info[0] is None:
+            self.check()
+
+    async def _heartbeat(self):
+        beat = 0
+        while True:
+            beat += 1
+            went_to_sleep = metrics.clock()
+            self._beat = (beat, went_to_sleep)
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, metrics.clock() - went_to_sleep - self.interval)
+            metrics.LOOP_LAG.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                captured = self._captured
+                stack = captured[1] if captured and captured[0] == beat else None
+                self._report(lag, stack)
+
+    def _sample(self):
+        # Runs on its own thread, so it still gets the GIL while a callback hogs the loop thread
+        period = max(0.005, self.threshold / 4)
+        while not self._stopped.wait(period):
+            beat, went_to_sleep = self._beat
+            overdue = metrics.clock() - went_to_sleep - self.interval
+            if overdue > self.threshold and (self._captured is None or self._captured[0] != beat):
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    self._captured = (beat, traceback.format_stack(frame)[-STACK_DEPTH:])
+
+    def _report(self, lag, stack):
+        where = self._where(stack)
+        block = {"lag_ms": round(lag * 1000), "where": where, "stack": stack}
+        self.blocks.append(block)
+        metrics.LOOP_BLOCKS.inc()
+        if self.fail_after is not None and lag > self.fail_after:
+            self.violations.append(block)
+        logger.warning(
+            f"Event loop blocked for {block['lag_ms']} ms at {where}" + ("\n" + "".join(stack) if stack else ""),
+            extra={"event": "loop_blocked", "lag_ms": block["lag_ms"], "where": where}
+        )
+
+    @staticmethod
+    def _where(stack):
+        if not stack:
+            return "unknown (blocked for less than a sampler period)"
+        # format_stack entries look like '  File "x.py", line 3, in f\n    code\n'
+        return stack[-1].strip().split("\n")[0]
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+INSERT_MESSAGE = """
+    INSERT INTO messages (id, session_id, role, content, timestamp)
+    VALUES ($1, $2, $3, $4, $5)
+"""
+
+class MessageJournal:
+    def __init__(self, pool, batch_size=50, flush_interval=0.5, max_pending=10000):
+        """
+        Write-behind buffer for chat messages.
+        append() only queues the row; a single background flusher writes batches with
+        executemany once batch_size rows are waiting or flush_interval seconds pass.
+        One queue + one writer keeps rows in append order, so per-session order holds.
+        """
+        self.pool = pool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._rows = []
+        self._last_timestamp = None
+        self._lock = asyncio.Lock() # One writer at a time preserves order
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._closing = False
+
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.flush_errors = 0
+
+    @property
+    def pending(self):
+        return len(self._rows)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def append(self, session_id, role, content):
+        """Queue a message. Never touches the database on the caller's path."""
+        # Stamp now (not at flush time) and keep stamps strictly increasing:
+        # the column has millisecond precision and history is ordered by it.
+        timestamp = datetime.now(timezone.utc).replace(tzinfo=None)
+        if self._last_timestamp and timestamp <= self._last_timestamp:
+            timestamp = self._last_timestamp + timedelta(milliseconds=1)
+        self._last_timestamp = timestamp
+
+        self._rows.append((uuid.uuid4(), session_id, role, content, timestamp))
+        self._shed_overflow()
+        if len(self._rows) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self):
+        """Write everything queued so far. Safe to call concurrently with the background flusher."""
+        async with self._lock:
+            while self._rows:
+                # Take the batch out of the queue: rows appended (or shed) during the write
+                # never shift what is deleted afterwards
+                batch = self._rows[:self.batch_size]
+                self._rows = self._rows[len(batch):]
+                try:
+                    async with self.pool.acquire() as conn:
+                        await conn.executemany(INSERT_MESSAGE, batch)
+                except asyncio.CancelledError:
+                    self._rows = batch + self._rows # Not known to be written: keep it for close()
+                    raise
+                except Exception as e:
+                    # Rows stay queued (in order) and are retried on the next flush
+                    self.flush_errors += 1
+                    metrics.DB_ERRORS.inc(operation="log_messages")
+                    logger.error(f"Failed to flush {len(batch)} messages: {e}")
+                    self._rows = batch + self._rows
+                    self._shed_overflow()
+                    return False
+                self.rows_written += len(batch)
+        return True
+
+    def _shed_overflow(self):
+        if len(self._rows) <= self.max_pending:
+            return
+        # Database has been unreachable for a long time; shed the oldest rows
+        dropped = len(self._rows) - self.max_pending
+        del self._rows[:dropped]
+        self.rows_dropped += dropped
+        logger.error(f"Message journal overflow. Dropped the {dropped} oldest unsaved message(s).")
+
+    async def close(self):
+        """Stop the background flusher (letting a write in flight finish) and write whatever is left."""
+        if self._task:
+            self._closing = True
+            self._wakeup.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._rows:
+                await self.flush()
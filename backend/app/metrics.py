@@ -0,0 +1,192 @@
+import bisect
+import threading
+import time
+from .config import Config
+
+# Latency marks use this (wall time), not the AudioClock: they measure how long the pipeline took
+clock = time.perf_counter
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+RATIO_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{str(value)}"' for key, value in labels)
+    return "{" + pairs + "}"
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        if not Config.METRICS:
+            return
+        key = tuple((name, labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple((name, labels.get(name, "")) for name in self.labelnames)
+        return self._values.get(key, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name}_total {self.documentation}", f"# TYPE {self.name}_total counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        if not values and not self.labelnames:
+            values = [((), 0)]
+        for key, value in values:
+            lines.append(f"{self.name}_total{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, documentation, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1) # Per bucket, not cumulative; last one is +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+        self.listeners = [] # callback(name, value) per observation, see Registry.listen()
+
+    def observe(self, value):
+        if not Config.METRICS:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+        for listener in self.listeners:
+            listener(self.name, value)
+
+    @property
+    def count(self):
+        return sum(self._counts)
+
+    def render(self):
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), counts):
+            cumulative += count
+            le = bound if bound == "+Inf" else _format_value(float(bound))
+            lines.append(f'{self.name}_bucket{{le="{le}"}} {cumulative}')
+        lines.append(f"{self.name}_sum {_format_value(total)}")
+        lines.append(f"{self.name}_count {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        """
+        Process-wide metrics in the Prometheus text format, without the prometheus_client dependency.
+        Recording is a bisect plus a locked increment (safe from the STT worker threads);
+        Config.METRICS=False turns every observe()/inc() into an early return.
+        """
+        self._metrics = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, documentation, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def listen(self, callback):
+        """Also hand every raw histogram observation to callback(name, value), e.g. for exact percentiles in benchmarks."""
+        for metric in self._metrics:
+            if isinstance(metric, Histogram):
+                metric.listeners.append(callback)
+
+    def unlisten(self, callback):
+        for metric in self._metrics:
+            if isinstance(metric, Histogram) and callback in metric.listeners:
+                metric.listeners.remove(callback)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+# Per-turn latency breakdown (seconds unless noted)
+ENDPOINT_DELAY = REGISTRY.histogram(
+    "ai_friend_endpoint_delay_seconds", "Trailing silence (audio time) waited before the turn was endpointed.")
+STT_DECODE = REGISTRY.histogram(
+    "ai_friend_stt_decode_seconds", "Whisper decode time of a final transcript.")
+STT_REAL_TIME_FACTOR = REGISTRY.histogram(
+    "ai_friend_stt_real_time_factor", "Whisper decode time divided by the utterance's audio duration.", RATIO_BUCKETS)
+LLM_FIRST_TOKEN = REGISTRY.histogram(
+    "ai_friend_llm_first_token_seconds", "Final transcript to first response token (speculation hits included).")
+LLM_TOTAL = REGISTRY.histogram(
+    "ai_friend_llm_total_seconds", "Final transcript to the last response token.")
+TTS_FIRST_BYTE = REGISTRY.histogram(
+    "ai_friend_tts_first_byte_seconds", "First sentence sent to TTS to its first audio chunk.")
+FIRST_AUDIO_SENT = REGISTRY.histogram(
+    "ai_friend_first_audio_sent_seconds", "Final transcript to the first reply audio chunk handed to the client.")
+SPEECH_TO_SPEECH = REGISTRY.histogram(
+    "ai_friend_speech_to_speech_seconds", "Last voiced frame of the user to the first reply audio chunk sent.")
+WAKE_TO_FIRST_AUDIO = REGISTRY.histogram(
+    "ai_friend_wake_to_first_audio_seconds", "Wake word (or /start-session) to the first greeting audio chunk sent.")
+
+# Event loop health (see LoopMonitor)
+LOOP_LAG = REGISTRY.histogram(
+    "ai_friend_event_loop_lag_seconds", "How late the loop ran a callback scheduled to run on time.", LAG_BUCKETS)
+LOOP_BLOCKS = REGISTRY.counter(
+    "ai_friend_event_loop_blocks", "Times the loop lag went over LOOP_LAG_THRESHOLD.")
+
+# Events
+MODEL_FALLBACKS = REGISTRY.counter(
+    "ai_friend_model_fallbacks", "LLM calls retried on the next model tier.", ("operation",))
+STT_DROPPED = REGISTRY.counter(
+    "ai_friend_stt_dropped_utterances", "Finished utterances dropped because every decode slot stayed busy for STT_MAX_HOLD.")
+BARGE_INS = REGISTRY.counter(
+    "ai_friend_barge_ins", "Replies cancelled because the user started a new turn.")
+DB_ERRORS = REGISTRY.counter(
+    "ai_friend_db_errors", "Failed database operations (logged and degraded).", ("operation",))
+TTS_CACHE = REGISTRY.counter(
+    "ai_friend_tts_cache", "TTS cache lookups by outcome: memory or disk hit, or miss (synthesized live).", ("result",))
+GREETING_CACHE = REGISTRY.counter(
+    "ai_friend_greeting_cache", "Wake greetings served from the prefetched pool (hit) or generated live (miss).", ("result",))
+
+class TurnTimer:
+    def __init__(self, speech_ended_at=None):
+        """
+        Marks for one reply, starting when its final transcript is ready.
+        speech_ended_at: clock() of the user's last voiced frame, for speech-to-speech latency.
+        Each mark is observed once; a turn cancelled by barge-in simply stops recording.
+        """
+        self.started = clock()
+        self.speech_ended_at = speech_ended_at
+        self.first_token_at = None
+        self.first_audio_at = None
+
+    def token(self):
+        if self.first_token_at is None:
+            self.first_token_at = clock()
+            LLM_FIRST_TOKEN.observe(self.first_token_at - self.started)
+
+    def llm_done(self):
+        LLM_TOTAL.observe(clock() - self.started)
+
+    def audio_sent(self):
+        if self.first_audio_at is None:
+            self.first_audio_at = clock()
+            FIRST_AUDIO_SENT.observe(self.first_audio_at - self.started)
+            if self.speech_ended_at is not None:
+                SPEECH_TO_SPEECH.observe(self.first_audio_at - self.speech_ended_at)
@@ -0,0 +1,306 @@
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import time
+from types import SimpleNamespace
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+# Backends behind LLMService.client and TTSService.client. The stand-ins mimic the slice of the
+# google-genai / ElevenLabs SDK surface those services call, so tiers, deadlines, the TTS bridge
+# and barge-in handling run unchanged on top of them:
+#   gemini / elevenlabs - the SDK client (default)
+#   record    - the SDK client, saving every stream to PROVIDER_CASSETTE_DIR
+#   cassette  - replays recorded streams offline with their recorded timing
+#   synthetic - generates deterministic replies/audio, no recordings needed
+
+class ProviderError(Exception):
+    """Injected failure (see Timing.error_rate); LLMService/TTSService treat it like an SDK error."""
+
+class Timing:
+    def __init__(self, first=None, interval=None, jitter=0.0, error_rate=0.0, midstream_error_rate=0.0, seed=None):
+        """
+        Latency and failure model of a stand-in backend.
+        first/interval: seconds to the first chunk and between chunks. None keeps a cassette's
+        recorded timing (synthetic backends fall back to their defaults).
+        jitter: each delay is scaled by a random factor in [1 - jitter, 1 + jitter].
+        error_rate / midstream_error_rate: chance per request of failing before the first chunk
+        or after a random number of chunks.
+        """
+        self.first = first
+        self.interval = interval
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.midstream_error_rate = midstream_error_rate
+        self._random = random.Random(seed)
+
+    @classmethod
+    def from_config(cls, prefix):
+        """Timing from the <prefix>_FAKE_* settings, e.g. prefix="LLM"."""
+        return cls(
+            first=getattr(Config, f"{prefix}_FAKE_FIRST"),
+            interval=getattr(Config, f"{prefix}_FAKE_INTERVAL"),
+            jitter=getattr(Config, f"{prefix}_FAKE_JITTER"),
+            error_rate=getattr(Config, f"{prefix}_FAKE_ERROR_RATE"),
+            midstream_error_rate=getattr(Config, f"{prefix}_FAKE_MIDSTREAM_ERROR_RATE"),
+            seed=Config.PROVIDER_SEED
+        )
+
+    def delay(self, value, recorded=None, default=0.0):
+        """Jittered delay: the configured value, else the recorded one, else the default."""
+        base = value if value is not None else (recorded if recorded is not None else default)
+        if self.jitter:
+            base *= 1 + self._random.uniform(-self.jitter, self.jitter)
+        return max(0.0, base)
+
+    def failure_point(self, chunks):
+        """Index of the chunk before which this request fails, or None."""
+        if self._random.random() < self.error_rate:
+            return 0
+        if chunks > 1 and self._random.random() < self.midstream_error_rate:
+            return self._random.randint(1, chunks - 1)
+        return None
+
+class _Cassette:
+    """Recorded streams on disk: one JSON file per request, named by a hash of its key."""
+    def __init__(self, directory, kind):
+        self.directory = os.path.join(directory, kind)
+        self._replay_order = None
+        self._next = 0
+
+    def path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] + ".json")
+
+    def save(self, key, chunks):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path(key), "w", encoding="utf-8") as f:
+            json.dump({"key": key[:200], "chunks": chunks}, f)
+
+    def load(self, key):
+        """The recording for key, else the next recording in name order (prompts carry the time of day)."""
+        path = self.path(key)
+        if not os.path.exists(path):
+            if self._replay_order is None:
+                names = sorted(os.listdir(self.directory)) if os.path.isdir(self.directory) else []
+                self._replay_order = [os.path.join(self.directory, name) for name in names if name.endswith(".json")]
+            if not self._replay_order:
+                raise ProviderError(f"No recordings in {self.directory}")
+            path = self._replay_order[self._next % len(self._replay_order)]
+            self._next += 1
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["chunks"]
+
+def _prompt_key(contents):
+    # The prompt embeds the clock and a random "current activity"; the user's line is the stable part
+    match = re.search(r"^USER: (.*)$", contents, re.MULTILINE)
+    return match.group(1) if match else contents
+
+class _FakeGemini:
+    """genai.Client surface: models.generate_content and aio.models.generate_content_stream."""
+    def __init__(self, timing, fail_models=None):
+        self.timing = timing
+        self.fail_models = fail_models # Inject errors only on these tiers (None: all)
+        self.models = SimpleNamespace(generate_content=self._generate)
+        self.aio = SimpleNamespace(models=SimpleNamespace(generate_content_stream=self._generate_stream))
+
+    def _chunks(self, contents, stream):
+        """[(seconds since the previous chunk, text), ...] for this request."""
+        raise NotImplementedError
+
+    def _failure_point(self, model, chunks):
+        if self.fail_models is not None and model not in self.fail_models:
+            return None
+        return self.timing.failure_point(chunks)
+
+    def _generate(self, model, contents, **kwargs):
+        # Blocking, like the SDK call LLMService runs through asyncio.to_thread
+        chunks = self._chunks(contents, stream=False)
+        fail_at = self._failure_point(model, len(chunks))
+        time.sleep(sum(delay for delay, _ in chunks[:None if fail_at is None else fail_at + 1]))
+        if fail_at is not None:
+            raise ProviderError(f"Injected failure on {model}")
+        return SimpleNamespace(text="".join(text for _, text in chunks))
+
+    async def _generate_stream(self, model, contents, config=None):
+        chunks = self._chunks(contents, stream=True)
+        return self._stream(chunks, self._failure_point(model, len(chunks)), model)
+
+    async def _stream(self, chunks, fail_at, model):
+        for i, (delay, text) in enumerate(chunks):
+            await asyncio.sleep(delay)
+            if i == fail_at:
+                raise ProviderError(f"Injected failure on {model} after {i} chunks")
+            yield SimpleNamespace(text=text)
+
+class SyntheticGemini(_FakeGemini):
+    REPLY = [
+        "Oh, that sounds lovely!",
+        "[laughs] I was hoping you'd tell me about it.",
+        "So what happened after that?",
+        "Did you actually finish it, or is it one of those projects?",
+    ]
+
+    def __init__(self, timing=None, sentences=3, chars_per_chunk=4, fail_models=None):
+        """Deterministic replies: a hidden thought plus `sentences` spoken sentences, streamed a few characters at a time."""
+        super().__init__(timing or Timing(), fail_models)
+        self.sentences = sentences
+        self.chars_per_chunk = chars_per_chunk
+
+    def _chunks(self, contents, stream):
+        spoken = self.REPLY[:self.sentences] if stream else self.REPLY[:1]
+        text = "<emotion_thought>They sound happy.</emotion_thought>" + " ".join(spoken)
+        pieces = [text[i:i + self.chars_per_chunk] for i in range(0, len(text), self.chars_per_chunk)]
+        return [
+            (self.timing.delay(self.timing.first if i == 0 else self.timing.interval, default=0.35 if i == 0 else 0.015), piece)
+            for i, piece in enumerate(pieces)
+        ]
+
+class CassetteGemini(_FakeGemini):
+    def __init__(self, directory, timing=None, fail_models=None):
+        """Replays streams saved by RecordingGemini, keyed by the user's line of the prompt."""
+        super().__init__(timing or Timing(), fail_models)
+        self.cassette = _Cassette(directory, "llm")
+
+    def _chunks(self, contents, stream):
+        recorded = self.cassette.load(_prompt_key(contents))
+        return [
+            (self.timing.delay(self.timing.first if i == 0 else self.timing.interval, recorded=delay), text)
+            for i, (delay, text) in enumerate(recorded)
+        ]
+
+class RecordingGemini:
+    """Passes calls through to the real client and saves each response as a cassette."""
+    def __init__(self, client, directory):
+        self.client = client
+        self.cassette = _Cassette(directory, "llm")
+        self.models = SimpleNamespace(generate_content=self._generate)
+        self.aio = SimpleNamespace(models=SimpleNamespace(generate_content_stream=self._generate_stream))
+
+    def _generate(self, model, contents, **kwargs):
+        started = time.perf_counter()
+        response = self.client.models.generate_content(model=model, contents=contents, **kwargs)
+        self.cassette.save(_prompt_key(contents), [[time.perf_counter() - started, response.text]])
+        return response
+
+    async def _generate_stream(self, model, contents, config=None):
+        started = time.perf_counter()
+        stream = await self.client.aio.models.generate_content_stream(model=model, contents=contents, config=config)
+        return self._record(stream, _prompt_key(contents), started)
+
+    async def _record(self, stream, key, started):
+        chunks = []
+        last = started
+        async for chunk in stream:
+            now = time.perf_counter()
+            if chunk.text:
+                chunks.append([now - last, chunk.text])
+                last = now
+            yield chunk
+        self.cassette.save(key, chunks) # Only complete responses; an aborted one would replay truncated
+
+class _FakeElevenLabs:
+    """ElevenLabs client surface: text_to_speech.convert(...) -> blocking iterator of audio bytes."""
+    def __init__(self, timing):
+        self.timing = timing
+        self.text_to_speech = SimpleNamespace(convert=self._convert)
+
+    def _chunks(self, text):
+        raise NotImplementedError
+
+    def _convert(self, text, voice_id=None, model_id=None, output_format=None, **kwargs):
+        chunks = self._chunks(text)
+        return self._stream(chunks, self.timing.failure_point(len(chunks)))
+
+    @staticmethod
+    def _stream(chunks, fail_at):
+        # Iterated on the TTS bridge's worker thread, like the SDK's HTTP stream
+        for i, (delay, audio) in enumerate(chunks):
+            time.sleep(delay)
+            if i == fail_at:
+                raise ProviderError(f"Injected TTS failure after {i} chunks")
+            yield audio
+
+class SyntheticElevenLabs(_FakeElevenLabs):
+    def __init__(self, timing=None, chunk_seconds=0.1, words_per_second=2.5, speed=4.0):
+        """
+        Silent 24 kHz 16-bit PCM as long as the text would take to say.
+        speed: synthesis runs this much faster than real time (sets the default chunk interval).
+        """
+        super().__init__(timing or Timing())
+        self.chunk_bytes = int(24000 * chunk_seconds) * 2
+        self.chunk_seconds = chunk_seconds
+        self.words_per_second = words_per_second
+        self.speed = speed
+
+    def _chunks(self, text):
+        count = max(1, round(len(text.split()) / self.words_per_second / self.chunk_seconds))
+        chunk = bytes(self.chunk_bytes)
+        return [
+            (self.timing.delay(self.timing.first if i == 0 else self.timing.interval,
+                               default=0.25 if i == 0 else self.chunk_seconds / self.speed), chunk)
+            for i in range(count)
+        ]
+
+class CassetteElevenLabs(_FakeElevenLabs):
+    def __init__(self, directory, timing=None):
+        """Replays audio saved by RecordingElevenLabs, keyed by the text."""
+        super().__init__(timing or Timing())
+        self.cassette = _Cassette(directory, "tts")
+
+    def _chunks(self, text):
+        return [
+            (self.timing.delay(self.timing.first if i == 0 else self.timing.interval, recorded=delay), base64.b64decode(audio))
+            for i, (delay, audio) in enumerate(self.cassette.load(text))
+        ]
+
+class RecordingElevenLabs:
+    """Passes calls through to the real client and saves each audio stream as a cassette."""
+    def __init__(self, client, directory):
+        self.client = client
+        self.cassette = _Cassette(directory, "tts")
+        self.text_to_speech = SimpleNamespace(convert=self._convert)
+
+    def _convert(self, text, **kwargs):
+        return self._record(self.client.text_to_speech.convert(text=text, **kwargs), text)
+
+    def _record(self, stream, text):
+        chunks = []
+        last = time.perf_counter()
+        for audio in stream:
+            now = time.perf_counter()
+            chunks.append([now - last, base64.b64encode(audio).decode("ascii")])
+            last = now
+            yield audio
+        self.cassette.save(text, chunks)
+
+def llm_client(real):
+    """Client for LLMService per Config.LLM_PROVIDER. real: builds the SDK client (only called if needed)."""
+    provider = Config.LLM_PROVIDER
+    if provider == "synthetic":
+        return SyntheticGemini(Timing.from_config("LLM"), fail_models=Config.LLM_FAKE_FAIL_MODELS)
+    if provider == "cassette":
+        return CassetteGemini(Config.PROVIDER_CASSETTE_DIR, Timing.from_config("LLM"), fail_models=Config.LLM_FAKE_FAIL_MODELS)
+    if provider == "record":
+        return RecordingGemini(real(), Config.PROVIDER_CASSETTE_DIR)
+    if provider != "gemini":
+        logger.warning(f"Unknown LLM_PROVIDER '{provider}'. Using Gemini.")
+    return real()
+
+def tts_client(real):
+    """Client for TTSService per Config.TTS_PROVIDER. real: builds the SDK client (only called if needed)."""
+    provider = Config.TTS_PROVIDER
+    if provider == "synthetic":
+        return SyntheticElevenLabs(Timing.from_config("TTS"))
+    if provider == "cassette":
+        return CassetteElevenLabs(Config.PROVIDER_CASSETTE_DIR, Timing.from_config("TTS"))
+    if provider == "record":
+        return RecordingElevenLabs(real(), Config.PROVIDER_CASSETTE_DIR)
+    if provider != "elevenlabs":
+        logger.warning(f"Unknown TTS_PROVIDER '{provider}'. Using ElevenLabs.")
+    return real()
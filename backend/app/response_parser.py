@@ -0,0 +1,138 @@
+import re
+from typing import List, NamedTuple
+
+REASONING_OPEN = "<emotion_thought>"
+REASONING_CLOSE = "</emotion_thought>"
+
+# Sentence end: punctuation (plus closing quotes/brackets) followed by whitespace, or a newline.
+# Requiring the trailing whitespace keeps "3.5" or "..." from being cut mid-stream.
+SENTENCE_BOUNDARY = re.compile(r"[.?!]+[\"')\]]*(?=\s)|\n")
+# Longest run a boundary match can need before the whitespace arrives
+_BOUNDARY_LOOKBACK = 8
+
+class SpeechSegment(NamedTuple):
+    """A speakable chunk and its [start, end) offsets in the spoken (reasoning-free) text."""
+    text: str
+    start: int
+    end: int
+
+class ResponseStreamParser:
+    def __init__(self, min_chars=30):
+        """
+        Incremental parser for streamed LLM output.
+        Strips <emotion_thought> reasoning blocks and cuts the rest into speakable
+        segments of at least min_chars. Every chunk is scanned once, so cost stays
+        linear in response length, and tags split across chunks never leak.
+        """
+        self.min_chars = min_chars
+        self.in_reasoning = False
+        self._carry = "" # Possible partial tag at the end of the last chunk
+        self._buffer = "" # Speakable text not yet emitted as a segment
+        self._scan_pos = 0 # Where the next boundary search in _buffer starts
+        self._emitted = 0 # Offset of _buffer[0] in the spoken text
+        self._spoken = [] # All speakable text, for memory/DB logging
+
+    @property
+    def text(self):
+        """The full speakable response seen so far (reasoning removed)."""
+        return "".join(self._spoken).strip()
+
+    @classmethod
+    def clean(cls, raw_text):
+        """Strip reasoning from a complete (non-streamed) response, e.g. greetings."""
+        parser = cls()
+        parser.feed(raw_text)
+        parser.flush()
+        return parser.text
+
+    def feed(self, chunk) -> List[SpeechSegment]:
+        """Consume one streamed chunk. Returns the segments it completed."""
+        data = self._carry + chunk
+        self._carry = ""
+        segments = []
+        i = 0
+
+        while i < len(data):
+            if self.in_reasoning:
+                j = data.find(REASONING_CLOSE, i)
+                if j < 0:
+                    self._carry = data[self._partial_tag_start(data, i):]
+                    break
+                self.in_reasoning = False
+                i = j + len(REASONING_CLOSE)
+                continue
+
+            j = data.find("<", i)
+            while j >= 0 and not data.startswith((REASONING_OPEN, REASONING_CLOSE), j):
+                if self._could_be_tag(data[j:]):
+                    break # Partial tag at the end of this chunk
+                j = data.find("<", j + 1)
+
+            if j < 0:
+                self._append_speech(data[i:], segments)
+                break
+            if not data.startswith((REASONING_OPEN, REASONING_CLOSE), j):
+                # Hold the partial tag back until the next chunk decides it
+                self._append_speech(data[i:j], segments)
+                self._carry = data[j:]
+                break
+
+            self._append_speech(data[i:j], segments)
+            if data.startswith(REASONING_OPEN, j):
+                self.in_reasoning = True
+                i = j + len(REASONING_OPEN)
+            else:
+                # Stray closing tag: drop the tag itself
+                i = j + len(REASONING_CLOSE)
+
+        return segments
+
+    def flush(self) -> List[SpeechSegment]:
+        """End of stream: emit whatever speakable text is left."""
+        segments = []
+        if self._carry and not self.in_reasoning:
+            # It never became a tag, so it was ordinary text
+            self._append_speech(self._carry, segments)
+        self._carry = ""
+        if self._buffer.strip():
+            segments.append(self._cut(len(self._buffer)))
+        self._buffer = ""
+        self._scan_pos = 0
+        return segments
+
+    def _append_speech(self, text, segments):
+        if not text:
+            return
+        self._spoken.append(text)
+        self._buffer += text
+
+        while True:
+            match = SENTENCE_BOUNDARY.search(self._buffer, self._scan_pos)
+            if not match:
+                self._scan_pos = max(0, len(self._buffer) - _BOUNDARY_LOOKBACK)
+                return
+            end = match.end()
+            if len(self._buffer[:end].strip()) > self.min_chars:
+                segments.append(self._cut(end))
+                self._scan_pos = 0
+            else:
+                self._scan_pos = end
+
+    def _cut(self, end):
+        raw = self._buffer[:end]
+        start = self._emitted + (len(raw) - len(raw.lstrip()))
+        segment = SpeechSegment(raw.strip(), start, start + len(raw.strip()))
+        self._buffer = self._buffer[end:]
+        self._emitted += end
+        return segment
+
+    @staticmethod
+    def _could_be_tag(tail):
+        return REASONING_OPEN.startswith(tail) or REASONING_CLOSE.startswith(tail)
+
+    def _partial_tag_start(self, data, i):
+        """Index where a possible partial closing tag starts (len(data) if none)."""
+        j = data.rfind("<", max(i, len(data) - len(REASONING_CLOSE) + 1))
+        if j >= 0 and REASONING_CLOSE.startswith(data[j:]):
+            return j
+        return len(data)
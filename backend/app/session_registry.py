@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+class SessionRegistry:
+    def __init__(self, factory, max_sessions=32, close_timeout=10.0):
+        """
+        Tracks one isolated conversation pipeline per client.
+        factory(**kwargs) must return an object with an async run() loop
+        and a stop() method that makes run() return after cleaning up.
+        max_sessions caps client sessions; pinned ones (the server's own microphone) don't count.
+        """
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.close_timeout = close_timeout
+        self._sessions = {} # session_id -> pipeline (insertion ordered)
+        self._tasks = {} # session_id -> run() task
+        self._pinned = set() # session_ids exempt from max_sessions
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
+
+    def __iter__(self):
+        """Open pipelines (a snapshot, safe to iterate while sessions come and go)."""
+        return iter(list(self._sessions.values()))
+
+    def open(self, session_id=None, pinned=False, **kwargs):
+        """
+        Create a pipeline and start its run loop.
+        Returns: (session_id, pipeline), or (None, None) when the process is at capacity.
+        """
+        if session_id in self._sessions:
+            return session_id, self._sessions[session_id]
+        if not pinned and len(self._sessions) - len(self._pinned) >= self.max_sessions:
+            logger.warning(f"Session limit reached ({self.max_sessions}). Rejecting new client.")
+            return None, None
+
+        session_id = session_id or uuid.uuid4().hex
+        pipeline = self.factory(**kwargs)
+        self._sessions[session_id] = pipeline
+        if pinned:
+            self._pinned.add(session_id)
+        self._tasks[session_id] = asyncio.create_task(pipeline.run())
+        logger.info(f"Opened session {session_id} ({len(self._sessions)} active).")
+        return session_id, pipeline
+
+    def get(self, session_id):
+        """Look up a session by id, or None. Never falls back to another client's session."""
+        return self._sessions.get(session_id)
+
+    async def close(self, session_id):
+        """Stop a session's run loop and wait for its cleanup to finish."""
+        pipeline = self._sessions.pop(session_id, None)
+        task = self._tasks.pop(session_id, None)
+        self._pinned.discard(session_id)
+        if pipeline is None:
+            return
+
+        pipeline.stop()
+        if task:
+            try:
+                # Let run() finish its own cleanup; cancel it if it hangs
+                await asyncio.wait_for(task, timeout=self.close_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Session {session_id} did not stop in time. Cancelled.")
+            except Exception as e:
+                logger.error(f"Session {session_id} exited with error: {e}")
+        logger.info(f"Closed session {session_id} ({len(self._sessions)} active).")
+
+    async def close_all(self):
+        for session_id in list(self._sessions):
+            await self.close(session_id)
@@ -0,0 +1,206 @@
+import asyncio
+import collections
+import contextlib
+import difflib
+import logging
+import re
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+CUE_TAG = re.compile(r"\[[^\]]*\]") # Sonic cues like [Normal Volume], see WhisperSTTService.sonic_cues
+
+def normalize(text):
+    """Words only: no sonic cues, case or punctuation."""
+    return [w.strip(".,?!\"'").lower() for w in CUE_TAG.sub("", text or "").split() if w.strip(".,?!\"'")]
+
+def similarity(a, b):
+    return difflib.SequenceMatcher(None, normalize(a), normalize(b)).ratio()
+
+class _Prefetch:
+    """One speculative generation running in the background, buffering its tokens."""
+    def __init__(self, text, started_at):
+        self.text = text
+        self.started_at = started_at
+        self.tokens = []
+        self.first_token_at = None
+        self.saved = 0.0 # Head start credited on a hit
+        self.error = None # Set when the generation raised
+        self.done = False
+        self.updated = asyncio.Event()
+        self.task = None
+
+class Speculator:
+    def __init__(self, llm, stable_window=None, min_similarity=None, enabled=None):
+        """
+        Starts the LLM on a partial transcript once it has stayed the same for stable_window
+        seconds, while the endpointer is still waiting out the user's trailing silence.
+        Like endpointing, the window is measured on the audio clock: observe_partial() gets the
+        audio time of the partial's frames and advance() the stream's current audio time.
+        Partials should carry the sonic cues the final would get (see WhisperSTTService.live_cues),
+        since the persona answers them too. claim(final_text) hands the buffered + remaining tokens
+        to the real turn when the final transcript matches (difflib ratio >= min_similarity on the
+        words, and the same cues); otherwise the prefetch is cancelled. A prefetch that failed
+        counts as a miss and the turn is generated live.
+        saved_ms is how much sooner the first token was ready than a live call started at the
+        final transcript, taking the prefetch's own first-token latency as the live one.
+        """
+        self.llm = llm
+        self.stable_window = Config.SPECULATION_STABLE_WINDOW if stable_window is None else stable_window
+        self.min_similarity = Config.SPECULATION_MIN_SIMILARITY if min_similarity is None else min_similarity
+        self.enabled = Config.SPECULATION if enabled is None else enabled
+        self._prefetch = None
+        self._candidate = None
+        self._candidate_at = None # Audio time the candidate's words were first heard
+
+        self.turns = 0
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.outcomes = collections.deque(maxlen=50) # Per-turn hit/miss record
+
+    def observe_partial(self, text, at):
+        """
+        Feed every partial transcript heard while the user is talking, with the audio time of
+        the frames it was decoded from. Restarts the stability window when the words change.
+        """
+        if not self.enabled or not normalize(text):
+            return
+        if self._candidate is not None and normalize(text) == normalize(self._candidate):
+            self._candidate = text # Still stable; keep the latest cues
+            return
+        self._candidate = text
+        self._candidate_at = at
+        if self._prefetch and similarity(self._prefetch.text, text) < self.min_similarity:
+            # The user kept talking past what we guessed
+            self._cancel_prefetch()
+
+    def advance(self, now):
+        """Audio time moved on (every inbound chunk): start the LLM once the candidate has held."""
+        if self._candidate is None or self._prefetch is not None:
+            return
+        if now - self._candidate_at >= self.stable_window:
+            self._start(self._candidate)
+
+    def claim(self, final_text):
+        """
+        Called with the final transcript at the start of a turn.
+        Returns an async iterator of response tokens on a hit, else None (caller generates live).
+        """
+        self.turns += 1
+        prefetch = self._prefetch
+        self._reset_candidate()
+        self._prefetch = None
+        if prefetch is None:
+            self.outcomes.append({"outcome": "none"})
+            return None
+
+        if prefetch.error is not None:
+            self.misses += 1
+            self.outcomes.append({"outcome": "failed"})
+            logger.info(f"Speculation failed ({prefetch.error}); generating live.")
+            return None
+
+        score = similarity(prefetch.text, final_text)
+        same_cues = CUE_TAG.findall(prefetch.text) == CUE_TAG.findall(final_text)
+        if score < self.min_similarity or not same_cues:
+            # A reply to the wrong volume/pace is a wrong reply, however close the words are
+            self.misses += 1
+            prefetch.task.cancel()
+            self.outcomes.append({"outcome": "miss", "similarity": round(score, 3), "same_cues": same_cues})
+            logger.info(f"Speculation miss ({score:.2f}): guessed '{prefetch.text}', heard '{final_text}'")
+            return None
+
+        # A live call would have started now. Its first token can't come sooner than the
+        # prefetch's did relative to its own start, so the head start is at most that latency.
+        saved = asyncio.get_running_loop().time() - prefetch.started_at
+        if prefetch.first_token_at is not None:
+            saved = min(saved, prefetch.first_token_at - prefetch.started_at)
+        self.hits += 1
+        self.saved_seconds += saved
+        prefetch.saved = saved
+        outcome = {"outcome": "hit", "similarity": round(score, 3), "saved_ms": round(saved * 1000)}
+        self.outcomes.append(outcome)
+        logger.info(f"Speculation hit ({score:.2f}): first token ready {saved * 1000:.0f} ms early.")
+        return self._replay(prefetch, final_text, outcome)
+
+    def cancel(self):
+        """Drop any pending or running speculation (barge-in, stop command, session end)."""
+        self._reset_candidate()
+        self._cancel_prefetch()
+
+    def stats(self):
+        speculated = self.hits + self.misses
+        return {
+            "turns": self.turns,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / speculated, 3) if speculated else None,
+            "saved_ms_total": round(self.saved_seconds * 1000),
+            "saved_ms_avg": round(self.saved_seconds * 1000 / self.hits) if self.hits else None,
+        }
+
+    def _start(self, text):
+        logger.debug(f"Speculating on stable partial: {text}")
+        prefetch = _Prefetch(text, asyncio.get_running_loop().time())
+        # The user's words aren't in memory yet, so the whole memory is prior context
+        prefetch.task = asyncio.create_task(self._generate(prefetch, list(self.llm.memory)))
+        self._prefetch = prefetch
+
+    async def _generate(self, prefetch, prior_messages):
+        try:
+            async with contextlib.aclosing(self.llm.generate_response_stream(prefetch.text, prior_messages=prior_messages)) as tokens:
+                async for token in tokens:
+                    if prefetch.first_token_at is None:
+                        prefetch.first_token_at = asyncio.get_running_loop().time()
+                    prefetch.tokens.append(token)
+                    prefetch.updated.set()
+        except Exception as e:
+            # Kept for claim()/_replay(), which fall back to a live generation
+            prefetch.error = e
+            logger.warning(f"Speculative generation failed: {e}")
+        finally:
+            prefetch.done = True
+            prefetch.updated.set()
+
+    async def _replay(self, prefetch, final_text, outcome):
+        """
+        Buffered tokens first, then the rest as the background generation produces them.
+        If the generation fails before any token, the turn is generated live after all.
+        """
+        sent = 0
+        try:
+            while True:
+                while sent < len(prefetch.tokens):
+                    yield prefetch.tokens[sent]
+                    sent += 1
+                if prefetch.done:
+                    break
+                prefetch.updated.clear()
+                await prefetch.updated.wait()
+            if prefetch.error is None:
+                return
+            if sent:
+                raise prefetch.error # Part of the reply is out; fail the turn like a live stream would
+            # Nothing replayed: not a hit after all
+            self.hits -= 1
+            self.misses += 1
+            self.saved_seconds -= prefetch.saved
+            outcome.pop("saved_ms")
+            outcome.update(outcome="failed")
+            logger.info(f"Speculation failed ({prefetch.error}); generating live.")
+            async with contextlib.aclosing(self.llm.generate_response_stream(final_text)) as tokens:
+                async for token in tokens:
+                    yield token
+        finally:
+            if not prefetch.task.done():
+                prefetch.task.cancel() # Barge-in while replaying
+
+    def _reset_candidate(self):
+        self._candidate = None
+        self._candidate_at = None
+
+    def _cancel_prefetch(self):
+        if self._prefetch:
+            self._prefetch.task.cancel()
+            self._prefetch = None
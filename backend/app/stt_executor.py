@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+SESSIONS_PER_WORKER = 8 # Default worker count: one per this many MAX_SESSIONS, up to the CPU count
+
+class STTExecutor:
+    def __init__(self, max_workers=None, max_pending=None):
+        """
+        Runs blocking Whisper decodes on dedicated worker threads, shared by every session.
+        max_pending bounds the finals queued or running so a slow CPU can't queue up minutes
+        of audio; past it submit() returns None and the caller keeps the audio.
+        Background jobs (partials) are only started on an idle worker and don't count against
+        max_pending. A decode can't be interrupted, though: a final that arrives while a partial
+        holds the last idle worker waits for that one partial to finish.
+        Both default to STT_WORKERS / STT_MAX_PENDING, or scale with MAX_SESSIONS when unset.
+        """
+        sessions = max(1, Config.MAX_SESSIONS)
+        self.max_workers = max_workers or Config.STT_WORKERS or min(os.cpu_count() or 1, -(-sessions // SESSIONS_PER_WORKER))
+        self.max_pending = max_pending or Config.STT_MAX_PENDING or sessions
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="whisper-stt")
+        self._lock = threading.Lock()
+        self.pending = 0 # Jobs queued or running
+        self.finals_pending = 0
+
+        # Stall metrics: how long the event loop would have been frozen
+        # if these decodes had run inline like they used to.
+        self.jobs_completed = 0
+        self.jobs_rejected = 0
+        self.offloaded_seconds = 0.0
+        self.last_job_seconds = 0.0
+        self.max_job_seconds = 0.0
+
+    @property
+    def busy(self):
+        """Every worker has a job: a background job would have to queue."""
+        return self.pending >= self.max_workers
+
+    @property
+    def full(self):
+        """No room for another final."""
+        return self.finals_pending >= self.max_pending
+
+    def submit(self, fn, *args, background=False):
+        """
+        Schedule fn(*args) on an STT worker.
+        Returns: an awaitable future with fn's result, or None if there is no room for it.
+        """
+        if background:
+            if self.busy:
+                return None # Every worker is busy; don't queue a partial ahead of later finals
+        elif self.full:
+            self.jobs_rejected += 1
+            return None
+
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        if not background:
+            self.finals_pending += 1
+        future = loop.run_in_executor(self._pool, self._timed_call, fn, args)
+        future.add_done_callback(lambda _future: self._on_done(background))
+        return future
+
+    def _timed_call(self, fn, args):
+        # Runs on the worker thread
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.jobs_completed += 1
+                self.offloaded_seconds += elapsed
+                self.last_job_seconds = elapsed
+                self.max_job_seconds = max(self.max_job_seconds, elapsed)
+            logger.debug(f"Whisper decode took {elapsed * 1000:.0f} ms off the event loop.")
+
+    def _on_done(self, background):
+        self.pending -= 1
+        if not background:
+            self.finals_pending -= 1
+
+    def stats(self):
+        """Snapshot of executor counters (safe to call from the event loop)."""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "pending": self.pending,
+                "max_pending": self.max_pending,
+                "jobs_completed": self.jobs_completed,
+                "jobs_rejected": self.jobs_rejected,
+                "offloaded_seconds": round(self.offloaded_seconds, 3),
+                "last_job_seconds": round(self.last_job_seconds, 3),
+                "max_job_seconds": round(self.max_job_seconds, 3),
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -1,14 +1,32 @@
 from elevenlabs import stream
 from elevenlabs.client import ElevenLabs
+import asyncio
+import concurrent.futures
 import logging
+import threading
 from .config import Config
+from . import providers
+from .tts_cache import TTSCache
 
 logger = logging.getLogger(__name__)
 
+_END = object() # Marks the end of a bridged stream
+_FAILED = object() # Marks a bridged stream that broke off (not cached)
+
 class TTSService:
     def __init__(self):
-        self.client = ElevenLabs(api_key=Config.ELEVENLABS_API_KEY)
+        # ElevenLabs, or an offline stand-in per TTS_PROVIDER
+        self.client = providers.tts_client(lambda: ElevenLabs(api_key=Config.ELEVENLABS_API_KEY))
         self.voice_id = Config.ELEVENLABS_VOICE_ID
+        self.model_id = "eleven_v3"
+        self.output_format = "pcm_24000"
+        # Short, repeated utterances (fallback lines, cues) are replayed instead of re-synthesized
+        self.cache = TTSCache()
+        self.buffer_chunks = Config.TTS_BUFFER_CHUNKS
+        self.first_chunk_timeout = Config.TTS_FIRST_CHUNK_TIMEOUT
+        self.chunk_timeout = Config.TTS_CHUNK_TIMEOUT
+        # Each active utterance holds one reader thread while its HTTP stream is open
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=Config.TTS_MAX_STREAMS, thread_name_prefix="tts-stream")
 
     def stream_audio(self, text):
         """
@@ -19,10 +37,116 @@ class TTSService:
             audio_stream = self.client.text_to_speech.convert(
                 text=text,
                 voice_id=self.voice_id,
-                model_id="eleven_v3",
-                output_format="pcm_24000",
+                model_id=self.model_id,
+                output_format=self.output_format,
             )
             return audio_stream
         except Exception as e:
             logger.error(f"TTS error: {e}")
             return None
+
+    async def astream_audio(self, text):
+        """
+        Async iterator of audio chunks for the given text that never blocks the event loop.
+        A worker thread reads the blocking SDK stream into a bounded buffer. Stopping
+        iteration early (barge-in/cancel) or a timeout closes the upstream HTTP stream.
+        Cacheable text is served from self.cache when possible; complete live streams are stored.
+        """
+        key = None
+        if self.cache.cacheable(text):
+            key = self.cache.key(text, self.voice_id, self.model_id, self.output_format)
+            cached = await self.cache.get(key)
+            if cached is not None:
+                for chunk in cached:
+                    yield chunk
+                return
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.buffer_chunks)
+        stop = threading.Event()
+        loop.run_in_executor(self._pool, self._pump, text, loop, queue, stop)
+        received = [] if key else None
+
+        try:
+            timeout = self.first_chunk_timeout
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    logger.error(f"TTS stream stalled for {timeout}s. Giving up on: {text}")
+                    return
+                if chunk is _END or chunk is _FAILED:
+                    if chunk is _END and received:
+                        # Disk writes happen on a worker thread
+                        loop.run_in_executor(None, self.cache.put, key, received)
+                    return
+                if received is not None:
+                    received.append(chunk)
+                yield chunk
+                timeout = self.chunk_timeout
+        finally:
+            # Tell the reader to stop; it closes the upstream stream on its way out
+            stop.set()
+
+    def _pump(self, text, loop, queue, stop):
+        """Worker thread: copy SDK chunks into the asyncio queue until done or told to stop."""
+        audio_stream = None
+        failed = False
+        try:
+            if stop.is_set():
+                return # Abandoned while queued for a thread: don't open a (billed) request
+            audio_stream = self.stream_audio(text)
+            if audio_stream is None or stop.is_set():
+                return
+            for chunk in audio_stream:
+                if stop.is_set():
+                    break
+                if chunk and not self._put(chunk, loop, queue, stop):
+                    break
+        except Exception as e:
+            failed = True
+            logger.error(f"TTS stream error: {e}")
+        finally:
+            close = getattr(audio_stream, "close", None)
+            if close:
+                # Closing the SDK generator exits its `with` block and releases the HTTP connection
+                close()
+            if not stop.is_set():
+                self._put(_FAILED if failed else _END, loop, queue, stop)
+
+    @staticmethod
+    def _put(item, loop, queue, stop):
+        """Blocking put from the worker thread. Applies backpressure; gives up once stop is set."""
+        try:
+            future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        except RuntimeError:
+            return False # Loop is gone
+        while True:
+            try:
+                future.result(timeout=0.1)
+                return True
+            except concurrent.futures.CancelledError:
+                return False
+            except concurrent.futures.TimeoutError:
+                if stop.is_set():
+                    future.cancel()
+                    return False
+
+    async def warm_up(self, phrases):
+        """Pre-renders phrases into the cache, one at a time. Returns how many were synthesized."""
+        rendered = 0
+        for phrase in phrases:
+            if not self.cache.cacheable(phrase):
+                continue
+            key = self.cache.key(phrase, self.voice_id, self.model_id, self.output_format)
+            if key in self.cache:
+                continue
+            async for _chunk in self.astream_audio(phrase):
+                pass
+            rendered += 1
+        if rendered:
+            logger.info(f"TTS cache warmed with {rendered} phrases.")
+        return rendered
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
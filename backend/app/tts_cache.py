@@ -0,0 +1,218 @@
+import asyncio
+import collections
+import hashlib
+import logging
+import os
+import struct
+import threading
+import unicodedata
+from .config import Config
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"TTSC1\n"
+COUNT = struct.Struct("<I") # Chunk count, followed by one uint32 size per chunk, then the PCM
+SUFFIX = ".tts"
+
+def normalize(text):
+    """Whitespace and Unicode form only: case, punctuation and cues like [laughs] change the delivery."""
+    return unicodedata.normalize("NFC", " ".join(text.split()))
+
+class TTSCache:
+    def __init__(self, directory=None, memory_bytes=None, disk_bytes=None, max_chars=None, enabled=None):
+        """
+        Content-addressed cache of synthesized utterances, keyed by
+        (normalized text, voice_id, model_id, output_format). A hit replays the exact chunk
+        sequence the live synthesis produced.
+        Memory tier: LRU bounded by memory_bytes.
+        Disk tier (only when `directory` is set): one file per utterance, least recently used
+        files deleted once the directory holds more than disk_bytes.
+        Only utterances up to max_chars are stored; long replies are rarely said twice.
+        Thread-safe, and file I/O never happens under the lock: get() reads files on a worker
+        thread and put() is itself called from one, so the event loop never waits on the disk.
+        """
+        self.directory = Config.TTS_CACHE_DIR if directory is None else directory
+        self.memory_bytes = int(Config.TTS_CACHE_MEMORY_MB * 1e6) if memory_bytes is None else memory_bytes
+        self.disk_bytes = int(Config.TTS_CACHE_DISK_MB * 1e6) if disk_bytes is None else disk_bytes
+        self.max_chars = Config.TTS_CACHE_MAX_CHARS if max_chars is None else max_chars
+        self.enabled = Config.TTS_CACHE if enabled is None else enabled
+        self._lock = threading.Lock()
+        self._memory = collections.OrderedDict() # key -> chunks, least recently used first
+        self._memory_used = 0
+        self._disk = collections.OrderedDict() # key -> file size, least recently used first
+        self._disk_used = 0
+
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        self.evictions = {"memory": 0, "disk": 0}
+
+        if self.enabled and self.directory:
+            self._load_disk_index()
+
+    @staticmethod
+    def key(text, voice_id, model_id, output_format):
+        identity = "\0".join((normalize(text), voice_id or "", model_id or "", output_format or ""))
+        return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+    def cacheable(self, text):
+        return self.enabled and 0 < len(normalize(text)) <= self.max_chars
+
+    def __contains__(self, key):
+        """Presence check that doesn't count as a lookup (warm-up)."""
+        with self._lock:
+            return key in self._memory or key in self._disk
+
+    async def get(self, key):
+        """Cached chunks for key (disk hits are promoted to the memory tier), or None on a miss."""
+        with self._lock:
+            chunks = self._memory.get(key)
+            if chunks is not None:
+                self._memory.move_to_end(key)
+                if key in self._disk:
+                    self._disk.move_to_end(key) # A use in either tier keeps the file too
+                self.hits["memory"] += 1
+                metrics.TTS_CACHE.inc(result="memory")
+                return chunks
+            on_disk = key in self._disk
+
+        chunks = await asyncio.to_thread(self._read_disk, key) if on_disk else None
+        with self._lock:
+            if chunks is not None:
+                if key in self._disk:
+                    self._disk.move_to_end(key)
+                self._remember(key, chunks)
+                self.hits["disk"] += 1
+                metrics.TTS_CACHE.inc(result="disk")
+                return chunks
+            if on_disk:
+                self._forget_disk(key) # Unreadable (or evicted while we read it)
+            self.misses += 1
+            metrics.TTS_CACHE.inc(result="miss")
+            return None
+
+    def put(self, key, chunks):
+        """Stores a complete synthesis in both tiers."""
+        chunks = [bytes(chunk) for chunk in chunks]
+        if not chunks:
+            return
+        with self._lock:
+            self._remember(key, chunks)
+            directory = self.directory if key not in self._disk else None
+        # Write outside the lock so lookups from the event loop never wait on disk I/O
+        size = self._write_disk(key, chunks) if directory else None
+        if size:
+            with self._lock:
+                if key not in self._disk:
+                    self._disk[key] = size
+                    self._disk_used += size
+                evicted = self._evict_disk()
+            self._remove_files(evicted)
+
+    def stats(self):
+        with self._lock:
+            hits = self.hits["memory"] + self.hits["disk"]
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.hits["memory"],
+                "disk_hits": self.hits["disk"],
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else None,
+                "memory_entries": len(self._memory),
+                "memory_mb": round(self._memory_used / 1e6, 2),
+                "disk_entries": len(self._disk),
+                "disk_mb": round(self._disk_used / 1e6, 2),
+                "evictions": dict(self.evictions),
+            }
+
+    def _remember(self, key, chunks):
+        size = sum(len(chunk) for chunk in chunks)
+        if size > self.memory_bytes:
+            return
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = chunks
+        self._memory_used += size
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= sum(len(chunk) for chunk in evicted)
+            self.evictions["memory"] += 1
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def _load_disk_index(self):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            entries = []
+            for name in os.listdir(self.directory):
+                if name.endswith(SUFFIX):
+                    info = os.stat(os.path.join(self.directory, name))
+                    entries.append((info.st_mtime, name[:-len(SUFFIX)], info.st_size))
+        except OSError as e:
+            logger.error(f"TTS disk cache unavailable at {self.directory}: {e}")
+            self.directory = None
+            return
+        for _mtime, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_used += size
+        self._remove_files(self._evict_disk())
+
+    def _read_disk(self, key):
+        """Worker thread: one plain read of the whole file, then split into the original chunks."""
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            if not data.startswith(MAGIC):
+                raise ValueError("bad header")
+            offset = len(MAGIC)
+            (count,) = COUNT.unpack_from(data, offset)
+            offset += COUNT.size
+            sizes = struct.unpack_from(f"<{count}I", data, offset)
+            offset += 4 * count
+            if offset + sum(sizes) != len(data):
+                raise ValueError("truncated")
+            chunks = []
+            for size in sizes:
+                chunks.append(data[offset:offset + size]) # bytes, like the live stream's chunks
+                offset += size
+            os.utime(self._path(key)) # Recency survives restarts
+            return chunks
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"Dropping unreadable TTS cache file {key}: {e}")
+            return None
+
+    def _write_disk(self, key, chunks):
+        header = MAGIC + COUNT.pack(len(chunks)) + struct.pack(f"<{len(chunks)}I", *(len(c) for c in chunks))
+        temp = f"{self._path(key)}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp, "wb") as f:
+                f.write(header)
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(temp, self._path(key)) # Readers never see a half-written file
+        except OSError as e:
+            logger.error(f"TTS disk cache write failed: {e}")
+            return None
+        return len(header) + sum(len(c) for c in chunks)
+
+    def _evict_disk(self):
+        """Drops least recently used files from the index. Returns their keys; delete them unlocked."""
+        evicted = []
+        while self._disk_used > self.disk_bytes and self._disk:
+            key = next(iter(self._disk))
+            self._forget_disk(key)
+            self.evictions["disk"] += 1
+            evicted.append(key)
+        return evicted
+
+    def _forget_disk(self, key):
+        self._disk_used -= self._disk.pop(key, 0)
+
+    def _remove_files(self, keys):
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
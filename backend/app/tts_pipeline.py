@@ -0,0 +1,111 @@
+import asyncio
+import collections
+import logging
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+class _Synthesis:
+    """One sentence on its way through TTS. Chunks land in `queue`, None marks the end."""
+    def __init__(self, text):
+        self.text = text
+        self.queue = asyncio.Queue()
+        self.task = None
+
+class TTSPipeline:
+    def __init__(self, tts, sink, lookahead=2, not_before=None, on_start=None):
+        """
+        Synthesizes upcoming sentences while the current one is still playing.
+        tts: object with astream_audio(text) -> async iterator of audio chunks.
+        sink: async callable receiving audio chunks, strictly in sentence order.
+        lookahead: how many sentences past the playing one may be synthesizing at once.
+        not_before: loop.time() before which no audio is delivered (synthesis still runs).
+        on_start: called once, right before the first chunk reaches the sink.
+        """
+        self.tts = tts
+        self.sink = sink
+        self.lookahead = lookahead
+        self.not_before = not_before
+        self.on_start = on_start
+        self._started = False
+        self._first_byte_timed = False # TTS time-to-first-byte is recorded once per reply
+        self._pending = collections.deque() # Sentences not fully delivered yet
+        self._wakeup = asyncio.Event()
+        self._closed = False
+        self._consumer = None
+
+    def submit(self, text):
+        """Queue a sentence. Synthesis starts right away if it fits in the look-ahead window."""
+        if self._closed:
+            raise RuntimeError("TTSPipeline already drained.")
+        self._pending.append(_Synthesis(text))
+        self._fill_window()
+        if self._consumer is None:
+            self._consumer = asyncio.create_task(self._deliver())
+        self._wakeup.set()
+
+    async def drain(self):
+        """No more sentences are coming. Wait until all queued audio has been delivered."""
+        self._closed = True
+        self._wakeup.set()
+        if self._consumer:
+            await self._consumer
+
+    def cancel(self):
+        """Stop delivering audio and abandon in-flight syntheses (barge-in)."""
+        self._closed = True
+        if self._consumer and not self._consumer.done():
+            self._consumer.cancel()
+        for item in self._pending:
+            if item.task and not item.task.done():
+                item.task.cancel()
+        self._pending.clear()
+
+    def _fill_window(self):
+        for item in list(self._pending)[:1 + self.lookahead]:
+            if item.task is None:
+                logger.debug(f"Requesting TTS ahead of playback: {item.text}")
+                item.task = asyncio.create_task(self._synthesize(item))
+
+    async def _synthesize(self, item):
+        requested = metrics.clock()
+        try:
+            async for chunk in self.tts.astream_audio(item.text):
+                if not self._first_byte_timed:
+                    self._first_byte_timed = True
+                    metrics.TTS_FIRST_BYTE.observe(metrics.clock() - requested)
+                item.queue.put_nowait(chunk)
+        except Exception as e:
+            logger.error(f"TTS synthesis failed for '{item.text}': {e}")
+        finally:
+            item.queue.put_nowait(None)
+
+    async def _deliver(self):
+        while True:
+            if not self._pending:
+                if self._closed:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            item = self._pending[0]
+            while True:
+                chunk = await item.queue.get()
+                if chunk is None:
+                    break
+                if not self._started:
+                    await self._start_playback()
+                await self.sink(chunk)
+
+            self._pending.popleft()
+            self._fill_window()
+
+    async def _start_playback(self):
+        self._started = True
+        if self.not_before is not None:
+            hold = self.not_before - asyncio.get_running_loop().time()
+            if hold > 0:
+                await asyncio.sleep(hold)
+        if self.on_start:
+            self.on_start()
@@ -1,6 +1,7 @@
 import webrtcvad
 import logging
 from .config import Config
+from .audio_framer import AudioFramer
 
 logger = logging.getLogger(__name__)
 
@@ -10,30 +11,28 @@ class VAD:
         self.sample_rate = Config.SAMPLE_RATE
         self.frame_duration_ms = 30
         self.frame_size = int(self.sample_rate * self.frame_duration_ms / 1000) # 480 samples for 16kHz
-        self.buffer = b""
+        self.framer = AudioFramer(self.frame_size)
 
     def process(self, pcm_data):
         """
         Returns True if speech is detected in the processed chunks.
         Handles buffering to match 10/20/30ms frame sizes.
         """
-        self.buffer += pcm_data
         is_speech_detected = False
         
-        # 2 bytes per sample
-        frame_byte_size = self.frame_size * 2
-        
-        while len(self.buffer) >= frame_byte_size:
-            frame = self.buffer[:frame_byte_size]
-            self.buffer = self.buffer[frame_byte_size:]
-            
-            try:
-                if self.vad.is_speech(frame, self.sample_rate):
-                    is_speech_detected = True
-            except Exception as e:
-                logger.error(f"VAD error: {e}")
+        for frame in self.framer.push(pcm_data):
+            if self.is_speech(frame):
+                is_speech_detected = True
                 
         return is_speech_detected
 
+    def is_speech(self, frame):
+        """Classify exactly one frame (frame_size samples)."""
+        try:
+            return self.vad.is_speech(frame, self.sample_rate)
+        except Exception as e:
+            logger.error(f"VAD error: {e}")
+            return False
+
     def reset(self):
-        self.buffer = b""
+        self.framer.clear()
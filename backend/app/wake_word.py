@@ -1,15 +1,15 @@
 import os
 import pvporcupine
-import struct
 import logging
 from .config import Config
+from .audio_framer import AudioFramer
 
 logger = logging.getLogger(__name__)
 
 class WakeWordDetector:
     def __init__(self):
         self.porcupine = None
-        self.buffer = bytearray()
+        self.framer = None
         try:
             path = Config.get_wake_word_path()
             if path and os.path.exists(path):
@@ -31,6 +31,7 @@ class WakeWordDetector:
                 )
             
             self.frame_bytes = self.porcupine.frame_length * 2 
+            self.framer = AudioFramer(self.porcupine.frame_length)
             logger.info(f"Porcupine initialized. Frame Length: {self.porcupine.frame_length} samples")
         except Exception as e:
             logger.error(f"Failed to initialize Porcupine. Please check if your PORCUPINE_ACCESS_KEY is valid or expired: {e}")
@@ -44,32 +45,54 @@ class WakeWordDetector:
         if not self.porcupine:
             return False
 
-        # Add new chunk to the sliding buffer
-        self.buffer.extend(pcm_chunk)
-
         detected = False
-        # Process all full frames currently in the buffer
-        while len(self.buffer) >= self.frame_bytes:
-            # Extract exactly one frame
-            frame_data = self.buffer[:self.frame_bytes]
-            # Remove that frame from the buffer (sliding window)
-            self.buffer = self.buffer[self.frame_bytes:]
-
-            # Unpack and process
-            pcm = struct.unpack_from("h" * self.porcupine.frame_length, frame_data)
-            result = self.porcupine.process(pcm)
+        # Process all full frames currently buffered (views, no re-slicing of the buffer)
+        for frame in self.framer.push(pcm_chunk):
+            # Reinterpret the bytes as 16-bit samples in place
+            result = self.porcupine.process(frame.cast("h"))
             
             if result >= 0:
                 logger.info("Wake word detected!")
                 detected = True
                 # Clear buffer on detection to prevent duplicate triggers
-                self.buffer.clear()
+                self.framer.clear()
                 break # Return immediately on detection
                 
         return detected
 
+    def reset(self):
+        """Forget buffered audio before the detector listens to another stream."""
+        if self.framer:
+            self.framer.clear()
+
     def delete(self):
         if self.porcupine:
             self.porcupine.delete()
             self.porcupine = None
-            self.buffer.clear()
+            self.framer.clear()
+
+class WakeWordPool:
+    def __init__(self, factory=WakeWordDetector, max_idle=None):
+        """
+        Wake word detectors for the sessions. A Porcupine engine carries state from one frame
+        to the next and isn't thread-safe, so every live session needs its own; the pool only
+        saves creating one per connection. Closed sessions hand theirs back and the next client
+        reuses it instead of paying pvporcupine.create (model load + AccessKey check) again.
+        """
+        self.factory = factory
+        self.max_idle = Config.MAX_SESSIONS if max_idle is None else max_idle
+        self._idle = []
+
+    def acquire(self):
+        return self._idle.pop() if self._idle else self.factory()
+
+    def release(self, detector):
+        detector.reset()
+        if len(self._idle) < self.max_idle:
+            self._idle.append(detector)
+        else:
+            detector.delete()
+
+    def close(self):
+        while self._idle:
+            self._idle.pop().delete()
@@ -1,42 +1,77 @@
 import logging
 import asyncio
 import numpy as np
-import webrtcvad
 import collections
-import time
 from faster_whisper import WhisperModel
 from .config import Config
+from .stt_executor import STTExecutor
+from .endpointing import Endpointer
+from . import metrics
 
 logger = logging.getLogger(__name__)
 
 class WhisperSTTService:
-    def __init__(self, model_size="small", device="cpu", compute_type="int8"):
+    def __init__(self, model_size="small", device="cpu", compute_type="int8", executor=None):
         """
-        Initializes STT buffers and VAD. Model loading is deferred.
+        Initializes STT buffers. Model loading is deferred.
+        Speech/silence comes from the shared FramePipeline, see process_frames(). All timing
+        (silence, max utterance length) uses the frames' audio timestamps, never the wall clock.
+        Decoding runs on `executor` so inference never blocks the event loop.
+        While the user talks, the tail of the utterance is re-decoded every STT_PARTIAL_INTERVAL
+        seconds of audio, but only on an idle worker, so a final waits for at most one partial.
+        When every decode slot is taken, a finished utterance keeps its audio and is retried
+        on each new frame; after STT_MAX_HOLD seconds of audio it is dropped and reported.
         """
         self.model_size = model_size
         self.device = device
         self.compute_type = compute_type
-        self.model = None
+        self._model = None
+        self._shared = None # Set on per-session views, see for_session()
         self.is_loading = False
+        self.executor = executor or STTExecutor()
 
-        # VAD Setup
-        self.vad = webrtcvad.Vad(3) # Aggressiveness 3 (Strict) to avoid noise hallucinations
         self.sample_rate = 16000
-        self.frame_duration_ms = 30
-        self.frame_size = int(self.sample_rate * self.frame_duration_ms / 1000) # 480 samples
         
         # Buffers
-        self.buffer = b""
         self.audio_buffer = collections.deque() # Stores valid speech frames
+        self.energy = 0.0 # Sum of squared samples in audio_buffer, for live_cues()
         self.is_speaking = False
         self.silence_start_time = None
         self.speech_start_time = None # Track start of utterance
-        self.silence_threshold = 2.0 
+        self.endpointer = Endpointer() # Learns this user's pauses and pace over the session
+        self.silence_threshold = self.endpointer.max_silence # Hang-over for the current turn, set when silence starts
         self.max_utterance_duration = 15.0 # Force transcription every 15s to avoid hallucinations
+        self.max_hold = Config.STT_MAX_HOLD
+        self.held_since = None # Audio time the finished utterance started waiting for a decode slot
+
+        # Partial transcripts
+        frame_seconds = 0.03 # FramePipeline frames are 30 ms
+        self.partials_enabled = Config.STT_PARTIALS
+        self.partial_interval_frames = max(1, int(Config.STT_PARTIAL_INTERVAL / frame_seconds))
+        self.partial_window_frames = max(1, int(Config.STT_PARTIAL_WINDOW / frame_seconds))
+        self.frames_since_partial = 0
+        self.utterance_id = 0 # Bumped on reset; stale partial decodes compare against it
+        self.last_partial = ""
+        self.last_partial_at = None # Audio time at the end of the frames last_partial was decoded from
+        self.stable_text = "" # Words the last two partials agreed on
         
         self.active = False # Controls if we are listening
 
+    @property
+    def model(self):
+        # Session views always see the shared model, even if it finishes loading later
+        return self._shared.model if self._shared else self._model
+
+    @model.setter
+    def model(self, value):
+        self._model = value
+
+    def for_session(self):
+        """Fresh listening state (buffers + endpointing) that shares this model and decode worker."""
+        session = WhisperSTTService(self.model_size, self.device, self.compute_type, executor=self.executor)
+        session._shared = self
+        return session
+
     async def load_model(self):
         """Heavy lifting for model loading, run in a separate thread."""
         if self.model or self.is_loading:
@@ -50,7 +85,8 @@ class WhisperSTTService:
                 WhisperModel, 
                 self.model_size, 
                 device=self.device, 
-                compute_type=self.compute_type
+                compute_type=self.compute_type,
+                num_workers=self.executor.max_workers # Lets the STT worker threads decode in parallel
             )
             logger.info("Whisper model loaded successfully.")
         except Exception as e:
@@ -68,87 +104,208 @@ class WhisperSTTService:
         self.reset()
         logger.info("Whisper STT stopped.")
 
+    def close(self):
+        """Release the decode worker. Only needed on shutdown."""
+        self.stop()
+        self.executor.shutdown()
+
     def reset(self):
-        self.buffer = b""
         self.audio_buffer.clear()
+        self.energy = 0.0
+        self.endpointer.begin_utterance()
+        self.utterance_id += 1
+        self.frames_since_partial = 0
+        self.last_partial = ""
+        self.last_partial_at = None
+        self.stable_text = ""
         self.is_speaking = False
         self.silence_start_time = None
         self.speech_start_time = None
+        self.held_since = None
 
-    def process_frame(self, pcm_data):
+    def process_frames(self, features):
         """
-        Process a chunk of PCM audio.
-        Returns: (text, True) if a complete utterance is transcribed, else None.
+        Process FrameFeatures from the FramePipeline (VAD already ran on them).
+        Returns: a list of awaitables, usually empty. Each resolves to (text, True) for a
+        completed utterance, (text, False) for a partial of the live one, (None, True) for
+        an utterance dropped because STT was overloaded, or None.
         """
         if not self.active or not self.model:
-            return None
-
-        # Buffer incoming data to match VAD frame size
-        self.buffer += pcm_data
-        frame_byte_size = self.frame_size * 2 # 16-bit = 2 bytes
-        
-        result = None
-
-        while len(self.buffer) >= frame_byte_size:
-            frame = self.buffer[:frame_byte_size]
-            self.buffer = self.buffer[frame_byte_size:]
-            
-            is_speech = False
-            try:
-                is_speech = self.vad.is_speech(frame, self.sample_rate)
-            except Exception:
-                pass
+            return []
 
-            if is_speech:
+        pending = []
+        for item in features:
+            frame_end = item.timestamp + item.duration
+            utterance = self.utterance_id
+            if item.is_speech:
                 if not self.is_speaking:
                     logger.debug("Speech started")
                     self.is_speaking = True
-                    self.speech_start_time = time.time()
+                    self.speech_start_time = item.timestamp
+                self.endpointer.observe(item)
                 self.silence_start_time = None
-                self.audio_buffer.append(frame)
+                self._buffer(item)
                 
                 # Force transcription if duration is too long
-                if self.speech_start_time and (time.time() - self.speech_start_time > self.max_utterance_duration):
-                    logger.info("Max utterance duration reached. Forcing transcription...")
-                    result = self.transcribe()
-                    self.reset()
-                    return result
+                if self.speech_start_time is not None and (frame_end - self.speech_start_time > self.max_utterance_duration):
+                    if self.held_since is None:
+                        logger.info("Max utterance duration reached. Forcing transcription...")
+                    pending.append(self._submit_transcription(frame_end))
             else:
                 if self.is_speaking:
                     # We were speaking, now silence
+                    self.endpointer.observe(item)
                     if self.silence_start_time is None:
-                        self.silence_start_time = time.time()
+                        self.silence_start_time = item.timestamp
+                        # Decide this turn's hang-over from what we know so far
+                        self.silence_threshold = self.endpointer.hangover(self.last_partial)
                     
                     # Keep buffering silence for a bit to capture trailing sounds
-                    self.audio_buffer.append(frame)
+                    self._buffer(item)
                     
                     # Check silence duration
-                    if time.time() - self.silence_start_time > self.silence_threshold:
-                        logger.debug("Silence threshold reached. Transcribing...")
-                        result = self.transcribe()
-                        self.reset() # Ready for next utterance
-                        # If we have a result, we return it. 
-                        # Note: The while loop might continue if we had more data, 
-                        # but usually we process real-time chunks so one transcribe per call is fine.
-                        return result
+                    if frame_end - self.silence_start_time > self.silence_threshold:
+                        if self.held_since is None:
+                            logger.debug(f"Silence threshold ({self.silence_threshold:.2f}s) reached. Transcribing...")
+                            metrics.ENDPOINT_DELAY.observe(frame_end - self.silence_start_time)
+                        # Later frames of the same chunk start the next utterance
+                        pending.append(self._submit_transcription(frame_end))
+
+            if self.is_speaking and self.utterance_id == utterance:
+                self.frames_since_partial += 1
+                if self.frames_since_partial >= self.partial_interval_frames:
+                    pending.append(self._submit_partial(frame_end))
         
-        return None
+        return [p for p in pending if p]
+
+    def _buffer(self, item):
+        self.audio_buffer.append(bytes(item.pcm))
+        self.energy += item.rms * item.rms * (len(item.pcm) // 2)
+
+    def live_cues(self):
+        """The sonic cues the final transcript would get if the utterance ended now."""
+        num_bytes = sum(len(frame) for frame in self.audio_buffer)
+        if not num_bytes:
+            return ""
+        return self.sonic_cues((self.energy / (num_bytes // 2)) ** 0.5, num_bytes)
 
-    def transcribe(self):
-        if not self.audio_buffer or not self.model:
+    def _submit_transcription(self, at):
+        """Decode the utterance on the STT executor and reset for the next one, or hold it while the executor is full."""
+        if not self.audio_buffer:
+            self.reset()
             return None
+        if self.executor.full:
+            return self._hold(at)
 
-        # Combine frames
-        audio_data = b"".join(self.audio_buffer)
-        
-        # Convert to numpy array float32 for Whisper
-        # 16-bit PCM -> float32 normalized to [-1, 1]
+        future = self.executor.submit(self.transcribe, b"".join(self.audio_buffer))
+        if self.held_since is not None:
+            logger.info(f"STT slot freed after holding the utterance for {at - self.held_since:.1f}s.")
+        speech_seconds = self.endpointer.finish_turn()
+        self.reset() # Only now: the audio is safely on the executor
+        future.add_done_callback(lambda f: self._on_final(f, speech_seconds))
+        return future
+
+    def _hold(self, at):
+        """Keep the finished utterance's audio for the next frame's retry, up to max_hold seconds."""
+        if self.held_since is None:
+            self.held_since = at
+            logger.warning(f"STT backlog full ({self.executor.finals_pending} pending). Holding the utterance.")
+            return None
+        if at - self.held_since <= self.max_hold:
+            return None
+        logger.error(f"STT backlog full for {self.max_hold:.0f}s of audio. Dropping utterance.")
+        metrics.STT_DROPPED.inc()
+        self.reset()
+        dropped = asyncio.get_running_loop().create_future()
+        dropped.set_result((None, True)) # Tells the session to let the user know
+        return dropped
+
+    def _on_final(self, future, speech_seconds):
+        if future.cancelled() or future.exception() or not future.result():
+            return
+        self.endpointer.learn_rate(future.result()[0], speech_seconds)
+
+    def _submit_partial(self, at):
+        """Re-decode the tail of the live utterance, only on an idle worker and never while a final is held."""
+        if not self.partials_enabled or self.held_since is not None or self.executor.busy:
+            return None
+        self.frames_since_partial = 0
+        window = list(self.audio_buffer)[-self.partial_window_frames:]
+        future = self.executor.submit(self.transcribe_partial, b"".join(window), self.utterance_id, background=True)
+        if future:
+            future.add_done_callback(lambda f, utterance=self.utterance_id: self._on_partial(f, utterance, at))
+        return future
+
+    def _on_partial(self, future, utterance, at):
+        # Runs on the event loop before anyone awaiting the partial sees it
+        if future.cancelled() or future.exception() or utterance != self.utterance_id:
+            return
+        result = future.result()
+        if not result:
+            return
+        text = result[0]
+        self.stable_text = self._common_prefix(self.last_partial, text)
+        self.last_partial = text
+        self.last_partial_at = at
+        if self.silence_start_time is not None:
+            # Already in trailing silence: the new text may end (or extend) the turn sooner
+            self.silence_threshold = self.endpointer.hangover(text)
+
+    @staticmethod
+    def _common_prefix(previous, current):
+        """Longest run of leading words two hypotheses agree on (case/punctuation-insensitive)."""
+        agreed = []
+        for old, new in zip(previous.split(), current.split()):
+            if old.lower().strip(".,?!") != new.lower().strip(".,?!"):
+                break
+            agreed.append(new)
+        return " ".join(agreed)
+
+    def transcribe_partial(self, audio_data, utterance_id):
+        """Blocking decode of part of the live utterance. Returns (text, False) or None."""
+        if utterance_id != self.utterance_id or not self.model:
+            return None # Utterance already finalized; don't spend CPU on it
         audio_np = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768.0
+        try:
+            text = self._dedupe_words(self._decode(audio_np))
+        except Exception as e:
+            logger.error(f"Partial transcription error: {e}")
+            return None
+        if utterance_id != self.utterance_id:
+            return None # Finalized while we were decoding
+        if len(text) > 2:
+            logger.debug(f"Whisper partial: {text}")
+            return text, False
+        return None
 
-        # --- SONIC EMPATHY ANALYSIS ---
-        # Calculate RMS energy (volume)
-        rms = np.sqrt(np.mean(audio_np**2))
-        
+    def _decode(self, audio_np):
+        # beam_size=1 is faster and often avoids repetitive hallucinations better than high beams
+        # condition_on_previous_text=False prevents "ghosting" from past errors
+        segments, info = self.model.transcribe(
+            audio_np, 
+            beam_size=1, 
+            language="en", 
+            condition_on_previous_text=False,
+            initial_prompt="A natural conversation between two friends."
+        )
+        return " ".join([segment.text for segment in segments]).strip()
+
+    @staticmethod
+    def _dedupe_words(text):
+        # Post-processing: Deduplicate stuttering hallucinations (e.g., "what, what, what" -> "what")
+        words = text.split()
+        clean_words = []
+        for i, word in enumerate(words):
+            normalized_word = word.lower().strip(".,?!")
+            if i > 0:
+                prev_normalized = words[i-1].lower().strip(".,?!")
+                if normalized_word == prev_normalized:
+                    continue
+            clean_words.append(word)
+        return " ".join(clean_words)
+
+    def sonic_cues(self, rms, num_bytes):
+        """Volume and pace tags for an utterance of num_bytes of PCM with the given RMS (0.0-1.0)."""
         # Determine acoustic cues
         # threshold 0.01 is very soft (whisper), 0.1 is normal, 0.3+ is loud/intense
         sonic_tag = "[Normal Volume]"
@@ -158,8 +315,8 @@ class WhisperSTTService:
             sonic_tag = "[Loud/Intense Voice]"
             
         # Optional: Duration/Pace check
-        duration = len(audio_np) / self.sample_rate
-        words_estimate = len(audio_data) / 2000 # Very rough words estimate
+        duration = num_bytes / 2 / self.sample_rate
+        words_estimate = num_bytes / 2000 # Very rough words estimate
         pace_tag = ""
         if duration > 1.0:
             words_per_sec = words_estimate / duration
@@ -168,34 +325,35 @@ class WhisperSTTService:
             elif words_per_sec < 1.5:
                 pace_tag = "[Slow/Heavy Pace]"
         
-        sonic_cues = f"{sonic_tag} {pace_tag}".strip()
+        return f"{sonic_tag} {pace_tag}".strip()
+
+    def transcribe(self, audio_data=None):
+        """Blocking Whisper decode. Call through the executor, never from the event loop."""
+        if audio_data is None:
+            # Combine frames
+            audio_data = b"".join(self.audio_buffer)
+        if not audio_data or not self.model:
+            return None
+        
+        # Convert to numpy array float32 for Whisper
+        # 16-bit PCM -> float32 normalized to [-1, 1]
+        audio_np = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768.0
+
+        # --- SONIC EMPATHY ANALYSIS ---
+        # Calculate RMS energy (volume)
+        rms = np.sqrt(np.mean(audio_np**2))
+        duration = len(audio_np) / self.sample_rate
+        sonic_cues = self.sonic_cues(rms, len(audio_data))
         # ------------------------------
 
         try:
-            # beam_size=1 is faster and often avoids repetitive hallucinations better than high beams
-            # condition_on_previous_text=False prevents "ghosting" from past errors
-            segments, info = self.model.transcribe(
-                audio_np, 
-                beam_size=1, 
-                language="en", 
-                condition_on_previous_text=False,
-                initial_prompt="A natural conversation between two friends."
-            )
-            raw_text = " ".join([segment.text for segment in segments]).strip()
+            started = metrics.clock()
+            raw_text = self._decode(audio_np)
+            decode_seconds = metrics.clock() - started
+            metrics.STT_DECODE.observe(decode_seconds)
+            metrics.STT_REAL_TIME_FACTOR.observe(decode_seconds / max(duration, 0.01))
             # Prefix with acoustic cues so the LLM "hears" the volume and speed
-            text = f"{sonic_cues} {raw_text}".strip()
-            
-            # Post-processing: Deduplicate stuttering hallucinations (e.g., "what, what, what" -> "what")
-            words = text.split()
-            clean_words = []
-            for i, word in enumerate(words):
-                normalized_word = word.lower().strip(".,?!")
-                if i > 0:
-                    prev_normalized = words[i-1].lower().strip(".,?!")
-                    if normalized_word == prev_normalized:
-                        continue
-                clean_words.append(word)
-            text = " ".join(clean_words)
+            text = self._dedupe_words(f"{sonic_cues} {raw_text}".strip())
             
             if text and len(text.strip()) > 2: # Avoid tiny hallucinated sounds
                 logger.info(f"Whisper Transcribed: {text}")
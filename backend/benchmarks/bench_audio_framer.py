@@ -0,0 +1,72 @@
+"""
+Microbenchmark: AudioFramer (memoryview ring) vs. the old buffer re-slicing.
+  bytes:     WhisperSTTService / VAD  (buffer += chunk; buffer = buffer[n:])
+  bytearray: WakeWordDetector         (buffer.extend(chunk); buffer = buffer[n:])
+
+Usage (from backend/):
+    python benchmarks/bench_audio_framer.py
+"""
+import os
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.audio_framer import AudioFramer
+
+FRAME_SAMPLES = 480 # VAD frame (30 ms @ 16 kHz)
+FRAME_BYTES = FRAME_SAMPLES * 2
+STREAM_SECONDS = 60
+
+def legacy_bytes(chunks):
+    buffer = b""
+    n = 0
+    for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= FRAME_BYTES:
+            buffer[:FRAME_BYTES] # The copy the old code made of every frame
+            buffer = buffer[FRAME_BYTES:]
+            n += 1
+    return n
+
+def legacy_bytearray(chunks):
+    buffer = bytearray()
+    n = 0
+    for chunk in chunks:
+        buffer.extend(chunk)
+        while len(buffer) >= FRAME_BYTES:
+            buffer[:FRAME_BYTES] # The copy the old code made of every frame
+            buffer = buffer[FRAME_BYTES:]
+            n += 1
+    return n
+
+def framer(chunks):
+    framer = AudioFramer(FRAME_SAMPLES)
+    n = 0
+    for chunk in chunks:
+        for frame in framer.push(chunk):
+            n += 1
+    return n
+
+def make_chunks(chunk_bytes):
+    total = 16000 * 2 * STREAM_SECONDS
+    chunk = os.urandom(chunk_bytes)
+    return [chunk] * (total // chunk_bytes)
+
+def bench(fn, chunks, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(chunks)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == "__main__":
+    print(f"{STREAM_SECONDS}s of 16 kHz audio, per chunk size (ms total)")
+    print(f"{'chunk':>9} {'bytes':>9} {'bytearray':>10} {'framer':>9}")
+    # 1024 B = one mic callback; larger sizes are network bursts after a stall
+    for chunk_bytes in (1024, 4096, 64 * 1024, 512 * 1024):
+        chunks = make_chunks(chunk_bytes)
+        results = [bench(fn, chunks) for fn in (legacy_bytes, legacy_bytearray, framer)]
+        print(f"{chunk_bytes:>9} " + " ".join(f"{r * 1000:>9.2f}" for r in results))
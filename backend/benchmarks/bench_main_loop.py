@@ -0,0 +1,137 @@
+"""
+Benchmark: AIBackend.run dispatch loop, before and after the batch-draining rewrite.
+  legacy: one frame per iteration from an asyncio.Queue, then await asyncio.sleep(0.001)
+  batch:  AudioStream.get_frames() drains everything queued and only waits when empty
+Every frame goes through a real FramePipeline (framing + webrtcvad + RMS), like dispatch_frame.
+
+Reports:
+  throughput: a backlog of chunks (one session), frames/s
+  latency:    N sessions on one event loop, each streaming 1024-byte chunks in real time,
+              either evenly or in bursts (jittery network: several chunks land at once),
+              time from enqueue to dispatch (p50/p99/max)
+
+Usage (from backend/):
+    python benchmarks/bench_main_loop.py [--sessions 1,8,32] [--bursts 1,8] [--seconds 3]
+"""
+import argparse
+import asyncio
+import collections
+import os
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.audio import IngressBuffer
+from app.frame_pipeline import FramePipeline
+
+CHUNK_BYTES = 1024 # 32 ms of 16 kHz audio, a typical client message
+CHUNK_SECONDS = CHUNK_BYTES / 2 / 16000
+
+class LegacySource:
+    def __init__(self):
+        self.queue = asyncio.Queue()
+
+    def put(self, chunk):
+        self.queue.put_nowait(chunk)
+
+    async def consume(self, dispatch, running):
+        while running():
+            frame = await self.queue.get()
+            dispatch(frame)
+            await asyncio.sleep(0.001)
+
+class BatchSource:
+    def __init__(self):
+        self.queue = IngressBuffer(max_bytes=1 << 30, max_chunks=1 << 20, policy="block")
+
+    def put(self, chunk):
+        self.queue.put_nowait(chunk)
+
+    async def consume(self, dispatch, running):
+        while running():
+            for frame in await self.queue.get_batch():
+                dispatch(frame)
+
+async def throughput(source_cls, chunks=20000):
+    source = source_cls()
+    pipeline = FramePipeline()
+    chunk = os.urandom(CHUNK_BYTES)
+    for _ in range(chunks):
+        source.put(chunk)
+    done = 0
+
+    def dispatch(frame):
+        nonlocal done
+        pipeline.push(frame)
+        done += 1
+
+    start = time.perf_counter()
+    consumer = asyncio.create_task(source.consume(dispatch, lambda: done < chunks))
+    while done < chunks:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    consumer.cancel()
+    return chunks / elapsed
+
+async def latency(source_cls, sessions, burst, seconds):
+    loop = asyncio.get_running_loop()
+    lags = []
+    stop_at = loop.time() + seconds
+    tasks = []
+
+    for _ in range(sessions):
+        source = source_cls()
+        pipeline = FramePipeline()
+        sent = collections.deque()
+
+        def dispatch(frame, pipeline=pipeline, sent=sent):
+            pipeline.push(frame)
+            lags.append(loop.time() - sent.popleft())
+
+        async def produce(source=source, sent=sent):
+            chunk = os.urandom(CHUNK_BYTES)
+            next_at = loop.time()
+            while loop.time() < stop_at:
+                for _ in range(burst):
+                    sent.append(loop.time())
+                    source.put(chunk)
+                next_at += CHUNK_SECONDS * burst
+                await asyncio.sleep(max(0.0, next_at - loop.time()))
+
+        tasks.append(asyncio.create_task(produce()))
+        tasks.append(asyncio.create_task(source.consume(dispatch, lambda: loop.time() < stop_at + 0.5)))
+
+    await asyncio.sleep(seconds + 0.2)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    lags.sort()
+    pick = lambda q: lags[min(len(lags) - 1, int(len(lags) * q))] * 1000
+    return pick(0.5), pick(0.99), lags[-1] * 1000
+
+async def main(sessions, bursts, seconds):
+    print("throughput (backlog drain, 1 session)")
+    for name, cls in (("legacy", LegacySource), ("batch", BatchSource)):
+        print(f"  {name:>6}: {await throughput(cls):>10.0f} chunks/s")
+
+    print(f"\nlatency enqueue -> dispatch, real-time streams for {seconds}s (ms)")
+    print(f"  {'sessions':>8} {'burst':>5} {'loop':>6} {'p50':>7} {'p99':>7} {'max':>7}")
+    for n in sessions:
+        for burst in bursts:
+            for name, cls in (("legacy", LegacySource), ("batch", BatchSource)):
+                p50, p99, worst = await latency(cls, n, burst, seconds)
+                print(f"  {n:>8} {burst:>5} {name:>6} {p50:>7.2f} {p99:>7.2f} {worst:>7.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", default="1,8,32")
+    parser.add_argument("--bursts", default="1,8")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+    asyncio.run(main(
+        [int(s) for s in args.sessions.split(",")],
+        [int(b) for b in args.bursts.split(",")],
+        args.seconds
+    ))
@@ -0,0 +1,478 @@
+"""
+Benchmark: end-to-end turn latency, replaying recorded conversations through the real /ws/audio path.
+
+The FastAPI app from main.py is served by uvicorn in this process. A client connects to /ws/audio
+like the frontend does, starts the session with POST /start-session, and streams every user turn
+in real time (then keeps sending silence, like an open microphone) until the reply has played.
+Gemini and ElevenLabs are replaced by the offline backends from app/providers.py (synthetic by
+default, --cassettes DIR to replay recordings), so prompt building, model tiers, the TTS bridge
+and everything in between run unchanged.
+Without DATABASE_URL the store runs offline (its methods no-op without a pool).
+
+Corpus layout: one directory per conversation, one 16 kHz mono 16-bit WAV per user turn,
+played in name order (turn_01.wav, turn_02.wav, ...). turn_01.txt next to a WAV is its transcript,
+only used by --fake-stt. Without --corpus a deterministic synthetic corpus is generated
+(voiced, speech-like audio that passes the VAD but that Whisper can't transcribe: use --fake-stt).
+
+Reports, as JSON (default: benchmarks/results/replay_<commit>.json) and a table:
+  - per-stage latency percentiles, taken from the raw app.metrics observations
+  - client-side end-to-end latency (last voiced sample sent -> first reply audio received)
+  - Whisper real-time factor, process CPU time and RSS
+
+Usage (from backend/):
+    python benchmarks/bench_replay.py --corpus path/to/corpus
+    python benchmarks/bench_replay.py --fake-stt                    # no model download needed
+    python benchmarks/bench_replay.py --fake-stt --compare benchmarks/results/replay_abc1234.json
+"""
+import argparse
+import asyncio
+import collections
+import datetime
+import json
+import logging
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from types import SimpleNamespace
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Stand-in credentials so Config.validate() passes; no request ever reaches the real services
+for key in ("PORCUPINE_ACCESS_KEY", "GEMINI_API_KEY", "ELEVENLABS_API_KEY"):
+    os.environ.setdefault(key, "replay-benchmark")
+os.environ.setdefault("DEBUG", "True") # DATABASE_URL is optional
+
+import httpx
+import uvicorn
+import websockets
+
+import main
+from app import metrics
+from app.config import Config
+from app import providers
+from app.conversation_history_store import ConversationHistoryStore
+from app.vad import VAD
+
+logging.getLogger().setLevel(logging.WARNING) # main.py logs every turn at INFO
+
+SAMPLE_RATE = 16000
+CHUNK_BYTES = 1024 # What the frontend sends per message (32 ms)
+CHUNK_SECONDS = CHUNK_BYTES / 2 / SAMPLE_RATE
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# Histograms reported per stage (app.metrics name -> report key)
+STAGES = {
+    "ai_friend_endpoint_delay_seconds": "endpoint_delay",
+    "ai_friend_stt_decode_seconds": "stt_decode",
+    "ai_friend_llm_first_token_seconds": "llm_first_token",
+    "ai_friend_llm_total_seconds": "llm_total",
+    "ai_friend_tts_first_byte_seconds": "tts_first_byte",
+    "ai_friend_first_audio_sent_seconds": "first_audio_sent",
+    "ai_friend_speech_to_speech_seconds": "speech_to_speech",
+}
+
+class ReplayWhisperModel:
+    """
+    Stand-in for faster_whisper.WhisperModel (--fake-stt). Decodes cost rtf x audio duration
+    on the STT worker thread. The text is the current turn's transcript, cut to the share of
+    its voiced audio heard so far, so partials grow and the final is complete.
+    Shared by all sessions: with voiced_seconds unset (concurrent clients) the text is just
+    cut at 2.5 words per second of audio.
+    """
+    def __init__(self, rtf=0.15, text=""):
+        self.rtf = rtf
+        self.text = text
+        self.voiced_seconds = None
+
+    def transcribe(self, audio, **kwargs):
+        seconds = len(audio) / SAMPLE_RATE
+        time.sleep(seconds * self.rtf)
+        words = self.text.split()
+        if self.voiced_seconds:
+            heard = round(len(words) * min(1.0, seconds / self.voiced_seconds))
+        else:
+            heard = round(seconds * 2.5)
+        return iter([SimpleNamespace(text=" ".join(words[:max(1, heard)]))]), None
+
+class OfflineStore(ConversationHistoryStore):
+    """History store without a database: every method degrades to its no-pool path."""
+    async def initialize(self):
+        pass
+
+class Turn:
+    def __init__(self, path, pcm, transcript, voiced_end):
+        self.path = path
+        self.pcm = pcm
+        self.transcript = transcript
+        self.voiced_end = voiced_end # Byte offset just past the last voiced frame
+
+    @property
+    def voiced_seconds(self):
+        return self.voiced_end / 2 / SAMPLE_RATE
+
+class Mic:
+    """Sends real-time audio to the socket: queued turn audio, otherwise silence."""
+    def __init__(self, ws):
+        self.ws = ws
+        self.pending = collections.deque()
+        self.task = None
+
+    def play(self, turn):
+        loop = asyncio.get_running_loop()
+        sent_voiced_end = loop.create_future()
+        self.pending.clear()
+        for start in range(0, len(turn.pcm), CHUNK_BYTES):
+            chunk = turn.pcm[start:start + CHUNK_BYTES]
+            mark = sent_voiced_end if start < turn.voiced_end <= start + len(chunk) else None
+            self.pending.append((chunk, mark))
+        return sent_voiced_end
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        silence = bytes(CHUNK_BYTES)
+        next_at = loop.time()
+        while True:
+            chunk, mark = self.pending.popleft() if self.pending else (silence, None)
+            await self.ws.send(chunk)
+            if mark and not mark.done():
+                mark.set_result(loop.time())
+            next_at += CHUNK_SECONDS
+            await asyncio.sleep(max(0.0, next_at - loop.time()))
+
+def read_wav(path):
+    with wave.open(path, "rb") as wav:
+        if wav.getframerate() != SAMPLE_RATE or wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16 kHz mono 16-bit PCM")
+        return wav.readframes(wav.getnframes())
+
+def voiced_end(pcm, vad):
+    frame_bytes = vad.frame_size * 2
+    end = 0
+    for start in range(0, len(pcm) - frame_bytes + 1, frame_bytes):
+        if vad.is_speech(pcm[start:start + frame_bytes]):
+            end = start + frame_bytes
+    return end
+
+def load_corpus(directory):
+    vad = VAD()
+    conversations = []
+    for name in sorted(os.listdir(directory)):
+        folder = os.path.join(directory, name)
+        if not os.path.isdir(folder):
+            continue
+        turns = []
+        for wav_name in sorted(f for f in os.listdir(folder) if f.endswith(".wav")):
+            path = os.path.join(folder, wav_name)
+            pcm = read_wav(path)
+            transcript_path = path[:-4] + ".txt"
+            transcript = "hello there"
+            if os.path.exists(transcript_path):
+                with open(transcript_path, encoding="utf-8") as f:
+                    transcript = f.read().strip()
+            end = voiced_end(pcm, vad)
+            if end:
+                turns.append(Turn(path, pcm, transcript, end))
+        if turns:
+            conversations.append(turns)
+    return conversations
+
+SYNTHETIC_LINES = [
+    "I finally finished painting the spare room today.",
+    "It took way longer than I thought, like the whole weekend.",
+    "Now I just need to put the shelves back up.",
+    "Do you think blue was a good choice for a study?",
+    "My sister says it makes the room look smaller.",
+    "Anyway I am going to make some tea now.",
+]
+
+def synthesize_voice(seconds, rng):
+    """Voiced, speech-like PCM: a harmonic voice with a syllable-rate envelope, plus near-silent edges."""
+    n = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    f0 = rng.uniform(110, 190) * (1 + 0.08 * np.sin(2 * np.pi * 0.7 * n))
+    phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+    voice = sum(np.sin(k * phase) / k for k in range(1, 12))
+    voice *= 0.35 + 0.65 * np.abs(np.sin(2 * np.pi * 3.0 * n))
+    voice = voice / np.max(np.abs(voice)) * 0.4
+    lead = rng.standard_normal(int(0.3 * SAMPLE_RATE)) * 0.001
+    tail = rng.standard_normal(int(0.2 * SAMPLE_RATE)) * 0.001
+    return (np.concatenate([lead, voice, tail]) * 32767).astype(np.int16).tobytes()
+
+def synthesize_corpus(directory, conversations=3, turns=3, seed=7):
+    """Deterministic corpus of synthetic voices, 2.5 words/s of SYNTHETIC_LINES."""
+    rng = np.random.default_rng(seed)
+    line = 0
+    for c in range(conversations):
+        folder = os.path.join(directory, f"conversation_{c + 1:02d}")
+        os.makedirs(folder, exist_ok=True)
+        for t in range(turns):
+            text = SYNTHETIC_LINES[line % len(SYNTHETIC_LINES)]
+            line += 1
+            pcm = synthesize_voice(len(text.split()) / 2.5, rng)
+            path = os.path.join(folder, f"turn_{t + 1:02d}")
+            with wave.open(path + ".wav", "wb") as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(2)
+                wav.setframerate(SAMPLE_RATE)
+                wav.writeframes(pcm)
+            with open(path + ".txt", "w", encoding="utf-8") as f:
+                f.write(text)
+
+def percentiles(values, scale=1000.0, digits=1):
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+    return {
+        "count": len(ordered),
+        "p50": round(pick(0.5) * scale, digits),
+        "p90": round(pick(0.9) * scale, digits),
+        "p99": round(pick(0.99) * scale, digits),
+        "mean": round(sum(ordered) / len(ordered) * scale, digits),
+        "max": round(ordered[-1] * scale, digits),
+    }
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3 # Peak, not current
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+async def wait_for_state(http, session_id, states, timeout):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        status = (await http.get("/status", params={"session_id": session_id})).json()
+        if status["state"] in states:
+            return True
+        await asyncio.sleep(0.05)
+    return False
+
+async def replay_conversation(base_url, turns, fake_model, results):
+    loop = asyncio.get_running_loop()
+    async with httpx.AsyncClient(base_url=base_url) as http, \
+            websockets.connect(base_url.replace("http", "ws") + "/ws/audio", max_size=None) as ws:
+        session_id = json.loads(await ws.recv())["session_id"]
+        audio = asyncio.Queue()
+
+        async def receive():
+            async for message in ws:
+                if isinstance(message, bytes):
+                    audio.put_nowait(loop.time())
+
+        receiver = asyncio.create_task(receive())
+        mic = Mic(ws)
+        mic.task = asyncio.create_task(mic.run())
+        try:
+            await http.post("/start-session", params={"session_id": session_id})
+            # A prefetched greeting can play out between two /status polls: wait for its audio instead
+            try:
+                await asyncio.wait_for(audio.get(), 15)
+            except asyncio.TimeoutError:
+                raise RuntimeError("Greeting never started")
+            if not await wait_for_state(http, session_id, ("listening",), 30):
+                raise RuntimeError("Greeting never finished")
+
+            for turn in turns:
+                if fake_model:
+                    fake_model.text = turn.transcript
+                    fake_model.voiced_seconds = turn.voiced_seconds
+                while not audio.empty():
+                    audio.get_nowait() # Greeting / previous reply
+                sent_at = await mic.play(turn)
+                try:
+                    while True:
+                        received_at = await asyncio.wait_for(audio.get(), 30)
+                        if received_at >= sent_at:
+                            break
+                except asyncio.TimeoutError:
+                    results["failed_turns"].append(turn.path)
+                    continue
+                results["client_end_to_end"].append(received_at - sent_at)
+                await wait_for_state(http, session_id, ("listening",), 60)
+        finally:
+            mic.task.cancel()
+            receiver.cancel()
+            await asyncio.gather(mic.task, receiver, return_exceptions=True)
+
+def install_standins(args):
+    """Offline Gemini/ElevenLabs (and Whisper with --fake-stt) on main.services. Returns the fake model or None."""
+    Config.THINKING_DELAY_SCALE = args.thinking_delay
+    services = main.services
+    llm_timing = providers.Timing(args.llm_first_token, args.llm_per_token, args.jitter, args.llm_error_rate, seed=args.seed)
+    tts_timing = providers.Timing(args.tts_first_byte, None, args.jitter, seed=args.seed)
+    if args.cassettes:
+        services.llm.client = providers.CassetteGemini(args.cassettes, llm_timing)
+        services.tts.client = providers.CassetteElevenLabs(args.cassettes, tts_timing)
+    else:
+        services.llm.client = providers.SyntheticGemini(llm_timing)
+        services.tts.client = providers.SyntheticElevenLabs(tts_timing)
+    if not Config.DATABASE_URL:
+        services.db = OfflineStore()
+    fake_model = None
+    if args.fake_stt:
+        fake_model = ReplayWhisperModel(args.stt_rtf)
+        services.stt.model = fake_model # load_model() sees it and returns
+    return fake_model
+
+async def start_server():
+    """Serve main.app on a free local port. Returns (server, task, base_url) once Whisper is ready."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    while main.services.stt.model is None:
+        if not main.services.stt.is_loading:
+            raise SystemExit("Whisper model failed to load (use --fake-stt without the model).")
+        await asyncio.sleep(0.2)
+    return server, server_task, f"http://127.0.0.1:{port}"
+
+def add_standin_arguments(parser):
+    parser.add_argument("--fake-stt", action="store_true", help="Deterministic Whisper stand-in (transcripts from .txt)")
+    parser.add_argument("--stt-rtf", type=float, default=0.15, help="Decode cost of the Whisper stand-in")
+    parser.add_argument("--cassettes", help="Replay Gemini/ElevenLabs recordings (LLM_PROVIDER=record) from DIR")
+    parser.add_argument("--llm-first-token", type=float, default=0.35, help="Gemini stand-in, seconds")
+    parser.add_argument("--llm-per-token", type=float, default=0.015, help="Gemini stand-in, seconds")
+    parser.add_argument("--tts-first-byte", type=float, default=0.25, help="ElevenLabs stand-in, seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="± fraction applied to every stand-in delay")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Share of LLM requests that fail (tier fallback)")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for jitter and error injection")
+    parser.add_argument("--thinking-delay", type=float, default=0.0, help="THINKING_DELAY_SCALE (0 = off)")
+
+async def run(args, conversations):
+    fake_model = install_standins(args)
+    observations = collections.defaultdict(list)
+    metrics.REGISTRY.listen(lambda name, value: observations[name].append(value))
+    server, server_task, base_url = await start_server()
+
+    results = {"client_end_to_end": [], "failed_turns": []}
+    rss_samples = [rss_mb()]
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    started = time.perf_counter()
+
+    async def sample_rss():
+        while True:
+            await asyncio.sleep(0.5)
+            rss_samples.append(rss_mb())
+
+    sampler = asyncio.create_task(sample_rss())
+    for i, turns in enumerate(conversations):
+        print(f"conversation {i + 1}/{len(conversations)}: {len(turns)} turns", file=sys.stderr)
+        await replay_conversation(base_url, turns, fake_model, results)
+
+    wall = time.perf_counter() - started
+    usage_after = resource.getrusage(resource.RUSAGE_SELF)
+    sampler.cancel()
+    server.should_exit = True
+    await server_task
+
+    cpu_user = usage_after.ru_utime - usage_before.ru_utime
+    cpu_system = usage_after.ru_stime - usage_before.ru_stime
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "settings": {
+            "fake_stt": args.fake_stt,
+            "stt_rtf": args.stt_rtf if args.fake_stt else None,
+            "providers": "cassette" if args.cassettes else "synthetic",
+            "llm_first_token_ms": args.llm_first_token * 1000 if args.llm_first_token is not None else None,
+            "tts_first_byte_ms": args.tts_first_byte * 1000 if args.tts_first_byte is not None else None,
+            "jitter": args.jitter,
+            "llm_error_rate": args.llm_error_rate,
+            "thinking_delay": args.thinking_delay,
+            "database": bool(Config.DATABASE_URL),
+        },
+        "corpus": {
+            "path": args.corpus,
+            "conversations": len(conversations),
+            "turns": sum(len(turns) for turns in conversations),
+            "audio_seconds": round(sum(len(t.pcm) for turns in conversations for t in turns) / 2 / SAMPLE_RATE, 1),
+        },
+        "failed_turns": results["failed_turns"],
+        "latency_ms": dict(
+            {key: percentiles(observations[name]) for name, key in STAGES.items()},
+            client_end_to_end=percentiles(results["client_end_to_end"])
+        ),
+        "whisper_rtf": percentiles(observations["ai_friend_stt_real_time_factor"], scale=1.0, digits=3),
+        "cpu": {
+            "user_seconds": round(cpu_user, 2),
+            "system_seconds": round(cpu_system, 2),
+            "utilization": round((cpu_user + cpu_system) / wall, 3), # 1.0 = one core busy
+            "wall_seconds": round(wall, 1),
+        },
+        "rss_mb": {
+            "start": round(rss_samples[0], 1),
+            "peak": round(max(rss_samples), 1),
+            "end": round(rss_samples[-1], 1),
+        },
+    }
+
+def print_report(report, baseline=None):
+    print(f"\ncommit {report['commit']}: {report['corpus']['turns']} turns, "
+          f"{len(report['failed_turns'])} failed, {report['corpus']['audio_seconds']}s of audio")
+    header = f"  {'stage (ms)':<20} {'n':>4} {'p50':>8} {'p90':>8} {'p99':>8}"
+    if baseline:
+        header += f" {'base p50':>9} {'delta':>7}"
+    print(header)
+    rows = list(report["latency_ms"].items()) + [("whisper_rtf", report["whisper_rtf"])]
+    for key, stats in rows:
+        if not stats.get("count"):
+            print(f"  {key:<20} {0:>4}")
+            continue
+        line = f"  {key:<20} {stats['count']:>4} {stats['p50']:>8} {stats['p90']:>8} {stats['p99']:>8}"
+        if baseline:
+            old = baseline["whisper_rtf"] if key == "whisper_rtf" else baseline["latency_ms"].get(key, {})
+            if old.get("count"):
+                change = (stats["p50"] - old["p50"]) / old["p50"] * 100 if old["p50"] else 0.0
+                line += f" {old['p50']:>9} {change:>+6.0f}%"
+        print(line)
+    cpu, rss = report["cpu"], report["rss_mb"]
+    print(f"  cpu {cpu['user_seconds'] + cpu['system_seconds']:.1f}s ({cpu['utilization'] * 100:.0f}% of a core), "
+          f"rss {rss['start']} -> peak {rss['peak']} MB")
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--corpus", help="Directory of conversations (default: generate a synthetic one)")
+    add_standin_arguments(parser)
+    parser.add_argument("--out", help="JSON report path (default: benchmarks/results/replay_<commit>.json)")
+    parser.add_argument("--compare", help="Earlier JSON report to diff against")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        if not args.corpus:
+            synthesize_corpus(scratch)
+        conversations = load_corpus(args.corpus or scratch)
+        if not conversations:
+            raise SystemExit("No voiced WAV turns found in the corpus.")
+        report = asyncio.run(run(args, conversations))
+
+    out = args.out or os.path.join(RESULTS_DIR, f"replay_{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    print(f"\nSaved {out}")
+
+if __name__ == "__main__":
+    main_cli()
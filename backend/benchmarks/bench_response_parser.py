@@ -0,0 +1,81 @@
+"""
+Microbenchmark: incremental ResponseStreamParser vs. the old per-token rescanning loop.
+
+Usage (from backend/):
+    python benchmarks/bench_response_parser.py
+"""
+import os
+import random
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.response_parser import ResponseStreamParser
+
+WORDS = ["seriously", "no", "way", "I", "can't", "even", "[laughs]", "you", "know", "what", "that", "means", "okay"]
+
+def make_response(n_chars, seed=7):
+    rng = random.Random(seed)
+    parts = ["<emotion_thought>They sound happy, match their energy.</emotion_thought>"]
+    size = 0
+    while size < n_chars:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 18))) + rng.choice([". ", "? ", "! "])
+        parts.append(sentence)
+        size += len(sentence)
+    return "".join(parts)
+
+def tokenize(text, size=4):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+def legacy_segments(tokens):
+    """The original AIBackend.process_user_input token loop (TTS calls replaced by a list)."""
+    out = []
+    full_response = ""
+    sentence_buffer = ""
+    sentence_end_chars = [".", "?", "!", "\n"]
+    in_reasoning = False
+    for token in tokens:
+        full_response += token
+        if "<emotion_thought>" in full_response and not in_reasoning:
+            in_reasoning = True
+            continue
+        if "</emotion_thought>" in full_response and in_reasoning:
+            in_reasoning = False
+            full_response = full_response.split("</emotion_thought>")[-1]
+            sentence_buffer = full_response
+            continue
+        if in_reasoning:
+            continue
+        sentence_buffer += token
+        if any(char in sentence_buffer for char in sentence_end_chars) and len(sentence_buffer.strip()) > 30:
+            out.append(sentence_buffer.strip())
+            sentence_buffer = ""
+    if sentence_buffer.strip():
+        out.append(sentence_buffer.strip())
+    return out
+
+def parser_segments(tokens):
+    parser = ResponseStreamParser()
+    out = []
+    for token in tokens:
+        out.extend(parser.feed(token))
+    out.extend(parser.flush())
+    return out
+
+def bench(fn, tokens, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(tokens)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == "__main__":
+    print(f"{'chars':>8} {'tokens':>7} {'legacy ms':>10} {'parser ms':>10} {'speedup':>8}")
+    for n_chars in (1_000, 10_000, 50_000, 200_000):
+        tokens = tokenize(make_response(n_chars))
+        legacy = bench(legacy_segments, tokens)
+        parser = bench(parser_segments, tokens)
+        print(f"{n_chars:>8} {len(tokens):>7} {legacy * 1000:>10.2f} {parser * 1000:>10.2f} {legacy / parser:>7.1f}x")
@@ -0,0 +1,128 @@
+"""
+Benchmark: recent-session gist loading as the messages table grows.
+Compares the old N+1 loader (one query per session, full content) with the
+single LATERAL query used by ConversationHistoryStore.get_recent_sessions_gist.
+
+Runs against DATABASE_URL inside a throwaway schema (dropped afterwards),
+so the real sessions/messages tables are never touched.
+
+Usage (from backend/):
+    python benchmarks/bench_session_gist.py [--sizes 10000,1000000,5000000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import asyncpg
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import Config
+from app.conversation_history_store import RECENT_SESSION_GISTS, GIST_SNIPPET_CHARS
+
+SCHEMA = "bench_session_gist"
+MESSAGES_PER_SESSION = 200
+LIMIT = 3
+
+SETUP = """
+    CREATE TABLE sessions (id uuid PRIMARY KEY, started_at timestamp NOT NULL, ended_at timestamp);
+    CREATE TABLE messages (
+        id uuid PRIMARY KEY, session_id uuid NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+        timestamp timestamp NOT NULL, role text NOT NULL, content text NOT NULL
+    );
+    CREATE INDEX ON sessions (started_at);
+    CREATE INDEX ON messages (session_id, timestamp);
+"""
+
+async def seed(conn, total_messages):
+    """Grow the tables to total_messages rows (keeps what is already there)."""
+    have = await conn.fetchval("SELECT count(*) FROM messages")
+    if have >= total_messages:
+        return
+    n_sessions = (total_messages - have) // MESSAGES_PER_SESSION
+    await conn.execute(
+        """
+        INSERT INTO sessions (id, started_at, ended_at)
+        SELECT gen_random_uuid(), now() - (g || ' minutes')::interval, now() - (g || ' minutes')::interval
+        FROM generate_series(1, $1) g
+        """,
+        n_sessions
+    )
+    await conn.execute(
+        """
+        INSERT INTO messages (id, session_id, timestamp, role, content)
+        SELECT gen_random_uuid(), s.id, s.started_at + (m || ' seconds')::interval,
+               CASE WHEN m % 2 = 0 THEN 'user' ELSE 'assistant' END,
+               repeat('blah ', 40 + m % 200)
+        FROM (SELECT id, started_at FROM sessions s WHERE NOT EXISTS (SELECT 1 FROM messages WHERE session_id = s.id)) s
+        CROSS JOIN generate_series(1, $1) m
+        """,
+        MESSAGES_PER_SESSION
+    )
+    await conn.execute("ANALYZE sessions; ANALYZE messages;")
+
+async def legacy_gist(conn, exclude_id):
+    """The original loader: one query for sessions, then one per session, sliced client-side."""
+    exclude_clause = f"WHERE id != '{exclude_id}'" if exclude_id else ""
+    sessions = await conn.fetch(
+        f"SELECT id, started_at FROM sessions {exclude_clause} ORDER BY started_at DESC LIMIT $1",
+        LIMIT
+    )
+    gists = []
+    for sess in sessions:
+        messages = await conn.fetch(
+            """
+            (SELECT role, content, timestamp FROM messages WHERE session_id = $1 ORDER BY timestamp ASC LIMIT 1)
+            UNION ALL
+            (SELECT role, content, timestamp FROM messages WHERE session_id = $1 ORDER BY timestamp DESC LIMIT 1)
+            ORDER BY timestamp ASC
+            """,
+            sess["id"]
+        )
+        gists.append([m["content"][:GIST_SNIPPET_CHARS] for m in messages])
+    return gists
+
+async def lateral_gist(conn, exclude_id):
+    return await conn.fetch(RECENT_SESSION_GISTS, LIMIT, exclude_id, GIST_SNIPPET_CHARS)
+
+async def bench(fn, conn, exclude_id, repeat=20):
+    await fn(conn, exclude_id) # Warm the buffer cache
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn(conn, exclude_id)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.95)]
+
+async def main(sizes):
+    if not Config.DATABASE_URL:
+        sys.exit("DATABASE_URL is not set.")
+    conn = await asyncpg.connect(Config.DATABASE_URL, statement_cache_size=0)
+    try:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA}")
+        await conn.execute(f"SET search_path TO {SCHEMA}")
+        await conn.execute(SETUP)
+
+        print(f"{'messages':>10} {'legacy p50':>11} {'legacy p95':>11} {'lateral p50':>12} {'lateral p95':>12}")
+        for size in sizes:
+            await seed(conn, size)
+            exclude_id = await conn.fetchval("SELECT id FROM sessions ORDER BY started_at DESC LIMIT 1")
+            legacy = await bench(legacy_gist, conn, exclude_id)
+            lateral = await bench(lateral_gist, conn, exclude_id)
+            print(
+                f"{size:>10} {legacy[0] * 1000:>9.2f}ms {legacy[1] * 1000:>9.2f}ms "
+                f"{lateral[0] * 1000:>10.2f}ms {lateral[1] * 1000:>10.2f}ms"
+            )
+    finally:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000,5000000")
+    args = parser.parse_args()
+    asyncio.run(main([int(s) for s in args.sizes.split(",")]))
@@ -0,0 +1,373 @@
+"""
+Load test: many concurrent clients on /ws/audio, ramped up until the service stops meeting its SLO.
+
+Every client behaves like the frontend with an open microphone: it connects to /ws/audio,
+starts its session with POST /start-session, waits out the greeting, then loops
+    speak (--speak seconds of voiced audio) -> silence until the reply has played -> pause (--pause)
+streaming 1024-byte PCM chunks in real time the whole time (silence between utterances).
+Reply audio is played on a simulated 24 kHz 16-bit clock, so late chunks show up as underruns
+(audible gaps), exactly as a listener would hear them.
+
+By default the app is served in this process with the offline stand-ins from bench_replay.py
+(app/providers.py for Gemini/ElevenLabs, --fake-stt for Whisper); --url points it at a running
+server instead. --corpus DIR speaks real WAV turns (see bench_replay.py) instead of synthetic voice.
+
+Per level (number of concurrent clients, --levels, each held --hold seconds):
+  - speech-to-speech latency (last voiced chunk sent -> first reply audio received), p50/p95/p99
+  - missed replies (no audio within --reply-timeout), playback underruns and their total gap
+  - disconnects and rejections (close code 1013, session limit)
+  - in-process: CPU utilization, RSS and the worst event loop lag
+A level passes when p95 <= --slo-p95, missed <= --slo-missed, underruns per reply <= --slo-underruns
+and no client was dropped. The ramp stops at the first failing level; the knee is the last level that
+passed. "degrades_at" is the first level whose p95 exceeds 1.25x the first level's.
+
+Usage (from backend/):
+    python benchmarks/load_ws.py --fake-stt                          # in-process, 1..32 clients
+    python benchmarks/load_ws.py --fake-stt --levels 1,4,8 --hold 30
+    python benchmarks/load_ws.py --url http://localhost:8000 --levels 1,2,4
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import bench_replay # Sets up the path, stand-in credentials and log level before importing main
+from bench_replay import SAMPLE_RATE, Mic, Turn, percentiles
+
+import httpx
+import websockets
+
+import main
+from app import metrics
+
+logging.getLogger("app.wake_word").setLevel(logging.CRITICAL) # The stand-in key can't start Porcupine, once per session
+
+PLAYBACK_BYTES_PER_SECOND = 24000 * 2 # TTS output: pcm_24000, 16-bit mono
+REPLY_QUIET = 1.5 # Seconds without reply audio (after playback drains) that end a reply
+
+class ClientStats:
+    def __init__(self):
+        self.latencies = []
+        self.replies = 0
+        self.missed = 0
+        self.underruns = 0
+        self.underrun_seconds = 0.0
+        self.disconnected = False
+        self.rejected = False
+        self.error = None
+
+class Speaker:
+    """What a client says: synthetic voice (--speak seconds) or the WAV turns of a corpus."""
+    def __init__(self, args, conversations, seed):
+        self.rng = random.Random(seed)
+        self.voice_rng = np.random.default_rng(seed)
+        self.args = args
+        self.turns = [turn for turns in conversations for turn in turns] if conversations else None
+        self.index = self.rng.randrange(len(self.turns)) if self.turns else 0
+
+    def next_turn(self):
+        if self.turns:
+            self.index = (self.index + 1) % len(self.turns)
+            return self.turns[self.index]
+        seconds = self.rng.uniform(*self.args.speak)
+        pcm = bench_replay.synthesize_voice(seconds, self.voice_rng)
+        lead = int(0.3 * SAMPLE_RATE) * 2 # synthesize_voice pads the voice with 0.3 s of near-silence
+        return Turn("synthetic", pcm, "", lead + int(seconds * SAMPLE_RATE) * 2)
+
+class Playback:
+    """Plays received reply audio on a real-time clock and notices when it runs dry mid-reply."""
+    def __init__(self):
+        self.arrivals = asyncio.Queue()
+        self.playing_until = 0.0
+
+    def receive(self, at, size):
+        self.arrivals.put_nowait((at, size))
+
+    def clear(self):
+        while not self.arrivals.empty():
+            self.arrivals.get_nowait()
+
+    async def next_chunk(self, timeout):
+        try:
+            return await asyncio.wait_for(self.arrivals.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def play_reply(self, first, stats):
+        """Play from the first chunk until the reply goes quiet. Counts underruns into stats."""
+        at, size = first
+        self.playing_until = at + size / PLAYBACK_BYTES_PER_SECOND
+        while True:
+            loop_now = asyncio.get_running_loop().time()
+            chunk = await self.next_chunk(max(0.0, self.playing_until - loop_now) + REPLY_QUIET)
+            if chunk is None:
+                return
+            at, size = chunk
+            if at > self.playing_until:
+                stats.underruns += 1
+                stats.underrun_seconds += at - self.playing_until
+            self.playing_until = max(self.playing_until, at) + size / PLAYBACK_BYTES_PER_SECOND
+
+async def run_client(base_url, args, speaker, deadline, stats):
+    loop = asyncio.get_running_loop()
+    ws_url = base_url.replace("http", "ws", 1) + "/ws/audio"
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=30) as http, \
+                websockets.connect(ws_url, max_size=None) as ws:
+            try:
+                session_id = json.loads(await ws.recv())["session_id"]
+            except websockets.ConnectionClosed as e:
+                stats.rejected = e.rcvd is not None and e.rcvd.code == 1013
+                stats.disconnected = not stats.rejected
+                return
+
+            playback = Playback()
+            closing = False
+
+            async def receive():
+                try:
+                    async for message in ws:
+                        if isinstance(message, bytes):
+                            playback.receive(loop.time(), len(message))
+                except websockets.ConnectionClosed:
+                    pass
+                stats.disconnected = not closing # Closed by the server, not by us
+
+            receiver = asyncio.create_task(receive())
+            mic = Mic(ws)
+            mic.task = asyncio.create_task(mic.run())
+            try:
+                await http.post("/start-session", params={"session_id": session_id})
+                greeting = await playback.next_chunk(args.reply_timeout)
+                if greeting is None:
+                    stats.missed += 1
+                    return
+                await playback.play_reply(greeting, ClientStats()) # Greeting gaps aren't part of the SLO
+
+                while loop.time() < deadline and not stats.disconnected:
+                    turn = speaker.next_turn()
+                    playback.clear()
+                    sent_at = await mic.play(turn)
+                    while True:
+                        first = await playback.next_chunk(args.reply_timeout)
+                        if first is None or first[0] >= sent_at:
+                            break
+                    if first is None:
+                        stats.missed += 1
+                        continue
+                    stats.latencies.append(first[0] - sent_at)
+                    stats.replies += 1
+                    await playback.play_reply(first, stats)
+                    await asyncio.sleep(speaker.rng.uniform(*args.pause))
+            finally:
+                closing = True
+                mic.task.cancel()
+                await asyncio.gather(mic.task, return_exceptions=True)
+                await ws.close()
+                await asyncio.gather(receiver, return_exceptions=True)
+    except websockets.ConnectionClosed:
+        stats.disconnected = True
+    except (OSError, httpx.HTTPError, websockets.WebSocketException) as e:
+        stats.disconnected = True
+        stats.error = repr(e)
+
+async def wait_until_drained(timeout=30.0):
+    """In-process: let the previous level's sessions finish closing before the next one starts."""
+    deadline = time.perf_counter() + timeout
+    while len(main.sessions) > 1 and time.perf_counter() < deadline: # The local session stays open
+        await asyncio.sleep(0.1)
+
+async def run_level(base_url, args, conversations, clients, in_process):
+    loop = asyncio.get_running_loop()
+    lags = []
+    listener = lambda name, value: lags.append(value) if name == "ai_friend_event_loop_lag_seconds" else None
+    if in_process:
+        await wait_until_drained()
+        metrics.REGISTRY.listen(listener)
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    started = time.perf_counter()
+    rss_peak = bench_replay.rss_mb()
+
+    deadline = loop.time() + args.hold
+    all_stats = [ClientStats() for _ in range(clients)]
+    tasks = []
+    for i, stats in enumerate(all_stats):
+        speaker = Speaker(args, conversations, seed=args.seed * 1000 + i)
+        tasks.append(asyncio.create_task(run_client(base_url, args, speaker, deadline, stats)))
+        await asyncio.sleep(args.stagger / max(1, clients)) # Don't start every greeting at once
+    while not all(task.done() for task in tasks):
+        rss_peak = max(rss_peak, bench_replay.rss_mb())
+        await asyncio.wait(tasks, timeout=0.5)
+
+    wall = time.perf_counter() - started
+    usage_after = resource.getrusage(resource.RUSAGE_SELF)
+    if in_process:
+        metrics.REGISTRY.unlisten(listener)
+
+    latencies = [value for stats in all_stats for value in stats.latencies]
+    replies = sum(stats.replies for stats in all_stats)
+    missed = sum(stats.missed for stats in all_stats)
+    attempts = replies + missed
+    level = {
+        "clients": clients,
+        "replies": replies,
+        "speech_to_speech_ms": percentiles(latencies),
+        "p95_ms": round(np.percentile(latencies, 95) * 1000, 1) if latencies else None,
+        "missed": missed,
+        "missed_rate": round(missed / attempts, 3) if attempts else 0.0,
+        "underruns": sum(stats.underruns for stats in all_stats),
+        "underruns_per_reply": round(sum(stats.underruns for stats in all_stats) / replies, 3) if replies else 0.0,
+        "underrun_seconds": round(sum(stats.underrun_seconds for stats in all_stats), 2),
+        "disconnects": sum(stats.disconnected for stats in all_stats),
+        "rejected": sum(stats.rejected for stats in all_stats),
+        "errors": sorted({stats.error for stats in all_stats if stats.error}),
+    }
+    if in_process:
+        cpu = (usage_after.ru_utime - usage_before.ru_utime) + (usage_after.ru_stime - usage_before.ru_stime)
+        level["cpu_utilization"] = round(cpu / wall, 3) # 1.0 = one core busy
+        level["rss_peak_mb"] = round(rss_peak, 1)
+        level["max_loop_lag_ms"] = round(max(lags) * 1000, 1) if lags else None
+    level["breaches"] = slo_breaches(level, args)
+    return level
+
+def slo_breaches(level, args):
+    breaches = []
+    if level["p95_ms"] is None:
+        breaches.append("no replies")
+    elif level["p95_ms"] > args.slo_p95 * 1000:
+        breaches.append(f"p95 {level['p95_ms']:.0f} ms > {args.slo_p95 * 1000:.0f} ms")
+    if level["missed_rate"] > args.slo_missed:
+        breaches.append(f"missed {level['missed_rate']:.1%} > {args.slo_missed:.1%}")
+    if level["underruns_per_reply"] > args.slo_underruns:
+        breaches.append(f"underruns/reply {level['underruns_per_reply']} > {args.slo_underruns}")
+    if level["disconnects"] or level["rejected"]:
+        breaches.append(f"{level['disconnects']} disconnected, {level['rejected']} rejected")
+    return breaches
+
+def summarize(levels):
+    knee = None
+    for level in levels:
+        if level["breaches"]:
+            break
+        knee = level["clients"]
+    base = levels[0]["p95_ms"] if levels else None
+    degrades_at = next(
+        (level["clients"] for level in levels[1:] if base and level["p95_ms"] and level["p95_ms"] > base * 1.25),
+        None
+    )
+    breached = next((level for level in levels if level["breaches"]), None)
+    return {
+        "knee": knee,
+        "degrades_at": degrades_at,
+        "breached_at": breached["clients"] if breached else None,
+        "breached_by": breached["breaches"] if breached else [],
+    }
+
+async def run(args, conversations):
+    in_process = not args.url
+    server = None
+    if in_process:
+        fake_model = bench_replay.install_standins(args)
+        if fake_model:
+            fake_model.text = " ".join(bench_replay.SYNTHETIC_LINES * 4) # Cut to what each utterance "said"
+        main.sessions.max_sessions = args.max_sessions
+        server, server_task, base_url = await bench_replay.start_server()
+    else:
+        base_url = args.url.rstrip("/")
+
+    levels = []
+    try:
+        for clients in args.levels:
+            print(f"{clients} clients for {args.hold:.0f}s ...", file=sys.stderr)
+            level = await run_level(base_url, args, conversations, clients, in_process)
+            levels.append(level)
+            print_level(level)
+            if level["breaches"] and not args.keep_going:
+                break
+    finally:
+        if server:
+            server.should_exit = True
+            await server_task
+
+    return {
+        "commit": bench_replay.git_commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "target": args.url or "in-process",
+        "settings": {
+            "hold_seconds": args.hold,
+            "speak_seconds": None if conversations else list(args.speak),
+            "pause_seconds": list(args.pause),
+            "corpus": args.corpus,
+            "fake_stt": args.fake_stt if in_process else None,
+            "providers": ("cassette" if args.cassettes else "synthetic") if in_process else None,
+            "max_sessions": args.max_sessions if in_process else None,
+        },
+        "slo": {"p95_ms": args.slo_p95 * 1000, "missed_rate": args.slo_missed, "underruns_per_reply": args.slo_underruns},
+        "levels": levels,
+        "summary": summarize(levels),
+    }
+
+def print_level(level):
+    stats = level["speech_to_speech_ms"]
+    line = (f"  {level['clients']:>4} clients  {level['replies']:>4} replies  "
+            f"p50 {stats.get('p50', '-'):>7}  p95 {level['p95_ms'] or '-':>7} ms  "
+            f"missed {level['missed']:>3}  underruns {level['underruns']:>3}  "
+            f"dropped {level['disconnects'] + level['rejected']:>2}")
+    if "cpu_utilization" in level:
+        line += f"  cpu {level['cpu_utilization'] * 100:>4.0f}%  lag {level['max_loop_lag_ms'] or 0:>6} ms"
+    print(line + ("  FAIL: " + "; ".join(level["breaches"]) if level["breaches"] else "  ok"), flush=True)
+
+def seconds_range(text):
+    low, _, high = text.partition("-")
+    return float(low), float(high or low)
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="Load a running server (default: serve the app in this process)")
+    parser.add_argument("--levels", default="1,2,4,8,16,24,32", help="Concurrent clients per step")
+    parser.add_argument("--hold", type=float, default=60.0, help="Seconds each level runs (turns in flight finish)")
+    parser.add_argument("--stagger", type=float, default=2.0, help="Seconds over which a level's clients connect")
+    parser.add_argument("--speak", type=seconds_range, default=(1.5, 4.0), help="Utterance length, MIN-MAX seconds")
+    parser.add_argument("--pause", type=seconds_range, default=(0.5, 2.0), help="Silence after a reply, MIN-MAX seconds")
+    parser.add_argument("--corpus", help="Speak the WAV turns of this corpus instead of synthetic voice")
+    parser.add_argument("--reply-timeout", type=float, default=15.0, help="Seconds to wait for reply audio")
+    parser.add_argument("--max-sessions", type=int, default=64, help="In-process MAX_SESSIONS (WebSocket clients)")
+    parser.add_argument("--slo-p95", type=float, default=3.0, help="Speech-to-speech p95 limit, seconds")
+    parser.add_argument("--slo-missed", type=float, default=0.05, help="Share of turns allowed without a reply")
+    parser.add_argument("--slo-underruns", type=float, default=0.5, help="Playback underruns allowed per reply")
+    parser.add_argument("--keep-going", action="store_true", help="Run every level even after the SLO breaks")
+    bench_replay.add_standin_arguments(parser)
+    parser.add_argument("--out", help="JSON report path (default: benchmarks/results/load_<commit>.json)")
+    args = parser.parse_args()
+    args.levels = [int(n) for n in args.levels.split(",")]
+
+    conversations = None
+    if args.corpus:
+        conversations = bench_replay.load_corpus(args.corpus)
+        if not conversations:
+            raise SystemExit("No voiced WAV turns found in the corpus.")
+    report = asyncio.run(run(args, conversations))
+
+    summary = report["summary"]
+    print(f"\nknee: {summary['knee'] or 'none'} clients"
+          + (f", SLO broken at {summary['breached_at']} ({'; '.join(summary['breached_by'])})" if summary["breached_at"] else ", SLO held at every level")
+          + (f", p95 degrades from {summary['degrades_at']} clients" if summary["degrades_at"] else ""))
+
+    out = args.out or os.path.join(bench_replay.RESULTS_DIR, f"load_{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved {out}")
+
+if __name__ == "__main__":
+    main_cli()
@@ -1,53 +1,57 @@
 import asyncio
+import contextlib
 from typing import Optional
 import logging
-import time
 import sys
 import random
 import uvicorn
-from fastapi import FastAPI, BackgroundTasks
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.config import Config
 from app.audio import AudioStream, AudioPlayer
-from app.wake_word import WakeWordDetector
+from app.wake_word import WakeWordDetector, WakeWordPool
 from app.vad import VAD
+from app.frame_pipeline import FramePipeline
 from app.whisper_stt_service import WhisperSTTService
 from app.llm import LLMService
 from app.tts import TTSService
 from app.state_manager import StateManager, AppState
 from app.conversation_history_store import ConversationHistoryStore
+from app.session_registry import SessionRegistry
+from app.response_parser import ResponseStreamParser
+from app.tts_pipeline import TTSPipeline
+from app.speculation import Speculator
+from app.greeting_cache import GreetingCache
+from app import metrics
+from app.loop_monitor import LoopMonitor
 from fastapi import WebSocket, WebSocketDisconnect
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-class AIBackend:
+class SharedServices:
+    """Heavy, process-wide resources reused by every conversation (Whisper model, API clients, DB pool)."""
     def __init__(self):
-        self.state_manager = StateManager()
-        self.audio_stream = AudioStream()
-        self.audio_player = AudioPlayer()
-        self.wake_word = WakeWordDetector()
-        self.vad = VAD()
-        
         # Defer heavy loading
         self.stt = WhisperSTTService()
         self.llm = LLMService()
         self.tts = TTSService()
         self.db = ConversationHistoryStore()
-        
-        self.last_speech_time = time.time()
-        self.silence_timeout = 30.0
-        self.running = True
-        self.active_websocket: Optional[WebSocket] = None
+        self.wake_words = WakeWordPool(WakeWordDetector) # One Porcupine engine per live session, reused across sessions
+        self.greetings = GreetingCache(self.llm, self.tts) # Ready-to-play wake greetings
+        self.loop_monitor = LoopMonitor() # Flags callbacks that block the event loop
         self.is_ready = False
-        self.active_response_task: Optional[asyncio.Task] = None
 
     async def initialize(self):
         """Asynchronous initialization of services."""
+        if self.is_ready:
+            return
         logger.info("Initializing AI Backend services...")
+        if Config.LOOP_MONITOR:
+            self.loop_monitor.start()
         try:
             Config.validate()
         except ValueError as e:
@@ -59,11 +63,68 @@ class AIBackend:
             await self.llm.reload_context(self.db)
             # Start model loading in the background so the server is "up" quickly
             asyncio.create_task(self.stt.load_model())
+            # Needs the personality loaded above
+            self.greetings.start()
+            asyncio.create_task(self.tts.warm_up(Config.TTS_CACHE_WARMUP))
             self.is_ready = True
             logger.info("AI Backend services initialized (STT loading in background).")
         except Exception as e:
             logger.error(f"Failed to initialize AI Backend: {e}")
 
+    async def close(self):
+        self.loop_monitor.stop()
+        self.greetings.stop()
+        self.wake_words.close()
+        await self.db.close()
+        self.stt.close()
+        self.tts.close()
+        # LOOP_LAG_FAIL (test runs): fail shutdown if anything blocked the loop for too long
+        self.loop_monitor.check()
+
+class AIBackend:
+    """One conversation pipeline: state machine, audio buffers, short-term memory and DB session."""
+    def __init__(self, services: Optional[SharedServices] = None, websocket: Optional[WebSocket] = None):
+        self.services = services or SharedServices()
+        self.state_manager = StateManager()
+        self.state_manager.add_observer(self._apply_ingress_policy)
+        # Only the local (non-WebSocket) session may open the microphone or the speakers
+        self.audio_stream = AudioStream(capture_local=websocket is None)
+        self.audio_player = AudioPlayer() if websocket is None else None
+        self.wake_word = self.services.wake_words.acquire()
+        self.vad = VAD()
+        # VAD + level metering run once per frame here; wake word, STT and activity tracking share the result
+        self.frames = FramePipeline(self.vad)
+        self.frames.subscribe(self._track_speech)
+        # Session timing follows the audio stream (see AudioClock), like STT endpointing
+        self.clock = self.frames.clock
+        
+        # Per-session views over the shared services
+        self.stt = self.services.stt.for_session()
+        self.llm = self.services.llm.for_session()
+        self.tts = self.services.tts
+        self.db = self.services.db.for_session()
+        self.speculator = Speculator(self.llm) # Starts replies on stable partial transcripts
+        
+        self.last_speech_time = self.clock.now()
+        self.voice_ended_at = None # metrics.clock() of the last voiced frame, for speech-to-speech latency
+        self.silence_timeout = 30.0
+        self.running = True
+        self.active_websocket: Optional[WebSocket] = websocket
+        self.active_response_task: Optional[asyncio.Task] = None
+        self.transcription_tasks = set()
+
+    @property
+    def is_ready(self):
+        return self.services.is_ready
+
+    @property
+    def has_client(self):
+        """Someone can talk to this session: a WebSocket client or an open local microphone."""
+        return self.active_websocket is not None or self.audio_stream.stream is not None
+
+    async def initialize(self):
+        await self.services.initialize()
+
     async def run(self):
         logger.info("Starting AI Friend Backend Loop...")
         
@@ -73,57 +134,13 @@ class AIBackend:
         
         try:
             while self.running:
-                # 1. Read Audio (Now Async)
-                frame = await self.audio_stream.get_frame()
-                if not frame:
-                    continue # asyncio.Queue.get() will block anyway, so no need for sleep here
-
-                current_state = self.state_manager.state
-
-                # 2. Global STT & Interruption logic (whenever awake)
-                if current_state != AppState.IDLE:
-                    result = self.stt.process_frame(frame)
-                    if result:
-                        text, is_final = result
-                        if is_final:
-                            self.last_speech_time = time.time()
-                            # If we were already thinking or speaking, this is a barge-in/interruption
-                            if self.active_response_task and not self.active_response_task.done():
-                                logger.info("Barge-in detected! Canceling current response.")
-                                self.active_response_task.cancel()
-                                if self.active_websocket:
-                                    await self.active_websocket.send_json({"type": "stop"})
-                            
-                            # Start new response as a background task
-                            self.active_response_task = asyncio.create_task(self.process_user_input(text))
-                    
-                    # Session Timeout Check (prevent timeout during AI speech)
-                    if not self.stt.is_speaking and current_state != AppState.SPEAKING and current_state != AppState.THINKING:
-                        if time.time() - self.last_speech_time > self.silence_timeout:
-                            logger.info("Silence timeout. Ending session.")
-                            await self.end_session()
-                            continue
-
-                # 3. State-Specific logic
-                if current_state == AppState.IDLE:
-                    # Wake Word Detection
-                    if self.wake_word.process(frame):
-                        self.state_manager.wake_detected()
-                        self.last_speech_time = time.time()
-                        logger.info("Wake word detected! Starting Session...")
-                        await self.db.start_session()
-                        await self.handle_wake_greeting()
-
-                elif current_state == AppState.ACTIVE_SESSION:
-                    pass
-
-                elif current_state == AppState.THINKING:
-                    pass
-
-                elif current_state == AppState.SPEAKING:
-                    pass
-
-                await asyncio.sleep(0.001)
+                # 1. Wait for audio, then drain everything queued in one go.
+                # The loop only yields when it has caught up, never per frame.
+                for frame in await self.audio_stream.get_frames():
+                    if not self.running:
+                        break
+                    if frame: # Empty frames only wake the loop (see stop())
+                        await self.dispatch_frame(frame)
 
         except Exception as e:
             logger.error(f"Error in backend loop: {e}")
@@ -131,12 +148,101 @@ class AIBackend:
             logger.info("Backend loop stopped.")
             await self.cleanup()
 
+    def _apply_ingress_policy(self, state):
+        """State observer: shed stale audio while IDLE, never lose the user's words mid-conversation."""
+        policy = Config.INGRESS_IDLE_POLICY if state == AppState.IDLE else Config.INGRESS_ACTIVE_POLICY
+        self.audio_stream.set_policy(policy)
+
+    def _track_speech(self, features):
+        """Frame subscriber: any voiced frame during a session keeps it alive."""
+        if features.is_speech and self.state_manager.state != AppState.IDLE:
+            self.last_speech_time = features.timestamp + features.duration
+            self.voice_ended_at = metrics.clock()
+
+    async def dispatch_frame(self, frame):
+        """Routes one inbound audio chunk to wake word / STT according to the current state."""
+        current_state = self.state_manager.state
+        features = self.frames.push(frame)
+
+        # 2. Global STT & Interruption logic (whenever awake)
+        if current_state != AppState.IDLE:
+            for pending in self.stt.process_frames(features):
+                # Whisper decodes on the STT executor; keep consuming frames meanwhile
+                task = asyncio.create_task(self.handle_transcription(pending))
+                self.transcription_tasks.add(task)
+                task.add_done_callback(self.transcription_tasks.discard)
+            if current_state == AppState.ACTIVE_SESSION:
+                self.speculator.advance(self.clock.now())
+            
+            # Session Timeout Check (prevent timeout during AI speech)
+            if not self.stt.is_speaking and current_state != AppState.SPEAKING and current_state != AppState.THINKING:
+                if self.clock.now() - self.last_speech_time > self.silence_timeout:
+                    logger.info("Silence timeout. Ending session.")
+                    await self.end_session()
+                    return
+
+        # 3. State-Specific logic
+        if current_state == AppState.IDLE:
+            # Wake Word Detection
+            if any(self.wake_word.process(item.pcm) for item in features):
+                self.state_manager.wake_detected()
+                self.last_speech_time = self.clock.now()
+                logger.info("Wake word detected! Starting Session...")
+                await self.begin_session()
+                await self.handle_wake_greeting()
+
+    async def handle_transcription(self, pending):
+        """Waits for an off-loop Whisper decode and reacts to the text (partials become captions)."""
+        result = await pending
+        if not result or self.state_manager.state == AppState.IDLE:
+            return
+
+        text, is_final = result
+        if text is None:
+            # STT stayed overloaded: the user's words are gone, so ask them to repeat
+            logger.warning("Utterance dropped by an overloaded STT executor.")
+            if self.active_websocket:
+                await self.active_websocket.send_json({"type": "dropped", "reason": "stt_overloaded"})
+            return
+        if not is_final:
+            if self.state_manager.state == AppState.ACTIVE_SESSION and self.stt.is_speaking:
+                # Speculate on what the LLM would get if the utterance ended now, cues included.
+                # Not while the AI talks: those partials are echo or a barge-in.
+                self.speculator.observe_partial(f"{self.stt.live_cues()} {text}".strip(), self.stt.last_partial_at)
+            if self.active_websocket:
+                await self.active_websocket.send_json({"type": "partial", "text": text, "stable": self.stt.stable_text})
+        else:
+            self.last_speech_time = self.clock.now()
+            # If we were already thinking or speaking, this is a barge-in/interruption
+            if self.active_response_task and not self.active_response_task.done():
+                logger.info("Barge-in detected! Canceling current response.")
+                metrics.BARGE_INS.inc()
+                self.active_response_task.cancel()
+                if self.active_websocket:
+                    await self.active_websocket.send_json({"type": "stop"})
+
+            # Start new response as a background task
+            turn = metrics.TurnTimer(self.voice_ended_at)
+            self.active_response_task = asyncio.create_task(self.process_user_input(text, turn))
+
+    def stop(self):
+        """Asks the run loop to exit; it cleans up on the way out."""
+        self.running = False
+        # Wake the loop if it is parked on an empty audio queue
+        self.audio_stream.wake()
+
+    async def begin_session(self):
+        """Opens a DB session with fresh context. Context comes from cache unless a session ended since."""
+        await self.llm.reload_context(self.db)
+        await self.db.start_session()
+
     async def end_session(self):
         """Ends the current session, reflects on growth, and resets state."""
         # 1. Reflect and learn from this session (Human Growth)
         await self.llm.reflect_on_session(self.db)
         
         # 2. Cleanup session
+        self.speculator.cancel()
         self.stt.stop()
         self.state_manager.session_end()
         self.llm.clear_memory()
@@ -144,11 +250,16 @@ class AIBackend:
         logger.info(f"Session ended. {Config.AI_NAME} has evolved and is now IDLE.")
 
     async def handle_wake_greeting(self):
-        """Generates and plays a greeting on wake word detection"""
-        logger.info("Generating greeting...")
-        raw_greeting = await self.llm.generate_greeting()
-        # Strip hidden reasoning
-        greeting_text = raw_greeting.split("</emotion_thought>")[-1].strip()
+        """Plays a greeting on wake word detection: prefetched if one is ready, else generated live"""
+        woke_at = metrics.clock()
+        greeting = self.services.greetings.take()
+        if greeting:
+            greeting_text = greeting.text
+        else:
+            logger.info("Generating greeting...")
+            raw_greeting = await self.llm.generate_greeting()
+            # Strip hidden reasoning
+            greeting_text = ResponseStreamParser.clean(raw_greeting)
         
         logger.info(f"{Config.AI_NAME} Greeting: {greeting_text}")
         self.llm.add_to_memory("assistant", greeting_text)
@@ -158,23 +269,20 @@ class AIBackend:
         self.state_manager.start_speaking()
         # self.stt.stop() # REMOVED: Keep STT active for Barge-in support
         
-        audio_stream = self.tts.stream_audio(greeting_text)
-        if audio_stream:
-            if self.active_websocket:
-                # Stream to WebSocket (Web/Mobile)
-                for chunk in audio_stream:
-                    if chunk:
-                        await self.active_websocket.send_bytes(chunk)
-            else:
-                # Play locally (Desktop only if PyAudio available)
-                await asyncio.to_thread(self.audio_player.play_stream, audio_stream)
+        chunks = self._cached_audio(greeting.audio) if greeting else self.tts.astream_audio(greeting_text)
+        async for chunk in chunks:
+            if woke_at is not None:
+                metrics.WAKE_TO_FIRST_AUDIO.observe(metrics.clock() - woke_at)
+                woke_at = None
+            await self._send_audio(chunk)
         
         self.state_manager.finish_speaking()
         self.stt.start() # Start listening for user response
-        self.last_speech_time = time.time()
+        self.last_speech_time = self.clock.now()
 
-    async def process_user_input(self, text):
+    async def process_user_input(self, text, turn=None):
         """Called when STT returns final text. Uses streaming for low latency."""
+        turn = turn or metrics.TurnTimer()
         logger.info(f"User said: {text}")
         
         if not text.strip():
@@ -182,6 +290,7 @@ class AIBackend:
         
         # Check stop commands
         if text.lower().strip() in ["bye", "stop", "goodnight", "you can rest now", "end", "shutdown"]:
+            self.speculator.cancel()
             await self.handle_stop_command(text)
             return
 
@@ -192,57 +301,48 @@ class AIBackend:
         self.state_manager.start_thinking()
         
         # HUMAN NATURE: Simulated Thinking Latency
-        # Humans take longer to process deep/long thoughts
-        base_delay = 0.4 # Minimum human reaction
-        complexity_delay = min(2.5, len(text) / 50.0) # More text = more "thought"
-        total_delay = base_delay + (complexity_delay * random.uniform(0.5, 1.5))
+        # The pause is a floor on time-to-first-audio: LLM and TTS start right away,
+        # playback is only held until the pause has elapsed.
+        total_delay = self._thinking_delay(text)
         logger.debug(f"Simulating human thought delay: {total_delay:.2f}s")
-        await asyncio.sleep(total_delay)
-
-        full_response = ""
-        sentence_buffer = ""
-        sentence_end_chars = [".", "?", "!", "\n"]
-        in_reasoning = False
+        release_at = asyncio.get_running_loop().time() + total_delay
+
+        # Strips <emotion_thought> and cuts speakable sentences as tokens arrive
+        parser = ResponseStreamParser()
+        # Synthesizes the next sentences while the current one is playing
+        async def send(chunk):
+            turn.audio_sent()
+            await self._send_audio(chunk)
+
+        pipeline = TTSPipeline(
+            self.tts,
+            send,
+            lookahead=Config.TTS_LOOKAHEAD,
+            not_before=release_at,
+            on_start=self.state_manager.start_speaking
+        )
 
         try:
-            # 1. Stream from LLM
-            async for token in self.llm.generate_response_stream(text):
-                full_response += token
-                
-                # Check for reasoning block tags
-                if "<emotion_thought>" in full_response and not in_reasoning:
-                    in_reasoning = True
-                    continue
-                
-                if "</emotion_thought>" in full_response and in_reasoning:
-                    in_reasoning = False
-                    # Extract only the content AFTER the reasoning block
-                    full_response = full_response.split("</emotion_thought>")[-1]
-                    sentence_buffer = full_response
-                    continue
-
-                if in_reasoning:
-                    continue
-
-                sentence_buffer += token
-
-                # 2. If we have a complete sentence, stream it to TTS
-                if any(char in sentence_buffer for char in sentence_end_chars) and len(sentence_buffer.strip()) > 30:
-                    if self.state_manager.state == AppState.THINKING:
-                        self.state_manager.start_speaking()
-
-                    await self._stream_sentence_to_voice(sentence_buffer.strip())
-                    sentence_buffer = ""
+            # 1. Stream from LLM (closing the stream on barge-in aborts the upstream request).
+            # A speculative generation started on the partial transcript is reused when it matches.
+            stream = self.speculator.claim(text) or self.llm.generate_response_stream(text)
+            async with contextlib.aclosing(stream) as tokens:
+                async for token in tokens:
+                    turn.token()
+                    # 2. Every complete sentence is handed to TTS immediately
+                    for segment in parser.feed(token):
+                        pipeline.submit(segment.text)
+
+            turn.llm_done()
 
             # 3. Stream any remaining text
-            if sentence_buffer.strip() and not in_reasoning:
-                if self.state_manager.state == AppState.THINKING:
-                    self.state_manager.start_speaking()
-                    # self.stt.stop() # REMOVED: Keep STT active for Barge-in support
-                await self._stream_sentence_to_voice(sentence_buffer.strip())
+            for segment in parser.flush():
+                pipeline.submit(segment.text)
+
+            await pipeline.drain()
 
             # Log final response (cleaned)
-            final_clean = full_response.split("</emotion_thought>")[-1].strip()
+            final_clean = parser.text
             self.llm.add_to_memory("assistant", final_clean)
             await self.db.log_message("assistant", final_clean)
             logger.info(f"AI full response: {final_clean}")
@@ -253,61 +353,78 @@ class AIBackend:
         except Exception as e:
             logger.error(f"Error in streaming response: {e}")
         finally:
+            pipeline.cancel() # No-op once drained; stops in-flight synthesis on barge-in
+            if self.state_manager.state == AppState.THINKING:
+                # Nothing was ever played (e.g. TTS failed)
+                self.state_manager.session_active()
             self.state_manager.finish_speaking()
             self.stt.start() # Resume listening
-            self.last_speech_time = time.time() # Reset silence timer
-
-    async def _stream_sentence_to_voice(self, sentence):
-        """Helper to stream a single sentence to the active output."""
-        # Extra safety: strip any lingering tags if the logic missed them
-        clean_sentence = sentence.split("</emotion_thought>")[-1].strip()
-        if not clean_sentence:
-            return
+            self.last_speech_time = self.clock.now() # Reset silence timer
 
-        logger.debug(f"Pipelining sentence to TTS: {clean_sentence}")
-        audio_stream = self.tts.stream_audio(clean_sentence)
-        if audio_stream:
-            if self.active_websocket:
-                for chunk in audio_stream:
-                    if chunk:
-                        await self.active_websocket.send_bytes(chunk)
-            else:
-                await asyncio.to_thread(self.audio_player.play_stream, audio_stream)
+    @staticmethod
+    def _thinking_delay(text):
+        """Human-like pause before answering. Humans take longer to process deep/long thoughts."""
+        if Config.THINKING_DELAY_SCALE <= 0:
+            return 0.0
+        base_delay = 0.4 # Minimum human reaction
+        complexity_delay = min(2.5, len(text) / 50.0) # More text = more "thought"
+        total_delay = base_delay + (complexity_delay * random.uniform(0.5, 1.5))
+        return total_delay * Config.THINKING_DELAY_SCALE
+
+    async def _speak(self, text):
+        """Streams a single utterance to the active output without blocking the loop."""
+        async for chunk in self.tts.astream_audio(text):
+            await self._send_audio(chunk)
+
+    @staticmethod
+    async def _cached_audio(chunks):
+        for chunk in chunks:
+            yield chunk
+
+    async def _send_audio(self, chunk):
+        """Delivers one TTS audio chunk to the active output."""
+        if self.active_websocket:
+            # Stream to WebSocket (Web/Mobile)
+            await self.active_websocket.send_bytes(chunk)
+        elif self.audio_player:
+            # Play locally (Desktop only if PyAudio available)
+            await asyncio.to_thread(self.audio_player.play_stream, (chunk,))
 
     async def handle_stop_command(self, text):
         logger.info("Generating farewell...")
         self.state_manager.start_thinking()
         raw_farewell = await self.llm.generate_farewell(text)
         # Strip hidden reasoning
-        response_text = raw_farewell.split("</emotion_thought>")[-1].strip()
+        response_text = ResponseStreamParser.clean(raw_farewell)
         
         logger.info(f"AI Farewell: {response_text}")
         await self.db.log_message("assistant", response_text)
         
         self.state_manager.start_speaking()
         self.stt.stop()
-        audio_stream = self.tts.stream_audio(response_text)
-        if audio_stream:
-            if self.active_websocket:
-                for chunk in audio_stream:
-                    if chunk:
-                        await self.active_websocket.send_bytes(chunk)
-            else:
-                await asyncio.to_thread(self.audio_player.play_stream, audio_stream)
+        await self._speak(response_text)
         await self.end_session()
 
     async def cleanup(self):
-        await self.db.close()
+        """Releases this session's resources. Shared services are closed by their owner."""
+        if self.active_response_task and not self.active_response_task.done():
+            self.active_response_task.cancel()
+        self.speculator.cancel()
+        if self.state_manager.state != AppState.IDLE:
+            # Client vanished mid-conversation: still close out the DB session
+            await self.end_session()
         self.audio_stream.close()
-        self.audio_player.close()
-        self.wake_word.delete()
+        if self.audio_player:
+            self.audio_player.close()
+        self.services.wake_words.release(self.wake_word)
         self.stt.stop()
 
     async def start_manual_session(self):
         """Manually starts a session (e.g. from API)"""
         if self.state_manager.state == AppState.IDLE:
             self.state_manager.wake_detected()
-            self.last_speech_time = time.time()
+            self.last_speech_time = self.clock.now()
+            await self.begin_session()
             # We need to schedule the greeting, but we can't await here easily if called from sync context
             # But since this will be called from async API handler, we can return a coroutine or just let the loop handle it?
             # Actually, handle_wake_greeting is async.
@@ -317,19 +434,27 @@ class AIBackend:
             await self.handle_wake_greeting()
         return None
 
-# Global backend instance
-backend = AIBackend()
+# Process-wide services and one pipeline per connected client
+services = SharedServices()
+sessions = SessionRegistry(
+    lambda websocket=None: AIBackend(services, websocket=websocket),
+    max_sessions=Config.MAX_SESSIONS
+)
+LOCAL_SESSION_ID = "local"
+# Greetings are only prefetched while someone is connected
+services.greetings.in_use = lambda: any(backend.has_client for backend in sessions)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    await backend.initialize()
-    loop_task = asyncio.create_task(backend.run())
+    await services.initialize()
+    # The local session drives the desktop microphone (if PyAudio is available).
+    # Pinned: it doesn't take one of the MAX_SESSIONS client slots.
+    sessions.open(session_id=LOCAL_SESSION_ID, pinned=True)
     yield
     # Shutdown
-    backend.running = False
-    await backend.cleanup() # Using cleanup method
-    await loop_task
+    await sessions.close_all()
+    await services.close()
 
 app = FastAPI(title=f"{Config.AI_NAME} Backend", lifespan=lifespan)
 
@@ -351,9 +476,17 @@ async def add_security_headers(request, call_next):
     response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
     return response
 
+def get_session(session_id):
+    """The caller's own session (see the {"type": "session"} WebSocket message), else 404."""
+    backend = sessions.get(session_id) if session_id else None
+    if backend is None:
+        raise HTTPException(status_code=404, detail="Unknown session_id")
+    return backend
+
 @app.get("/status")
-async def get_status():
-    if not backend.is_ready or backend.stt.is_loading:
+async def get_status(session_id: Optional[str] = None):
+    backend = get_session(session_id)
+    if not services.is_ready or services.stt.is_loading:
         return {"state": "loading"}
     
     # Map AppState to frontend expected strings
@@ -363,11 +496,41 @@ async def get_status():
         AppState.THINKING: "thinking",
         AppState.SPEAKING: "speaking"
     }
-    return {"state": state_map.get(backend.state_manager.state, "idle")}
+    return {
+        "state": state_map.get(backend.state_manager.state, "idle"),
+        # Adaptive end-of-turn silence chosen for this conversation's turns
+        "endpointing": backend.stt.endpointer.stats(),
+        # Replies started early on stable partial transcripts
+        "speculation": backend.speculator.stats(),
+        # Inbound audio waiting for the pipeline (lag) and what was shed to cap it
+        "ingress": backend.audio_stream.stats()
+    }
+
+@app.get("/stats")
+async def get_stats():
+    # offloaded_seconds = event loop time that Whisper would have blocked if run inline
+    return {
+        "sessions": len(sessions),
+        "stt_executor": services.stt.executor.stats(),
+        # Replayed vs. live-synthesized utterances
+        "tts_cache": services.tts.cache.stats(),
+        # Prefetched wake greetings: pool size and hit rate
+        "greeting_cache": services.greetings.stats(),
+        # Scheduling delay and the code location of the last callback that blocked the loop
+        "event_loop": services.loop_monitor.stats()
+    }
+
+@app.get("/metrics")
+async def get_metrics():
+    # Prometheus text exposition: per-turn latency histograms, fallback/barge-in/DB error counters
+    if not Config.METRICS:
+        return Response(status_code=404)
+    return Response(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 @app.post("/start-session")
-async def start_session(background_tasks: BackgroundTasks):
-    if not backend.is_ready or backend.stt.is_loading:
+async def start_session(background_tasks: BackgroundTasks, session_id: Optional[str] = None):
+    backend = get_session(session_id)
+    if not services.is_ready or services.stt.is_loading:
         return {"status": "loading_models", "message": "Please wait, AI is still waking up..."}
 
     if backend.state_manager.state == AppState.IDLE:
@@ -379,22 +542,30 @@ async def start_session(background_tasks: BackgroundTasks):
 @app.websocket("/ws/audio")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
-    logger.info("Client connected via WebSocket.")
-    backend.active_websocket = websocket
+    session_id, backend = sessions.open(websocket=websocket)
+    if backend is None:
+        # 1013 = Try Again Later
+        await websocket.close(code=1013)
+        return
+
+    logger.info(f"Client connected via WebSocket (session {session_id}).")
+    services.greetings.wake() # Have a greeting ready before its wake word
+    await websocket.send_json({"type": "session", "session_id": session_id})
     
     try:
         while True:
             # Receive binary audio data (PCM 16k mono)
             data = await websocket.receive_bytes()
             if data:
-                # Inject frame into the AI logic
+                # Inject frame into this client's pipeline
                 await backend.audio_stream.put_frame(data)
     except WebSocketDisconnect:
-        logger.info("Client disconnected from WebSocket.")
+        logger.info(f"Client disconnected from WebSocket (session {session_id}).")
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
     finally:
         backend.active_websocket = None
+        await sessions.close(session_id)
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
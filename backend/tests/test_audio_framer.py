@@ -0,0 +1,35 @@
+import unittest
+from app.audio_framer import AudioFramer
+
+class TestAudioFramer(unittest.TestCase):
+    def test_frames_match_plain_slicing(self):
+        stream = bytes(range(256)) * 40
+        framer = AudioFramer(frame_samples=480, capacity_frames=2)
+        frames = []
+        # Odd chunk sizes force partial frames, compaction and one burst larger than the buffer
+        pos = 0
+        for size in (7, 1000, 333, 4096, 960, 1):
+            frames.extend(bytes(f) for f in framer.push(stream[pos:pos + size]))
+            pos += size
+        self.assertEqual(len(frames), pos // 960)
+        self.assertEqual(len(framer), pos % 960)
+        self.assertEqual(b"".join(frames), stream[:len(frames) * 960])
+
+    def test_frames_are_views_not_copies(self):
+        framer = AudioFramer(frame_samples=4)
+        frame = next(framer.push(b"\x01\x00" * 4))
+        self.assertIsInstance(frame, memoryview)
+        self.assertEqual(list(frame.cast("h")), [1, 1, 1, 1])
+
+    def test_unconsumed_frames_stay_queued(self):
+        framer = AudioFramer(frame_samples=2)
+        frames = framer.push(b"abcdefgh")
+        self.assertEqual(bytes(next(frames)), b"abcd")
+        # Stop early (e.g. an utterance completed mid-chunk); the rest is kept
+        self.assertEqual([bytes(f) for f in framer.push(b"ij")], [b"efgh"])
+        self.assertEqual(len(framer), 2)
+        framer.clear()
+        self.assertEqual(len(framer), 0)
+
+if __name__ == '__main__':
+    unittest.main()
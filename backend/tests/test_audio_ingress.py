@@ -0,0 +1,92 @@
+import unittest
+import asyncio
+from app.audio import IngressBuffer
+
+CHUNK = b"\x00" * 1000
+
+class TestIngressBuffer(unittest.IsolatedAsyncioTestCase):
+    async def test_drop_oldest_caps_lag(self):
+        ingress = IngressBuffer(max_bytes=3000, max_chunks=64, policy="drop_oldest")
+        for i in range(10):
+            ingress.put_nowait(bytes([i]) * 1000)
+        self.assertEqual(ingress.depth_bytes, 3000)
+        self.assertEqual(ingress.dropped_chunks, 7)
+        self.assertEqual((await ingress.get())[0], 7) # Newest audio survives
+
+    async def test_coalesce_keeps_audio_in_fewer_items(self):
+        ingress = IngressBuffer(max_bytes=10000, max_chunks=2, policy="coalesce")
+        for _ in range(5):
+            ingress.put_nowait(CHUNK)
+        self.assertEqual(ingress.qsize(), 2)
+        self.assertEqual(ingress.depth_bytes, 5000)
+        self.assertEqual(ingress.dropped_chunks, 0)
+        self.assertEqual(len(await ingress.get()) + len(await ingress.get()), 5000)
+
+    async def test_block_applies_backpressure_until_drained(self):
+        ingress = IngressBuffer(max_bytes=2000, max_chunks=64, policy="block")
+        await ingress.put(CHUNK)
+        await ingress.put(CHUNK)
+        writer = asyncio.create_task(ingress.put(CHUNK))
+        await asyncio.sleep(0.01)
+        self.assertFalse(writer.done()) # Reader would stop pulling from the socket here
+        self.assertEqual(ingress.blocked_puts, 1)
+
+        await ingress.get()
+        await asyncio.wait_for(writer, 1)
+        self.assertEqual(ingress.depth_bytes, 2000)
+        self.assertEqual(ingress.dropped_chunks, 0)
+
+    async def test_policy_switch_and_close_release_writers(self):
+        ingress = IngressBuffer(max_bytes=1000, max_chunks=64, policy="block")
+        await ingress.put(CHUNK)
+        writer = asyncio.create_task(ingress.put(CHUNK))
+        await asyncio.sleep(0.01)
+        ingress.policy = "drop_oldest" # e.g. session went IDLE
+        await asyncio.wait_for(writer, 1)
+        self.assertEqual(ingress.dropped_chunks, 1)
+
+        ingress.policy = "block"
+        writer = asyncio.create_task(ingress.put(CHUNK))
+        await asyncio.sleep(0.01)
+        ingress.close()
+        await asyncio.wait_for(writer, 1)
+
+    async def test_oversized_chunk_is_admitted_once_drained(self):
+        ingress = IngressBuffer(max_bytes=1000, max_chunks=64, policy="block")
+        await asyncio.wait_for(ingress.put(b"\0" * 3000), 1) # Empty queue: never parks the reader
+        writer = asyncio.create_task(ingress.put(b"\0" * 3000))
+        await asyncio.sleep(0.01)
+        self.assertFalse(writer.done()) # Still backpressure behind queued audio
+
+        self.assertEqual(len(await ingress.get()), 3000)
+        await asyncio.wait_for(writer, 1)
+        self.assertEqual(ingress.dropped_chunks, 0)
+
+    async def test_wake_marker_bypasses_limits(self):
+        ingress = IngressBuffer(max_bytes=1000, max_chunks=1, policy="drop_oldest")
+        ingress.put_nowait(CHUNK)
+        ingress.put_nowait(b"")
+        self.assertEqual(await ingress.get(), CHUNK)
+        self.assertEqual(await ingress.get(), b"")
+
+    async def test_get_batch_drains_everything_queued(self):
+        ingress = IngressBuffer(max_bytes=1000, max_chunks=64, policy="block")
+        reader = asyncio.create_task(ingress.get_batch())
+        await asyncio.sleep(0.01)
+        self.assertFalse(reader.done()) # Idle: waits instead of polling
+
+        ingress.put_nowait(b"a")
+        ingress.put_nowait(b"b")
+        self.assertEqual(await asyncio.wait_for(reader, 1), [b"a", b"b"])
+        self.assertEqual(ingress.depth_bytes, 0)
+
+        # A full buffer frees its writers once the batch is taken
+        await ingress.put(CHUNK)
+        writer = asyncio.create_task(ingress.put(CHUNK))
+        await asyncio.sleep(0.01)
+        self.assertEqual(await ingress.get_batch(), [CHUNK])
+        await asyncio.wait_for(writer, 1)
+        self.assertEqual(ingress.qsize(), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import asyncio
+import contextlib
+import time
+from datetime import datetime
+from app.conversation_history_store import ConversationHistoryStore
+from app.llm import LLMService
+from unittest.mock import patch
+
+class FakeConnection:
+    """Every query takes one simulated round trip."""
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def _round_trip(self, query):
+        self.pool.queries.append(query)
+        await asyncio.sleep(self.pool.latency)
+
+    async def fetchrow(self, query, *args):
+        await self._round_trip(query)
+        if "agent_configs" in query:
+            return {"personality": "{}", "background_history": "{}", "evolved_learnings": "grew", "session_count": 41}
+        if "ended_at" in query:
+            return {"ended_at": datetime(2026, 1, 1)}
+        return {"content": "see you!"}
+
+    async def fetchval(self, query, *args):
+        await self._round_trip(query)
+        return self.pool.session_count
+
+    async def fetch(self, query, *args):
+        await self._round_trip(query)
+        return []
+
+    async def execute(self, query, *args):
+        await self._round_trip(query)
+        if "session_count + 1" in query:
+            self.pool.session_count += 1
+
+class FakePool:
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.queries = []
+        self.session_count = 41
+
+    @contextlib.asynccontextmanager
+    async def acquire(self):
+        yield FakeConnection(self)
+
+class TestContextLoader(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.pool = FakePool()
+        self.store = ConversationHistoryStore()
+        self.store.pool = self.pool
+
+    async def test_queries_run_concurrently(self):
+        start = time.perf_counter()
+        context = await self.store.load_context()
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(self.pool.queries), 5)
+        self.assertLess(elapsed, 3 * self.pool.latency) # Not five round trips in a row
+        self.assertEqual(context["session_count"], 41)
+        self.assertEqual(context["last_interaction"], "see you!")
+        self.assertFalse(any("COUNT(*)" in q for q in self.pool.queries))
+
+    async def test_cache_and_invalidation(self):
+        session = self.store.for_session()
+        await self.store.load_context()
+        await session.load_context()
+        self.assertEqual(len(self.pool.queries), 5) # Second load served from cache
+
+        await session.start_session()
+        context = await self.store.load_context()
+        self.assertEqual(context["session_count"], 42) # Counter kept current without a reload
+        self.assertEqual(self.pool.session_count, 42)
+
+        queries = len(self.pool.queries)
+        await session.end_session()
+        await self.store.load_context()
+        self.assertGreater(len(self.pool.queries), queries + 1) # Reloaded after the session ended
+
+    async def test_llm_reload_uses_loader(self):
+        with patch('app.llm.genai.Client'):
+            llm = LLMService()
+        await llm.reload_context(self.store)
+        self.assertEqual(llm.evolved_learnings, "grew")
+        self.assertEqual(llm.session_count, 41)
+        self.assertEqual(llm.last_seen, datetime(2026, 1, 1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from app.endpointing import Endpointer
+from app.frame_pipeline import FrameFeatures
+
+def voiced(rms=0.2):
+    return FrameFeatures(None, True, rms, 0.0, 0.03)
+
+def silent():
+    return FrameFeatures(None, False, 0.0, 0.0, 0.03)
+
+class TestEndpointer(unittest.TestCase):
+    def setUp(self):
+        self.endpointer = Endpointer(min_silence=0.3, base_silence=0.8, max_silence=2.0)
+
+    def speak(self, seconds, rms=0.2):
+        for _ in range(int(seconds / 0.03)):
+            self.endpointer.observe(voiced(rms))
+
+    def test_finished_sentence_ends_sooner_than_trailing_conjunction(self):
+        self.speak(2.0)
+        finished = self.endpointer.hangover("I went to the store yesterday.")
+        unfinished = self.endpointer.hangover("I went to the store and")
+        self.assertLess(finished, 0.6)
+        self.assertGreater(unfinished, 1.0)
+        self.assertEqual(self.endpointer.last_decision["reasons"]["text"], 1.6)
+
+    def test_trailing_energy_shortens_the_wait(self):
+        self.speak(1.5, rms=0.3)
+        for level in (0.2, 0.1, 0.05, 0.02, 0.01):
+            self.endpointer.observe(voiced(level))
+        self.assertEqual(self.endpointer.last_decision, None)
+        self.endpointer.hangover("")
+        self.assertEqual(self.endpointer.last_decision["reasons"]["energy"], 0.8)
+
+    def test_learned_pauses_and_rate_stretch_the_timeout(self):
+        # A slow speaker who regularly pauses ~0.9 s mid-sentence
+        for _ in range(6):
+            self.speak(0.6)
+            for _ in range(30):
+                self.endpointer.observe(silent())
+        self.speak(0.6)
+        self.endpointer.learn_rate("well I think maybe", 4.0)
+
+        silence = self.endpointer.hangover("well I think maybe.")
+        self.assertGreaterEqual(silence, 0.9 * 1.2 - 1e-6)
+        self.assertIn("pauses", self.endpointer.last_decision["reasons"])
+        self.assertIn("rate", self.endpointer.last_decision["reasons"])
+
+    def test_bounds_and_per_turn_report(self):
+        self.speak(0.3)
+        self.assertEqual(Endpointer(min_silence=0.5, base_silence=0.1, max_silence=2.0).hangover("ok."), 0.5)
+        self.endpointer.hangover("yes.")
+        self.endpointer.finish_turn()
+        stats = self.endpointer.stats()
+        self.assertEqual(stats["turns"], 1)
+        self.assertLess(stats["median_silence"], 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
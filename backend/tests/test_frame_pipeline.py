@@ -0,0 +1,85 @@
+import unittest
+import numpy as np
+from app.frame_pipeline import FramePipeline, FrameFeatures
+from app.whisper_stt_service import WhisperSTTService
+from app.stt_executor import STTExecutor
+
+class CountingVAD:
+    """Stands in for app.vad.VAD: 'speech' is any frame louder than a threshold."""
+    sample_rate = 16000
+    frame_size = 480
+
+    def __init__(self):
+        self.calls = 0
+
+    def is_speech(self, frame):
+        self.calls += 1
+        return np.abs(np.frombuffer(frame, dtype=np.int16)).max() > 1000
+
+def tone(frames, amplitude):
+    return (np.ones(480 * frames, dtype=np.int16) * amplitude).tobytes()
+
+class TestFramePipeline(unittest.TestCase):
+    def test_vad_runs_once_per_frame_for_all_subscribers(self):
+        vad = CountingVAD()
+        pipeline = FramePipeline(vad)
+        seen_a, seen_b = [], []
+        pipeline.subscribe(seen_a.append)
+        pipeline.subscribe(seen_b.append)
+
+        audio = tone(2, 0) + tone(3, 8000)
+        features = pipeline.push(audio[:1000]) + pipeline.push(audio[1000:])
+
+        self.assertEqual(vad.calls, 5)
+        self.assertEqual(seen_a, features)
+        self.assertEqual(seen_b, features)
+        self.assertEqual([f.is_speech for f in features], [False, False, True, True, True])
+        self.assertEqual([round(f.timestamp, 2) for f in features], [0.0, 0.03, 0.06, 0.09, 0.12])
+        self.assertAlmostEqual(features[-1].rms, 8000 / 32768, places=4)
+        self.assertEqual(features[0].rms, 0.0)
+
+    def test_failing_subscriber_does_not_stop_others(self):
+        pipeline = FramePipeline(CountingVAD())
+        seen = []
+        pipeline.subscribe(lambda f: 1 / 0)
+        pipeline.subscribe(seen.append)
+        pipeline.push(tone(1, 0))
+        self.assertEqual(len(seen), 1)
+
+class TestSTTEndpointing(unittest.IsolatedAsyncioTestCase):
+    async def test_stt_consumes_shared_features(self):
+        stt = WhisperSTTService(executor=STTExecutor())
+        self.addCleanup(stt.close)
+        stt.model = object() # Never decoded: transcribe is replaced below
+        stt.transcribe = lambda audio: (f"{len(audio)} bytes", True)
+        stt.endpointer.min_silence = stt.endpointer.max_silence = -1.0 # End the utterance on the first silent frame
+        stt.start()
+
+        speech = FrameFeatures(memoryview(tone(1, 8000)), True, 0.24, 0.0, 0.03)
+        silence = FrameFeatures(memoryview(tone(1, 0)), False, 0.0, 0.03, 0.03)
+        self.assertEqual(stt.process_frames([speech, speech]), [])
+        pending = stt.process_frames([silence])
+
+        self.assertEqual(len(pending), 1)
+        self.assertEqual(await pending[0], ("2880 bytes", True))
+
+    async def test_endpointing_follows_audio_time(self):
+        stt = WhisperSTTService(executor=STTExecutor())
+        self.addCleanup(stt.close)
+        stt.model = object()
+        stt.transcribe = lambda audio: ("done", True)
+        stt.partials_enabled = False
+        stt.endpointer.min_silence = stt.endpointer.max_silence = 0.5
+        stt.start()
+        pipeline = FramePipeline(CountingVAD())
+
+        # 1 s of speech and 0.45 s of silence arrive in one burst (a backlogged loop):
+        # no wall time passes, but the audio says the user is still inside the hang-over
+        self.assertEqual(stt.process_frames(pipeline.push(tone(33, 8000) + tone(15, 0))), [])
+        pending = stt.process_frames(pipeline.push(tone(3, 0)))
+        self.assertEqual(len(pending), 1)
+        self.assertEqual(await pending[0], ("done", True))
+        self.assertAlmostEqual(pipeline.clock.now(), 51 * 0.03)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import asyncio
+from datetime import datetime, timedelta
+from app.greeting_cache import GreetingCache, day_part
+
+class FakeLLM:
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_greeting(self):
+        self.calls += 1
+        return f"<emotion_thought>Happy.</emotion_thought>Hey there! ({self.calls})"
+
+class FakeTTS:
+    async def astream_audio(self, text):
+        yield b"pcm-1"
+        yield b"pcm-2"
+
+class Clock:
+    def __init__(self, now):
+        self.current = now
+
+    def __call__(self):
+        return self.current
+
+class TestGreetingCache(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.llm = FakeLLM()
+        self.clock = Clock(datetime(2026, 3, 2, 9, 0))
+        self.cache = GreetingCache(self.llm, FakeTTS(), size=2, ttl=600, enabled=True, now=self.clock)
+
+    async def asyncTearDown(self):
+        self.cache.stop()
+
+    async def wait_ready(self, count):
+        for _ in range(100):
+            if self.cache.stats()["ready"] >= count:
+                return
+            await asyncio.sleep(0.01)
+        self.fail(f"Pool never reached {count} greetings")
+
+    async def test_take_serves_rendered_greetings_and_refills(self):
+        self.assertIsNone(self.cache.take()) # Nothing rendered yet: live generation
+        self.cache.start()
+        await self.wait_ready(2)
+
+        greeting = self.cache.take()
+        self.assertEqual(greeting.text, "Hey there! (1)") # Hidden reasoning stripped
+        self.assertEqual(greeting.audio, [b"pcm-1", b"pcm-2"])
+        await self.wait_ready(2) # Replacement rendered in the background
+        self.assertEqual(self.llm.calls, 3)
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    async def test_stale_greetings_are_never_served(self):
+        self.cache.start()
+        await self.wait_ready(2)
+
+        self.clock.current += timedelta(seconds=601) # Past the TTL
+        self.assertIsNone(self.cache.take())
+        self.assertEqual(self.cache.stats()["expired"], 2)
+
+        await self.wait_ready(2) # Re-rendered for the new time
+        self.clock.current = datetime(2026, 3, 2, 18, 0) # Evening now: morning greetings are stale
+        self.assertIsNone(self.cache.take())
+        self.assertEqual(self.cache.stats()["expired"], 4)
+
+    async def test_no_refill_without_clients_until_read(self):
+        connected = False
+        self.cache.in_use = lambda: connected
+        self.cache.start()
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.llm.calls, 0) # Nobody connected: no Gemini/ElevenLabs calls
+
+        self.assertIsNone(self.cache.take()) # Read and found empty: refill once
+        await self.wait_ready(2)
+        self.clock.current += timedelta(seconds=601) # Stale, but nobody reads it
+        self.cache.wake()
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.llm.calls, 2)
+
+        connected = True
+        self.cache.wake() # A client connected: keep the pool fresh for it
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.llm.calls, 4)
+
+    def test_day_part(self):
+        self.assertEqual(day_part(datetime(2026, 3, 2, 7)), "morning")
+        self.assertEqual(day_part(datetime(2026, 3, 2, 13)), "afternoon")
+        self.assertEqual(day_part(datetime(2026, 3, 2, 19)), "evening")
+        self.assertEqual(day_part(datetime(2026, 3, 2, 23)), "night")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from unittest.mock import patch
+import asyncio
+from app.config import Config
+from app.llm import LLMService
+
+class Chunk:
+    def __init__(self, text):
+        self.text = text
+
+class FakeStream:
+    """Async SDK stream: waits `first_delay` before the first chunk."""
+    def __init__(self, texts, first_delay=0.0):
+        self.texts = texts
+        self.first_delay = first_delay
+        self.closed = False
+
+    async def _generate(self):
+        try:
+            await asyncio.sleep(self.first_delay)
+            for text in self.texts:
+                yield Chunk(text)
+                await asyncio.sleep(0.01)
+        finally:
+            self.closed = True
+
+    def __aiter__(self):
+        return self._generate()
+
+class TestLLMStreaming(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        patcher = patch('app.llm.genai.Client')
+        self.addCleanup(patcher.stop)
+        patcher.start()
+        self.llm = LLMService()
+        self.llm.history = "{}"
+        self.streams = {}
+
+        async def generate_content_stream(model, contents, config):
+            return self.streams[model]
+        self.llm.client.aio.models.generate_content_stream = generate_content_stream
+
+    async def test_missed_first_token_deadline_falls_back(self):
+        slow, fast = self.llm.model_tiers
+        self.streams[slow] = FakeStream(["too late"], first_delay=1.0)
+        self.streams[fast] = FakeStream(["Hey ", "there!"])
+
+        with patch.object(Config, 'LLM_FIRST_TOKEN_TIMEOUT', 0.1):
+            tokens = [t async for t in self.llm.generate_response_stream("hi")]
+
+        self.assertEqual(tokens, ["Hey ", "there!"])
+        self.assertEqual(self.llm.current_model_tier, 1)
+
+    async def test_closing_stream_aborts_upstream(self):
+        primary = self.llm.model_tiers[0]
+        upstream = FakeStream(["one ", "two ", "three "])
+        self.streams[primary] = upstream
+
+        tokens = self.llm.generate_response_stream("hi")
+        first = await tokens.__anext__()
+        await tokens.aclose()
+
+        self.assertEqual(first, "one ")
+        self.assertTrue(upstream.closed)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+import asyncio
+import time
+from app.loop_monitor import LoopMonitor, LoopBlockedError
+
+def blocking_decode(seconds):
+    time.sleep(seconds) # Stands in for an inline Whisper/TTS/Gemini call
+
+class TestLoopMonitor(unittest.IsolatedAsyncioTestCase):
+    async def test_block_is_reported_with_its_stack(self):
+        monitor = LoopMonitor(interval=0.01, threshold=0.05)
+        monitor.start()
+        await asyncio.sleep(0.03)
+        blocking_decode(0.2)
+        await asyncio.sleep(0.03)
+        monitor.stop()
+
+        self.assertEqual(len(monitor.blocks), 1)
+        block = monitor.blocks[0]
+        self.assertGreaterEqual(block["lag_ms"], 150)
+        self.assertIn("blocking_decode", block["where"])
+        self.assertIn("test_block_is_reported_with_its_stack", "".join(block["stack"]))
+        self.assertGreaterEqual(monitor.stats()["max_lag_ms"], 150)
+
+    async def test_fail_mode_raises_on_long_blocks_only(self):
+        async with LoopMonitor(interval=0.01, threshold=0.02, fail_after=0.1):
+            await asyncio.sleep(0.05) # Yielding code passes
+
+        with self.assertRaises(LoopBlockedError) as raised:
+            async with LoopMonitor(interval=0.01, threshold=0.02, fail_after=0.1):
+                await asyncio.sleep(0.03)
+                blocking_decode(0.25)
+                await asyncio.sleep(0.03)
+        self.assertIn("blocking_decode", str(raised.exception))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import asyncio
+import contextlib
+from app.message_journal import MessageJournal
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def executemany(self, query, rows):
+        if self.pool.fail:
+            raise ConnectionError("db down")
+        if self.pool.gate:
+            await self.pool.gate.wait()
+        self.pool.batches.append(list(rows))
+
+class FakePool:
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+        self.gate = None # asyncio.Event holding writes in flight
+
+    @contextlib.asynccontextmanager
+    async def acquire(self):
+        yield FakeConnection(self)
+
+    @property
+    def rows(self):
+        return [row for batch in self.batches for row in batch]
+
+class TestMessageJournal(unittest.IsolatedAsyncioTestCase):
+    async def test_append_is_batched_and_ordered(self):
+        pool = FakePool()
+        journal = MessageJournal(pool, batch_size=3, flush_interval=10)
+        journal.start()
+
+        for i in range(7):
+            journal.append("session-a" if i % 2 else "session-b", "user", f"msg {i}")
+        # Nothing was written on the caller's path
+        self.assertEqual(pool.batches, [])
+
+        await asyncio.sleep(0.05) # Size threshold wakes the flusher
+        self.assertEqual([len(b) for b in pool.batches], [3, 3, 1])
+
+        journal.append("session-a", "user", "msg 7")
+        await journal.close() # Shutdown writes the tail
+        contents = [row[3] for row in pool.rows]
+        self.assertEqual(contents, [f"msg {i}" for i in range(8)])
+        timestamps = [row[4] for row in pool.rows]
+        self.assertEqual(timestamps, sorted(set(timestamps)))
+
+    async def test_time_threshold_flushes_small_batches(self):
+        pool = FakePool()
+        journal = MessageJournal(pool, batch_size=100, flush_interval=0.05)
+        journal.start()
+        journal.append("session-a", "assistant", "hello")
+        await asyncio.sleep(0.15)
+        self.assertEqual(len(pool.rows), 1)
+        await journal.close()
+
+    async def test_failed_flush_keeps_rows_for_retry(self):
+        pool = FakePool()
+        journal = MessageJournal(pool, batch_size=10, flush_interval=10)
+        journal.append("session-a", "user", "one")
+        journal.append("session-a", "user", "two")
+
+        pool.fail = True
+        self.assertFalse(await journal.flush())
+        self.assertEqual(journal.pending, 2)
+
+        pool.fail = False
+        self.assertTrue(await journal.flush())
+        self.assertEqual([row[3] for row in pool.rows], ["one", "two"])
+        self.assertEqual(journal.flush_errors, 1)
+
+    async def test_overflow_during_flush_drops_only_unwritten_rows(self):
+        pool = FakePool()
+        pool.gate = asyncio.Event()
+        journal = MessageJournal(pool, batch_size=2, flush_interval=10, max_pending=3)
+        journal.append("session-a", "user", "one")
+        journal.append("session-a", "user", "two")
+        flushing = asyncio.create_task(journal.flush())
+        await asyncio.sleep(0.01) # "one", "two" are being written
+
+        for text in ("three", "four", "five", "six"):
+            journal.append("session-a", "user", text)
+        pool.gate.set()
+        await flushing
+
+        # "three" was shed as the oldest unsaved row; nothing lost twice or written twice
+        self.assertEqual([row[3] for row in pool.rows], ["one", "two", "four", "five", "six"])
+        self.assertEqual(journal.rows_dropped, 1)
+
+    async def test_close_waits_for_the_write_in_flight(self):
+        pool = FakePool()
+        pool.gate = asyncio.Event()
+        journal = MessageJournal(pool, batch_size=2, flush_interval=10)
+        journal.start()
+        journal.append("session-a", "user", "one")
+        journal.append("session-a", "user", "two")
+        await asyncio.sleep(0.01) # The flusher is writing "one", "two"
+
+        journal.append("session-a", "assistant", "three")
+        closing = asyncio.create_task(journal.close())
+        await asyncio.sleep(0.01)
+        pool.gate.set()
+        await closing
+        self.assertEqual([row[3] for row in pool.rows], ["one", "two", "three"])
+        self.assertEqual(journal.pending, 0)
+
+    async def test_cancelled_write_keeps_its_rows(self):
+        pool = FakePool()
+        pool.gate = asyncio.Event()
+        journal = MessageJournal(pool, batch_size=2, flush_interval=10)
+        journal.append("session-a", "user", "one")
+        flushing = asyncio.create_task(journal.flush())
+        await asyncio.sleep(0.01)
+        flushing.cancel()
+        await asyncio.gather(flushing, return_exceptions=True)
+        self.assertEqual(journal.pending, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+from unittest.mock import patch
+from app import metrics
+from app.config import Config
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram_renders_cumulative_buckets(self):
+        registry = metrics.Registry()
+        histogram = registry.histogram("test_latency_seconds", "Test latency.", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+
+        text = registry.render()
+        self.assertIn("# TYPE test_latency_seconds histogram", text)
+        self.assertIn('test_latency_seconds_bucket{le="0.1"} 2', text)
+        self.assertIn('test_latency_seconds_bucket{le="1.0"} 3', text)
+        self.assertIn('test_latency_seconds_bucket{le="+Inf"} 4', text)
+        self.assertIn("test_latency_seconds_sum 3.65", text)
+        self.assertIn("test_latency_seconds_count 4", text)
+
+    def test_counter_labels(self):
+        registry = metrics.Registry()
+        counter = registry.counter("test_errors", "Test errors.", ("operation",))
+        counter.inc(operation="start_session")
+        counter.inc(operation="start_session")
+        counter.inc(operation="end_session")
+
+        self.assertEqual(counter.value(operation="start_session"), 2)
+        text = registry.render()
+        self.assertIn("# TYPE test_errors_total counter", text)
+        self.assertIn('test_errors_total{operation="start_session"} 2', text)
+        self.assertIn('test_errors_total{operation="end_session"} 1', text)
+
+    def test_listeners_see_raw_observations(self):
+        registry = metrics.Registry()
+        histogram = registry.histogram("test_listened_seconds", "Test.")
+        seen = []
+        registry.listen(lambda name, value: seen.append((name, value)))
+        histogram.observe(0.123)
+        self.assertEqual(seen, [("test_listened_seconds", 0.123)])
+
+    def test_disabled_metrics_record_nothing(self):
+        registry = metrics.Registry()
+        histogram = registry.histogram("test_disabled_seconds", "Test.")
+        with patch.object(Config, "METRICS", False):
+            histogram.observe(1.0)
+        self.assertEqual(histogram.count, 0)
+
+    def test_turn_timer_records_each_mark_once(self):
+        before = metrics.FIRST_AUDIO_SENT.count, metrics.SPEECH_TO_SPEECH.count, metrics.LLM_FIRST_TOKEN.count
+        turn = metrics.TurnTimer(speech_ended_at=metrics.clock() - 0.5)
+        turn.token()
+        turn.token()
+        turn.audio_sent()
+        turn.audio_sent()
+
+        after = metrics.FIRST_AUDIO_SENT.count, metrics.SPEECH_TO_SPEECH.count, metrics.LLM_FIRST_TOKEN.count
+        self.assertEqual([b - a for a, b in zip(before, after)], [1, 1, 1])
+        self.assertGreaterEqual(turn.first_audio_at - turn.speech_ended_at, 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
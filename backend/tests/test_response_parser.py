@@ -0,0 +1,52 @@
+import unittest
+from app.response_parser import ResponseStreamParser
+
+RAW = (
+    "<emotion_thought>They sound tired. Be gentle.</emotion_thought>"
+    "Hey, you sound exhausted today. [softly] Did you sleep at all last night? "
+    "Tell me everything, okay? Version 3.5 of me is listening!"
+)
+
+def run_parser(raw, chunk_size):
+    parser = ResponseStreamParser()
+    segments = []
+    for i in range(0, len(raw), chunk_size):
+        segments.extend(parser.feed(raw[i:i + chunk_size]))
+    segments.extend(parser.flush())
+    return parser, segments
+
+class TestResponseStreamParser(unittest.TestCase):
+    def test_reasoning_never_leaks_across_chunk_boundaries(self):
+        for chunk_size in (1, 2, 3, 5, 7, 16, len(RAW)):
+            parser, segments = run_parser(RAW, chunk_size)
+            spoken = " ".join(s.text for s in segments)
+            self.assertNotIn("emotion_thought", spoken)
+            self.assertNotIn("Be gentle", spoken)
+            self.assertTrue(parser.text.startswith("Hey, you sound exhausted"))
+
+    def test_sentence_segments_and_offsets(self):
+        parser, segments = run_parser(RAW, 4)
+        self.assertEqual([s.text for s in segments], [
+            "Hey, you sound exhausted today.",
+            "[softly] Did you sleep at all last night?",
+            "Tell me everything, okay? Version 3.5 of me is listening!",
+        ])
+        spoken = "".join(parser._spoken)
+        for segment in segments:
+            self.assertEqual(spoken[segment.start:segment.end], segment.text)
+
+    def test_decimal_point_is_not_a_boundary(self):
+        parser = ResponseStreamParser(min_chars=5)
+        segments = parser.feed("The ratio was 3.")
+        segments += parser.feed("5 which is wild. Right")
+        segments += parser.flush()
+        self.assertEqual([s.text for s in segments], ["The ratio was 3.5 which is wild.", "Right"])
+
+    def test_clean_full_response(self):
+        text = ResponseStreamParser.clean("<emotion_thought>x</emotion_thought>Goodnight! [whispers] Sleep well, okay?")
+        self.assertEqual(text, "Goodnight! [whispers] Sleep well, okay?")
+        # A lone "<" is just text
+        self.assertEqual(ResponseStreamParser.clean("a < b"), "a < b")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import contextlib
+import uuid
+from datetime import datetime
+from app.conversation_history_store import ConversationHistoryStore, GIST_SNIPPET_CHARS
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def fetch(self, query, *args):
+        self.pool.queries.append((query, args))
+        return self.pool.rows
+
+    async def execute(self, query, *args):
+        self.pool.queries.append((query, args))
+
+class FakePool:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    @contextlib.asynccontextmanager
+    async def acquire(self):
+        yield FakeConnection(self)
+
+def row(session_id, started_at, role, content, minute):
+    return {
+        "session_id": session_id,
+        "started_at": started_at,
+        "role": role,
+        "content": content,
+        "timestamp": datetime(2026, 1, 1, 12, minute)
+    }
+
+class TestSessionGist(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.newer, self.older = uuid.uuid4(), uuid.uuid4()
+        self.pool = FakePool([
+            row(self.newer, datetime(2026, 1, 2), "user", "hi again", 0),
+            row(self.newer, datetime(2026, 1, 2), "assistant", "bye", 5),
+            row(self.older, datetime(2026, 1, 1), "user", "only message", 1),
+        ])
+        self.store = ConversationHistoryStore()
+        self.store.pool = self.pool
+
+    async def test_single_parameterized_query(self):
+        self.store.current_session_id = uuid.uuid4()
+        gists = await self.store.get_recent_sessions_gist(limit=3)
+
+        self.assertEqual(len(self.pool.queries), 1)
+        query, args = self.pool.queries[0]
+        self.assertEqual(args, (3, self.store.current_session_id, GIST_SNIPPET_CHARS))
+        self.assertNotIn(str(self.store.current_session_id), query)
+
+        self.assertEqual([g["date"] for g in gists], ["2026-01-02", "2026-01-01"])
+        self.assertEqual([m["content"] for m in gists[0]["interaction"]], ["hi again", "bye"])
+        self.assertEqual(len(gists[1]["interaction"]), 1)
+
+    async def test_cache_is_shared_and_cleared_on_end_session(self):
+        other = self.store.for_session()
+        await self.store.get_recent_sessions_gist()
+        await other.get_recent_sessions_gist()
+        self.assertEqual(len(self.pool.queries), 1)
+
+        other.current_session_id = uuid.uuid4()
+        await other.end_session()
+        await self.store.get_recent_sessions_gist()
+        self.assertEqual(len([q for q, _ in self.pool.queries if "LATERAL" in q]), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import asyncio
+from unittest.mock import patch
+from app.session_registry import SessionRegistry
+from app.llm import LLMService
+from app.wake_word import WakeWordPool
+
+class FakePipeline:
+    def __init__(self, websocket=None):
+        self.websocket = websocket
+        self.running = True
+        self.cleaned_up = False
+
+    def stop(self):
+        self.running = False
+
+    async def run(self):
+        try:
+            while self.running:
+                await asyncio.sleep(0.01)
+        finally:
+            self.cleaned_up = True
+
+class TestSessionRegistry(unittest.IsolatedAsyncioTestCase):
+    async def test_sessions_are_isolated(self):
+        registry = SessionRegistry(FakePipeline, max_sessions=4)
+        id_a, a = registry.open(websocket="tab-a")
+        id_b, b = registry.open(websocket="tab-b")
+
+        self.assertNotEqual(id_a, id_b)
+        self.assertIsNot(a, b)
+        self.assertEqual(len(registry), 2)
+        self.assertIs(registry.get(id_a), a)
+        # Never someone else's session
+        self.assertIsNone(registry.get(None))
+        self.assertIsNone(registry.get("unknown"))
+
+        await registry.close(id_a)
+        self.assertTrue(a.cleaned_up)
+        self.assertFalse(b.cleaned_up)
+        self.assertNotIn(id_a, registry)
+
+        await registry.close_all()
+        self.assertTrue(b.cleaned_up)
+        self.assertEqual(len(registry), 0)
+
+    async def test_capacity_limit(self):
+        registry = SessionRegistry(FakePipeline, max_sessions=1)
+        registry.open()
+        session_id, pipeline = registry.open()
+        self.assertIsNone(session_id)
+        self.assertIsNone(pipeline)
+        await registry.close_all()
+
+    async def test_pinned_session_takes_no_client_slot(self):
+        registry = SessionRegistry(FakePipeline, max_sessions=1)
+        registry.open(session_id="local", pinned=True)
+        session_id, _ = registry.open(websocket="tab-a")
+        self.assertIsNotNone(session_id)
+        self.assertEqual(registry.open(websocket="tab-b"), (None, None))
+        await registry.close_all()
+
+    @patch('app.llm.genai.Client')
+    def test_llm_session_views_share_client_not_memory(self, mock_client):
+        shared = LLMService()
+        a = shared.for_session()
+        b = shared.for_session()
+
+        a.add_to_memory("user", "Hello from tab A")
+        self.assertEqual(len(a.memory), 1)
+        self.assertEqual(len(b.memory), 0)
+        self.assertIs(a.client, b.client)
+
+    def test_wake_word_engines_are_reused_not_shared(self):
+        class FakeDetector:
+            def __init__(self):
+                self.resets = 0
+                self.deleted = False
+            def reset(self):
+                self.resets += 1
+            def delete(self):
+                self.deleted = True
+
+        pool = WakeWordPool(FakeDetector, max_idle=1)
+        a, b = pool.acquire(), pool.acquire()
+        self.assertIsNot(a, b) # Porcupine keeps per-stream state: one engine per live session
+        pool.release(a)
+        pool.release(b)
+        self.assertTrue(b.deleted) # Past max_idle
+        self.assertIs(pool.acquire(), a) # Next client reuses the engine, its buffered audio cleared
+        self.assertEqual(a.resets, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import asyncio
+from collections import deque
+from app.speculation import Speculator
+
+class FakeLLM:
+    def __init__(self):
+        self.memory = deque([{"role": "user", "content": "earlier"}])
+        self.calls = []
+        self.closed = 0
+        self.failures = [] # Delays (s) after which the next calls raise, in order
+
+    async def generate_response_stream(self, user_text, prior_messages=None):
+        self.calls.append((user_text, prior_messages))
+        try:
+            if self.failures:
+                await asyncio.sleep(self.failures.pop(0))
+                raise ConnectionError("Gemini unavailable")
+            for word in ["Oh ", "nice, ", "tell ", "me ", "more!"]:
+                await asyncio.sleep(0.01)
+                yield word
+        finally:
+            self.closed += 1
+
+class TestSpeculator(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.llm = FakeLLM()
+        self.speculator = Speculator(self.llm, stable_window=0.05, min_similarity=0.9, enabled=True)
+
+    async def test_hit_reuses_prefetched_tokens(self):
+        self.speculator.observe_partial("[Normal Volume] I just got a new puppy", 1.0)
+        self.speculator.observe_partial("[Normal Volume] I just got a new puppy.", 1.03) # Same words: still stable
+        self.speculator.advance(1.04)
+        self.assertEqual(self.llm.calls, []) # Window not over yet
+        self.speculator.advance(1.05)
+        await asyncio.sleep(0.1)
+        self.assertEqual(len(self.llm.calls), 1)
+        self.assertEqual(self.llm.calls[0][0], "[Normal Volume] I just got a new puppy.") # Latest partial, cues included
+        self.assertEqual(self.llm.calls[0][1], list(self.llm.memory)) # User text not in memory yet
+
+        stream = self.speculator.claim("[Normal Volume] I just got a new puppy!")
+        tokens = [t async for t in stream]
+        self.assertEqual("".join(tokens), "Oh nice, tell me more!")
+        self.assertEqual(len(self.llm.calls), 1) # Nothing regenerated
+        stats = self.speculator.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 0))
+        # Claimed ~100 ms after the start, but a live call would only have waited for its first token (~10 ms)
+        self.assertGreaterEqual(stats["saved_ms_total"], 5)
+        self.assertLess(stats["saved_ms_total"], 50)
+
+    async def test_miss_cancels_and_falls_back(self):
+        self.speculator.observe_partial("I just got a new", 1.0)
+        self.speculator.advance(1.06)
+        await asyncio.sleep(0.02)
+        self.assertIsNone(self.speculator.claim("I just got a new job offer in Berlin"))
+        await asyncio.sleep(0.02)
+        self.assertEqual(self.llm.closed, 1) # Upstream stream closed
+        self.assertEqual(self.speculator.stats()["hit_rate"], 0.0)
+
+    async def test_cue_mismatch_is_a_miss(self):
+        self.speculator.observe_partial("[Normal Volume] I'm fine", 1.0)
+        self.speculator.advance(1.06)
+        self.assertIsNone(self.speculator.claim("[Soft/Whisper Voice] I'm fine")) # Same words, said differently
+        self.assertEqual(self.speculator.outcomes[-1], {"outcome": "miss", "similarity": 1.0, "same_cues": False})
+
+    async def test_changing_partial_never_speculates(self):
+        for i, text in enumerate(["I", "I was", "I was going", "I was going to"]):
+            self.speculator.observe_partial(text, 1.0 + i * 0.03)
+            self.speculator.advance(1.02 + i * 0.03)
+        self.assertEqual(self.llm.calls, [])
+        self.assertIsNone(self.speculator.claim("I was going to say"))
+        self.assertEqual(self.speculator.outcomes[-1], {"outcome": "none"})
+
+    async def test_window_runs_on_audio_time(self):
+        self.speculator.observe_partial("[Normal Volume] Can you hear me", 1.0)
+        await asyncio.sleep(0.1) # Wall time alone never starts the LLM
+        self.assertEqual(self.llm.calls, [])
+        self.speculator.advance(1.05) # A backlog drained: the audio caught up at once
+        await asyncio.sleep(0.02)
+        self.assertEqual(len(self.llm.calls), 1)
+
+    async def speculate(self, text):
+        self.speculator.observe_partial(text, 1.0)
+        self.speculator.advance(1.06)
+        await asyncio.sleep(0) # Let the prefetch start
+
+    async def test_failed_prefetch_is_a_miss(self):
+        self.llm.failures = [0.0]
+        await self.speculate("[Normal Volume] Tell me a joke")
+        await asyncio.sleep(0.02)
+        self.assertIsNone(self.speculator.claim("[Normal Volume] Tell me a joke"))
+        self.assertEqual(self.speculator.outcomes[-1], {"outcome": "failed"})
+
+    async def test_prefetch_failing_after_claim_falls_back_to_live(self):
+        self.llm.failures = [0.05]
+        await self.speculate("[Normal Volume] Tell me a joke")
+        stream = self.speculator.claim("[Normal Volume] Tell me a joke")
+        tokens = [t async for t in stream]
+        self.assertEqual("".join(tokens), "Oh nice, tell me more!") # From the live call
+        self.assertEqual(len(self.llm.calls), 2)
+        stats = self.speculator.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["saved_ms_total"]), (0, 1, 0))
+        self.assertEqual(self.speculator.outcomes[-1]["outcome"], "failed")
+
+if __name__ == '__main__':
+    unittest.main()
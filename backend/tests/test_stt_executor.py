@@ -0,0 +1,108 @@
+import unittest
+from unittest.mock import patch
+import asyncio
+import threading
+import time
+import numpy as np
+from app.frame_pipeline import FrameFeatures
+from app.stt_executor import STTExecutor
+from app.whisper_stt_service import WhisperSTTService
+
+class TestSTTExecutor(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.executor = STTExecutor(max_workers=1, max_pending=2)
+
+    async def asyncTearDown(self):
+        self.executor.shutdown()
+
+    async def test_decode_does_not_block_loop(self):
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        beat = asyncio.create_task(heartbeat())
+        result = await self.executor.submit(lambda: time.sleep(0.2) or ("hello", True))
+        beat.cancel()
+
+        self.assertEqual(result, ("hello", True))
+        # The loop kept ticking while the "decode" slept on the worker thread
+        self.assertGreater(ticks, 5)
+
+        stats = self.executor.stats()
+        self.assertEqual(stats["jobs_completed"], 1)
+        self.assertGreaterEqual(stats["offloaded_seconds"], 0.2)
+        self.assertEqual(stats["pending"], 0)
+
+    async def test_backlog_is_bounded(self):
+        first = self.executor.submit(time.sleep, 0.1)
+        second = self.executor.submit(time.sleep, 0.1)
+        third = self.executor.submit(time.sleep, 0.1)
+
+        self.assertIsNone(third)
+        self.assertEqual(self.executor.stats()["jobs_rejected"], 1)
+        await asyncio.gather(first, second)
+        self.assertEqual(self.executor.stats()["pending"], 0)
+
+    async def test_background_jobs_never_take_a_final_slot(self):
+        release = threading.Event()
+        partial = self.executor.submit(release.wait, background=True)
+        self.assertIsNone(self.executor.submit(release.wait, background=True)) # Worker busy: skipped
+        finals = [self.executor.submit(release.wait), self.executor.submit(release.wait)]
+        self.assertNotIn(None, finals) # Queued behind the partial, not refused because of it
+        release.set()
+        await asyncio.gather(partial, *finals)
+        self.assertEqual(self.executor.stats()["jobs_rejected"], 0)
+
+    @patch('app.stt_executor.os.cpu_count', return_value=16)
+    @patch('app.stt_executor.Config')
+    def test_capacity_scales_with_max_sessions(self, config, _cpu_count):
+        config.MAX_SESSIONS, config.STT_WORKERS, config.STT_MAX_PENDING = 32, 0, 0
+        executor = STTExecutor()
+        self.addCleanup(executor.shutdown)
+        self.assertEqual((executor.max_workers, executor.max_pending), (4, 32))
+
+def frame(is_speech, at):
+    pcm = (np.ones(480, dtype=np.int16) * (8000 if is_speech else 0)).tobytes()
+    return FrameFeatures(memoryview(pcm), is_speech, 0.24 if is_speech else 0.0, at, 0.03)
+
+class TestSTTBacklog(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.executor = STTExecutor(max_workers=1, max_pending=1)
+        self.stt = WhisperSTTService(executor=self.executor)
+        self.stt.model = object()
+        self.stt.transcribe = lambda audio: (f"{len(audio)} bytes", True)
+        self.stt.partials_enabled = False
+        self.stt.endpointer.min_silence = self.stt.endpointer.max_silence = -1.0 # End on the first silent frame
+        self.stt.max_hold = 0.1
+        self.stt.start()
+        self.release = threading.Event()
+        self.busy = self.executor.submit(self.release.wait) # Another session's final takes the only slot
+
+    async def asyncTearDown(self):
+        self.release.set()
+        await self.busy
+        self.stt.close()
+
+    async def test_full_backlog_keeps_the_utterance(self):
+        self.assertEqual(self.stt.process_frames([frame(True, 0.0), frame(True, 0.03), frame(False, 0.06)]), [])
+        self.assertEqual(len(self.stt.audio_buffer), 3) # Held, not lost
+        self.release.set()
+        await self.busy
+
+        pending = self.stt.process_frames([frame(False, 0.09)]) # Retried on the next frame
+        self.assertEqual(await pending[0], ("3840 bytes", True)) # Nothing missing, trailing frame included
+        self.assertEqual(len(self.stt.audio_buffer), 0)
+
+    async def test_utterance_dropped_after_max_hold_is_reported(self):
+        frames = [frame(True, 0.0), frame(False, 0.03), frame(False, 0.06), frame(False, 0.09), frame(False, 0.18)]
+        pending = self.stt.process_frames(frames)
+        self.assertEqual(len(pending), 1)
+        self.assertEqual(await pending[0], (None, True))
+        self.assertEqual(len(self.stt.audio_buffer), 0)
+
+if __name__ == '__main__':
+    unittest.main()
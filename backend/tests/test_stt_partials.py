@@ -0,0 +1,63 @@
+import unittest
+import threading
+import numpy as np
+from app.frame_pipeline import FrameFeatures
+from app.whisper_stt_service import WhisperSTTService
+from app.stt_executor import STTExecutor
+
+def frame(is_speech, level=8000):
+    pcm = (np.ones(480, dtype=np.int16) * (level if is_speech else 0)).tobytes()
+    return FrameFeatures(memoryview(pcm), is_speech, level / 32768.0 if is_speech else 0.0, 0.0, 0.03)
+
+class TestSTTPartials(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.stt = WhisperSTTService(executor=STTExecutor(max_workers=1, max_pending=4))
+        self.stt.model = object()
+        self.stt.partial_interval_frames = 2
+        self.hypotheses = iter(["so I", "so I was thinking", "so I was thinking we could"])
+        self.stt._decode = lambda audio: next(self.hypotheses)
+        self.stt.start()
+
+    async def asyncTearDown(self):
+        self.stt.close()
+
+    async def test_partials_emit_with_stable_prefix(self):
+        results = []
+        for _ in range(3):
+            pending = self.stt.process_frames([frame(True), frame(True)])
+            self.assertEqual(len(pending), 1)
+            results.append(await pending[0])
+
+        self.assertEqual(results[-1], ("so I was thinking we could", False))
+        self.assertEqual(self.stt.stable_text, "so I was thinking")
+
+    async def test_partials_yield_to_busy_worker(self):
+        release = threading.Event()
+        busy = self.stt.executor.submit(release.wait)
+
+        # Worker is busy: no partial is queued behind it
+        self.assertEqual(self.stt.process_frames([frame(True)] * 4), [])
+        release.set()
+        await busy
+        self.assertEqual(self.stt.executor.stats()["jobs_rejected"], 0)
+
+    async def test_stale_partial_is_discarded(self):
+        decoding = threading.Event()
+        self.stt._decode = lambda audio: decoding.wait(1) and "too late"
+        pending = self.stt.process_frames([frame(True), frame(True)])
+        self.stt.reset() # Utterance finalized while the partial was decoding
+        decoding.set()
+        self.assertIsNone(await pending[0])
+        self.assertEqual(self.stt.stable_text, "")
+
+    async def test_live_cues_match_the_final_transcript(self):
+        self.stt.partials_enabled = False
+        self.stt._decode = lambda audio: "I missed you"
+        self.stt.process_frames([frame(True, 600)] * 40 + [frame(False)] * 5) # 1.35 s, quiet
+        cues = self.stt.live_cues()
+        self.assertTrue(cues.startswith("[Soft/Whisper Voice] ")) # Volume and pace
+        text, _ = self.stt.transcribe(b"".join(self.stt.audio_buffer))
+        self.assertEqual(text, f"{cues} I missed you")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+from unittest.mock import patch
+import asyncio
+import os
+import tempfile
+from app.tts import TTSService
+from app.tts_cache import TTSCache
+
+CHUNKS = [b"\x01\x02" * 100, b"\x03\x04" * 37, b"\x05"]
+
+class TestTTSCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = TTSCache(directory=self.directory.name, memory_bytes=1000, disk_bytes=10_000, max_chars=50, enabled=True)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_key_ignores_whitespace_but_not_voice(self):
+        key = TTSCache.key("Goodbye!", "voice", "eleven_v3", "pcm_24000")
+        self.assertEqual(key, TTSCache.key("  Goodbye!\n", "voice", "eleven_v3", "pcm_24000"))
+        self.assertNotEqual(key, TTSCache.key("Goodbye!", "other", "eleven_v3", "pcm_24000"))
+        self.assertNotEqual(key, TTSCache.key("goodbye!", "voice", "eleven_v3", "pcm_24000"))
+
+    async def test_disk_tier_survives_restart_with_same_chunks(self):
+        self.cache.put("a", CHUNKS)
+        reopened = TTSCache(directory=self.directory.name, memory_bytes=1000, disk_bytes=10_000, enabled=True)
+        self.assertEqual(await reopened.get("a"), CHUNKS) # Same chunk boundaries as the live stream
+        self.assertEqual(await reopened.get("a"), CHUNKS) # Now from memory
+        stats = reopened.stats()
+        self.assertEqual((stats["disk_hits"], stats["memory_hits"], stats["misses"]), (1, 1, 0))
+        self.assertIsNone(await reopened.get("missing"))
+
+    async def test_lru_eviction_in_both_tiers(self):
+        cache = TTSCache(directory=self.directory.name, memory_bytes=700, disk_bytes=900, enabled=True)
+        for key in ("a", "b", "c"):
+            cache.put(key, [bytes(300)])
+            if key == "b":
+                await cache.get("a") # "a" is now more recent than "b"
+        self.assertEqual(list(cache._memory), ["a", "c"])
+        self.assertEqual(list(cache._disk), ["a", "c"]) # Each file is 300 bytes + header
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name, "b.tts")))
+        self.assertEqual(cache.stats()["evictions"], {"memory": 1, "disk": 1})
+
+    async def test_corrupt_file_is_a_miss(self):
+        self.cache.put("a", CHUNKS)
+        with open(os.path.join(self.directory.name, "a.tts"), "r+b") as f:
+            f.truncate(20)
+        self.cache._memory.clear()
+        self.assertIsNone(await self.cache.get("a"))
+        self.assertNotIn("a", self.cache)
+
+    async def test_disk_read_does_not_hold_the_lock(self):
+        self.cache.put("a", CHUNKS)
+        self.cache._memory.clear()
+        self.cache._memory_used = 0
+        read = self.cache._read_disk
+        def read_while_checking(key):
+            self.assertFalse(self.cache._lock.locked()) # Runs on a worker thread, unlocked
+            return read(key)
+        self.cache._read_disk = read_while_checking
+        self.assertEqual(await self.cache.get("a"), CHUNKS)
+        self.assertEqual(self.cache.stats()["disk_hits"], 1)
+
+class TestTTSServiceCache(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        with patch('app.tts.ElevenLabs'):
+            self.tts = TTSService()
+        self.tts.cache = TTSCache(directory="", memory_bytes=10_000, max_chars=50, enabled=True)
+        self.calls = []
+        def stream_audio(text):
+            self.calls.append(text)
+            return iter(CHUNKS)
+        self.tts.stream_audio = stream_audio
+
+    async def asyncTearDown(self):
+        self.tts.close()
+
+    async def wait_cached(self, text):
+        key = self.tts.cache.key(text, self.tts.voice_id, self.tts.model_id, self.tts.output_format)
+        for _ in range(100):
+            if key in self.tts.cache:
+                return
+            await asyncio.sleep(0.01)
+        self.fail(f"{text!r} was never cached")
+
+    async def test_repeat_is_replayed_with_identical_chunks(self):
+        live = [c async for c in self.tts.astream_audio("[laughs] Okay!")]
+        await self.wait_cached("[laughs] Okay!")
+        replayed = [c async for c in self.tts.astream_audio("[laughs]  Okay!")]
+        self.assertEqual(replayed, live)
+        self.assertEqual(self.calls, ["[laughs] Okay!"])
+
+    async def test_long_and_interrupted_utterances_are_not_cached(self):
+        long_text = "This sentence is far too long to be worth keeping in the cache."
+        [c async for c in self.tts.astream_audio(long_text)]
+        stream = self.tts.astream_audio("Hi!")
+        async for _chunk in stream:
+            break # Barge-in
+        await stream.aclose()
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.tts.cache.stats()["memory_entries"], 0)
+
+    async def test_warm_up_renders_each_phrase_once(self):
+        self.assertEqual(await self.tts.warm_up(["Goodbye!", "Hey! Good to see you."]), 2)
+        await self.wait_cached("Goodbye!")
+        await self.wait_cached("Hey! Good to see you.")
+        self.assertEqual(await self.tts.warm_up(["Goodbye!"]), 0)
+        [c async for c in self.tts.astream_audio("Goodbye!")]
+        self.assertEqual(self.calls, ["Goodbye!", "Hey! Good to see you."])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from unittest.mock import patch
+import asyncio
+import time
+from app.tts import TTSService
+from app.tts_pipeline import TTSPipeline
+
+class SlowTTS(TTSService):
+    """Each sentence takes `latency` seconds before its first chunk, like a network round trip."""
+    def __init__(self, latency=0.1):
+        with patch('app.tts.ElevenLabs'):
+            super().__init__()
+        self.latency = latency
+        self.requested = []
+
+    def stream_audio(self, text):
+        self.requested.append(text)
+
+        def generate():
+            time.sleep(self.latency)
+            yield f"{text}-1".encode()
+            yield f"{text}-2".encode()
+        return generate()
+
+class TestTTSPipeline(unittest.IsolatedAsyncioTestCase):
+    async def test_audio_is_delivered_in_order_with_overlap(self):
+        tts = SlowTTS(latency=0.1)
+        delivered = []
+
+        async def sink(chunk):
+            delivered.append(chunk)
+
+        pipeline = TTSPipeline(tts, sink, lookahead=2)
+        start = time.perf_counter()
+        for text in ("a", "b", "c"):
+            pipeline.submit(text)
+        await pipeline.drain()
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(delivered, [b"a-1", b"a-2", b"b-1", b"b-2", b"c-1", b"c-2"])
+        # Sequential synthesis would need 3 round trips (~0.3 s)
+        self.assertLess(elapsed, 0.25)
+
+    async def test_lookahead_window_is_respected(self):
+        tts = SlowTTS(latency=0.05)
+        pipeline = TTSPipeline(tts, self._noop, lookahead=1)
+        for text in ("a", "b", "c", "d"):
+            pipeline.submit(text)
+        # Playing sentence + 1 ahead
+        self.assertEqual(sum(1 for item in pipeline._pending if item.task), 2)
+        await pipeline.drain()
+        self.assertEqual(sorted(tts.requested), ["a", "b", "c", "d"])
+
+    async def test_playback_floor_overlaps_synthesis(self):
+        tts = SlowTTS(latency=0.1)
+        loop = asyncio.get_running_loop()
+        first_audio_at = None
+        started = []
+
+        async def sink(chunk):
+            nonlocal first_audio_at
+            if first_audio_at is None:
+                first_audio_at = loop.time()
+
+        start = loop.time()
+        pipeline = TTSPipeline(tts, sink, not_before=start + 0.15, on_start=lambda: started.append(True))
+        pipeline.submit("a")
+        await pipeline.drain()
+
+        # Audio is held until the floor, but the 0.1 s synthesis ran inside it, not after it
+        self.assertGreaterEqual(first_audio_at - start, 0.15)
+        self.assertLess(first_audio_at - start, 0.24)
+        self.assertEqual(started, [True])
+
+    async def test_cancel_stops_delivery(self):
+        tts = SlowTTS(latency=0.1)
+        delivered = []
+
+        async def sink(chunk):
+            delivered.append(chunk)
+
+        pipeline = TTSPipeline(tts, sink)
+        pipeline.submit("a")
+        pipeline.submit("b")
+        await asyncio.sleep(0.02)
+        pipeline.cancel()
+        await asyncio.sleep(0.2)
+        self.assertEqual(delivered, [])
+
+    async def _noop(self, chunk):
+        pass
+
+if __name__ == '__main__':
+    unittest.main()
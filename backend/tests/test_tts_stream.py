@@ -0,0 +1,90 @@
+import unittest
+from unittest.mock import patch
+import asyncio
+import concurrent.futures
+import threading
+import time
+from app.tts import TTSService
+
+class FakeUpstream:
+    """Stands in for the blocking ElevenLabs chunk generator."""
+    def __init__(self, chunks=5, delay=0.05):
+        self.chunks = chunks
+        self.delay = delay
+        self.closed = False
+
+    def __iter__(self):
+        try:
+            for i in range(self.chunks):
+                time.sleep(self.delay)
+                yield f"chunk-{i}".encode()
+        finally:
+            self.closed = True
+
+class TestTTSStreamBridge(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        with patch('app.tts.ElevenLabs'):
+            self.tts = TTSService()
+
+    async def asyncTearDown(self):
+        self.tts.close()
+
+    async def test_chunks_stream_without_blocking_loop(self):
+        upstream = FakeUpstream(chunks=5, delay=0.05)
+        self.tts.stream_audio = lambda text: iter(upstream)
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        beat = asyncio.create_task(heartbeat())
+        chunks = [chunk async for chunk in self.tts.astream_audio("hello")]
+        beat.cancel()
+
+        self.assertEqual(chunks, [f"chunk-{i}".encode() for i in range(5)])
+        self.assertGreater(ticks, 10)
+
+    async def test_stopping_early_closes_upstream(self):
+        upstream = FakeUpstream(chunks=100, delay=0.01)
+        generator = iter(upstream)
+        self.tts.stream_audio = lambda text: generator
+
+        stream = self.tts.astream_audio("hello")
+        async for _chunk in stream:
+            break
+        await stream.aclose()
+
+        for _ in range(50):
+            if upstream.closed:
+                break
+            await asyncio.sleep(0.02)
+        self.assertTrue(upstream.closed)
+
+    async def test_first_chunk_timeout(self):
+        self.tts.first_chunk_timeout = 0.1
+        self.tts.stream_audio = lambda text: iter(FakeUpstream(chunks=1, delay=1.0))
+
+        start = time.perf_counter()
+        chunks = [chunk async for chunk in self.tts.astream_audio("hello")]
+        self.assertEqual(chunks, [])
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    async def test_abandoned_queued_stream_never_opens_upstream(self):
+        self.tts._pool = concurrent.futures.ThreadPoolExecutor(max_workers=1) # Saturated pool
+        release = threading.Event()
+        busy = asyncio.get_running_loop().run_in_executor(self.tts._pool, release.wait)
+        opened = []
+        self.tts.stream_audio = lambda text: opened.append(text) or iter(FakeUpstream(chunks=1, delay=0))
+        self.tts.first_chunk_timeout = 0.05
+
+        self.assertEqual([chunk async for chunk in self.tts.astream_audio("hello")], []) # Timed out while queued
+        release.set()
+        await busy
+        await asyncio.sleep(0.05)
+        self.assertEqual(opened, [])
+
+if __name__ == '__main__':
+    unittest.main()
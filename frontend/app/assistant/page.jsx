@@ -5,9 +5,18 @@ import AssistantCircle from '../../components/AssistantCircle';
 import { useBackendState } from '../../hooks/useBackendState';
 import { useVoiceInteraction } from '../../hooks/useVoiceInteraction';
 
+const BACKEND_URL = 'http://localhost:8000';
+
 export default function AssistantPage() {
-    const state = useBackendState();
-    const { isConnected, isConnecting, isRecording, startRecording } = useVoiceInteraction();
+    const { isConnected, isConnecting, isRecording, sessionId, startRecording } = useVoiceInteraction();
+    const state = useBackendState(sessionId);
+
+    // The "Start" button brought us here: start this tab's session once the backend has assigned it.
+    useEffect(() => {
+        if (!sessionId) return;
+        fetch(`${BACKEND_URL}/start-session?session_id=${encodeURIComponent(sessionId)}`, { method: 'POST' })
+            .catch((error) => console.error('Error starting session:', error));
+    }, [sessionId]);
 
     // Automatically start recording once we arrive at this page and socket is connected.
     // The user has already given explicit interaction via the "Start" button on the previous page.
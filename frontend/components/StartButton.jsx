@@ -7,26 +7,13 @@ export default function StartButton() {
     const router = useRouter();
     const [isStarting, setIsStarting] = useState(false);
 
-    const handleStart = async () => {
+    const handleStart = () => {
         setIsStarting(true);
-        try {
-            const res = await fetch('http://localhost:8000/start-session', {
-                method: 'POST',
-            });
-
-            if (res.ok) {
-                // Optional: wait a bit for animation
-                setTimeout(() => {
-                    router.push('/assistant');
-                }, 500);
-            } else {
-                console.error('Failed to start session');
-                setIsStarting(false);
-            }
-        } catch (error) {
-            console.error('Error starting session:', error);
-            setIsStarting(false);
-        }
+        // The assistant page starts its own session once the WebSocket has assigned one
+        // Optional: wait a bit for animation
+        setTimeout(() => {
+            router.push('/assistant');
+        }, 500);
     };
 
     return (
@@ -4,13 +4,16 @@ import { useState, useEffect } from 'react';
 
 const BACKEND_URL = 'http://localhost:8000';
 
-export function useBackendState() {
+export function useBackendState(sessionId) {
   const [state, setState] = useState('idle'); // idle | listening | thinking | speaking
 
   useEffect(() => {
+    // Only this tab's own session (from the WebSocket), never another client's
+    if (!sessionId) return;
+
     const interval = setInterval(async () => {
       try {
-        const res = await fetch(`${BACKEND_URL}/status`);
+        const res = await fetch(`${BACKEND_URL}/status?session_id=${encodeURIComponent(sessionId)}`);
         if (res.ok) {
           const data = await res.json();
           // Assuming backend returns { state: "idle" | "listening" | ... }
@@ -25,7 +28,7 @@ export function useBackendState() {
     }, 500); // Poll every 500ms
 
     return () => clearInterval(interval);
-  }, []);
+  }, [sessionId]);
 
   return state;
 }
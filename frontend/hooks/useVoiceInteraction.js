@@ -8,6 +8,7 @@ export function useVoiceInteraction() {
     const [isConnected, setIsConnected] = useState(false);
     const [isConnecting, setIsConnecting] = useState(false);
     const [isRecording, setIsRecording] = useState(false);
+    const [sessionId, setSessionId] = useState(null); // This tab's conversation on the backend
     const wsRef = useRef(null);
     const audioContextRef = useRef(null);
     const playbackAudioContextRef = useRef(null);
@@ -121,7 +122,11 @@ export function useVoiceInteraction() {
                 } else {
                     try {
                         const msg = JSON.parse(event.data);
-                        if (msg.type === 'stop') {
+                        if (msg.type === 'session') {
+                            setSessionId(msg.session_id);
+                        } else if (msg.type === 'dropped') {
+                            console.warn("Backend couldn't transcribe the last utterance:", msg.reason);
+                        } else if (msg.type === 'stop') {
                             console.log("Stopping audio playback (Barge-in)");
                             if (playbackAudioContextRef.current) {
                                 playbackAudioContextRef.current.close().catch(() => { });
@@ -137,6 +142,7 @@ export function useVoiceInteraction() {
 
             socket.onclose = (event) => {
                 setIsConnected(false);
+                setSessionId(null); // The backend closed this conversation
                 setIsConnecting(false);
                 // Only log if it's not a normal closure or if we've already connected before
                 if (reconnectAttempts > 0 || !event.wasClean) {
@@ -172,5 +178,5 @@ export function useVoiceInteraction() {
         };
     }, [playChunk, stopRecording]);
 
-    return { isConnected, isConnecting, isRecording, startRecording, stopRecording };
+    return { isConnected, isConnecting, isRecording, sessionId, startRecording, stopRecording };
 }